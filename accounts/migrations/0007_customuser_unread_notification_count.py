@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:54
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_unread_notifications(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    Invitation = apps.get_model('events', 'Invitation')
+    unread = (
+        Invitation.objects.filter(invitee=OuterRef('pk'), is_read=False)
+        .order_by()
+        .values('invitee')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    CustomUser.objects.update(
+        unread_notification_count=Coalesce(Subquery(unread, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_name_search_indexes'),
+        ('events', '0006_invitation_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='unread_notification_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_unread_notifications, migrations.RunPython.noop),
+    ]
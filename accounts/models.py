@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
 from django.utils import timezone
 from datetime import timedelta
 from django.db.models.signals import post_save
@@ -11,11 +12,21 @@ class CustomUser(AbstractUser):
     email = models.EmailField(unique=True) 
     preferences = models.ManyToManyField('personalize.Interest', blank=True, related_name="users")
     bookmarked_events = models.ManyToManyField('events.Event', blank=True, related_name="bookmarked_by")
+    # Denormalized count of unread invitations, kept up to date by the events views.
+    unread_notification_count = models.PositiveIntegerField(default=0)
     
 
     USERNAME_FIELD = 'email'        # login with email instead of username
     REQUIRED_FIELDS = ['username']  # still require username at registration
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Case-insensitive prefix search in the invitee picker.
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+            models.Index(Lower('first_name'), name='user_first_name_lower_idx'),
+            models.Index(Lower('last_name'), name='user_last_name_lower_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
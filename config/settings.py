@@ -61,6 +61,7 @@ MIDDLEWARE = [
 # --- URL and WSGI Configuration (Updated for 'config' directory) ---
 ROOT_URLCONF = 'config.urls'
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # --- Database Configuration ---
 DATABASES = {
@@ -107,6 +108,16 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# --- Cache ---
+# Local memory by default; point CACHE_BACKEND at the file-based (or Redis) backend
+# to share cached responses between worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'travel-assistant'),
+    }
+}
+
 # --- Default Primary Key ---
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -122,6 +133,18 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
 }
 
+# --- Events Settings ---
+EVENTS_PAGE_SIZE = int(os.getenv('EVENTS_PAGE_SIZE', 20))      # Default page size for cursor pagination
+EVENTS_MAX_PAGE_SIZE = int(os.getenv('EVENTS_MAX_PAGE_SIZE', 100))
+EVENTS_CACHE_TIMEOUT = int(os.getenv('EVENTS_CACHE_TIMEOUT', 60 * 60))  # Seconds a cached response is kept
+# Pub/sub backend for the notification stream; swap in a shared backend when running several workers.
+EVENTS_NOTIFICATION_BROKER = os.getenv('EVENTS_NOTIFICATION_BROKER', 'events.broker.InProcessBroker')
+EVENTS_STREAM_KEEPALIVE = int(os.getenv('EVENTS_STREAM_KEEPALIVE', 20))  # Seconds between keep-alive comments
+EVENTS_BACKGROUND_WORKERS = int(os.getenv('EVENTS_BACKGROUND_WORKERS', 2))  # Threads for image processing and clean-ups
+EVENTS_IMAGE_FORMAT = os.getenv('EVENTS_IMAGE_FORMAT', 'WEBP')  # WEBP or JPEG, for the resized event images
+EVENTS_PURGE_CHUNK_SIZE = int(os.getenv('EVENTS_PURGE_CHUNK_SIZE', 500))  # Rows deleted per transaction when purging an event
+EVENTS_SYNC_SETTLE_SECONDS = int(os.getenv('EVENTS_SYNC_SETTLE_SECONDS', 5))  # Age before a change is handed out by ?since= delta syncs
+
 # --- CORS Settings ---
 CORS_ALLOW_ALL_ORIGINS = True # For development
 
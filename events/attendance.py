@@ -0,0 +1,78 @@
+"""
+Attendance bookkeeping for events.
+
+Event.attendee_count mirrors the size of the attendees relation so lists can
+show and sort by it without counting the M2M table. Seats are taken with a
+single conditional UPDATE: the row is only incremented while it is still
+below capacity, so concurrent accepts can never overbook an event.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import personal_feed
+from .cache import bump_event_version, bump_feed_version
+from .models import Event
+
+Attendee = Event.attendees.through
+
+
+def reserve_seat(event_id):
+    """Takes one seat of the event. Returns False when the event is full."""
+    has_room = Q(capacity__isnull=True) | Q(attendee_count__lt=F('capacity'))
+    reserved = Event.objects.filter(has_room, pk=event_id).update(
+        attendee_count=F('attendee_count') + 1,
+        updated_at=timezone.now(),
+    )
+    if reserved:
+        # The count is shown in the feed and ranks the personal feed; update()
+        # skips the post_save receivers.
+        bump_event_version(event_id)
+        personal_feed.schedule_refresh([event_id])
+    return bool(reserved)
+
+
+def add_attendee(event, user):
+    """
+    Adds the user to the event's attendees, taking a seat for them. Returns
+    False (and changes nothing) when the event is full. Call inside a
+    transaction so the seat is given back if anything later fails.
+    """
+    if Attendee.objects.filter(event_id=event.pk, customuser_id=user.pk).exists():
+        return True
+    if not reserve_seat(event.pk):
+        return False
+    event.attendees.add(user)
+    return True
+
+
+def _actual_counts():
+    return Coalesce(
+        Subquery(
+            Attendee.objects.filter(event_id=OuterRef('pk'))
+            .order_by()
+            .values('event_id')
+            .annotate(total=Count('id'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def drifted_events():
+    """Events whose attendee_count does not match their attendees relation."""
+    return Event.objects.annotate(actual_count=_actual_counts()).exclude(attendee_count=F('actual_count'))
+
+
+def reconcile_attendee_counts():
+    """Recounts every drifted event with a single UPDATE. Returns the ids fixed."""
+    event_ids = list(drifted_events().values_list('pk', flat=True))
+    if not event_ids:
+        return []
+    Event.objects.filter(pk__in=event_ids).update(attendee_count=_actual_counts(), updated_at=timezone.now())
+    for event_id in event_ids:
+        bump_event_version(event_id, feed=False)
+    bump_feed_version()
+    personal_feed.schedule_refresh(event_ids)
+    return event_ids
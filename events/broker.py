@@ -0,0 +1,107 @@
+"""
+Publish/subscribe channel for pushing invitation updates to connected clients.
+
+The server-sent-events view subscribes one queue per open connection, and the
+invitation views publish to a user id. The default InProcessBroker only
+reaches subscribers in the current process, which is enough for a single ASGI
+worker. Multi-worker deployments can point EVENTS_NOTIFICATION_BROKER at a
+BaseBroker subclass backed by a shared transport (Redis pub/sub, Postgres
+LISTEN/NOTIFY, ...).
+"""
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BaseBroker(ABC):
+    """
+    Interface for notification brokers.
+
+    publish() is called from ordinary (synchronous) request code and must be
+    thread-safe. subscribe() is called from the async streaming view and returns
+    a Subscription-like object with an awaitable get() and a close() method.
+    """
+
+    @abstractmethod
+    def publish(self, user_id, message):
+        ...
+
+    @abstractmethod
+    def subscribe(self, user_id):
+        ...
+
+    @abstractmethod
+    def unsubscribe(self, subscription):
+        ...
+
+
+class Subscription:
+    """A bounded queue owned by one streaming connection."""
+
+    def __init__(self, broker, user_id, maxsize):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def deliver(self, message):
+        # Runs on the subscriber's event loop. A client that stopped reading
+        # loses its oldest messages rather than growing the queue without bound.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker(BaseBroker):
+    """Fans messages out to the subscribers of this process."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's loop has shut down; it will unsubscribe itself.
+                pass
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id, self.queue_size)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """Returns the process-wide broker configured by EVENTS_NOTIFICATION_BROKER."""
+    path = getattr(settings, 'EVENTS_NOTIFICATION_BROKER', 'events.broker.InProcessBroker')
+    return import_string(path)()
@@ -0,0 +1,171 @@
+"""
+Versioned response cache for the public event endpoints.
+
+Cached payloads are never invalidated by deleting keys. Instead every cache key
+embeds a version counter (one for the whole feed, one per event and one for the
+tag catalogue) and writers simply bump the counter. Readers then look up a key
+that does not exist yet, rebuild it once, and the old entries age out on their
+own. This only relies on get/set/add/incr, so it works the same way with the
+local-memory, file-based or Redis cache backends.
+
+The same counters double as HTTP validators: a strong ETag is derived from the
+versions a response depends on, and each bump also records when it happened,
+which becomes the Last-Modified date.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .versioning import seed
+
+FEED_VERSION_KEY = 'events:feed:version'
+EVENT_VERSION_KEY = 'events:event:{pk}:version'
+TAGS_VERSION_KEY = 'events:tags:version'
+BOOKMARKS_VERSION_KEY = 'events:bookmarks:{user_id}:version'
+HITS_KEY = 'events:cache:hits'
+MISSES_KEY = 'events:cache:misses'
+
+
+def _timeout():
+    return getattr(settings, 'EVENTS_CACHE_TIMEOUT', 60 * 60)
+
+
+def _seed_timeout(key):
+    # Readers seed the version of any pk a client asks for, including ones
+    # that do not exist, so per-event versions expire with the payloads they
+    # key. A re-seeded version is a new number, which only costs one rebuild.
+    return _timeout() if key.startswith(EVENT_VERSION_KEY.split('{')[0]) else None
+
+
+def _incr(key, initial):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter expired, was evicted or was never set. add() never
+        # overwrites a counter another writer seeded meanwhile, and every bump
+        # still goes through incr(), so concurrent bumps cannot collapse into
+        # one version (wherever the backend's incr itself is atomic).
+        cache.add(key, initial, timeout=_seed_timeout(key))
+        cache.incr(key)
+
+
+def _bump(key):
+    _incr(key, seed())
+    cache.set(f'{key}:modified', time.time(), timeout=_seed_timeout(key))
+
+
+def _count(key):
+    _incr(key, 1)
+
+
+def _versions(*keys):
+    """
+    Returns ([version, ...], last_modified) for the given version keys in one
+    cache round trip, seeding any that are missing.
+    """
+    modified_keys = [f'{key}:modified' for key in keys]
+    found = cache.get_many([*keys, *modified_keys])
+    missing = [key for key in keys if key not in found]
+    for key in missing:
+        cache.add(key, seed(), timeout=_seed_timeout(key))
+        cache.add(f'{key}:modified', time.time(), timeout=_seed_timeout(key))
+    if missing:
+        found.update(cache.get_many([*missing, *(f'{key}:modified' for key in missing)]))
+    last_modified = max(found.get(key, time.time()) for key in modified_keys)
+    return [found[key] for key in keys], last_modified
+
+
+# --- Version bumps (called from the model signals) ---
+def bump_feed_version():
+    transaction.on_commit(lambda: _bump(FEED_VERSION_KEY))
+
+
+def bump_event_version(pk, feed=True):
+    """
+    Invalidates the cached detail payload of one event and, unless told
+    otherwise, every cached feed page as well. The bump runs after the current
+    transaction commits, so no reader can cache pre-commit data under the new version.
+    """
+    def bump():
+        _bump(EVENT_VERSION_KEY.format(pk=pk))
+        if feed:
+            _bump(FEED_VERSION_KEY)
+    transaction.on_commit(bump)
+
+
+def bump_tags_version():
+    transaction.on_commit(lambda: _bump(TAGS_VERSION_KEY))
+
+
+def bump_bookmarks_version(user_id):
+    """Bookmarks only change the per-user `is_bookmarked` flags, never the cached payloads."""
+    transaction.on_commit(lambda: _bump(BOOKMARKS_VERSION_KEY.format(user_id=user_id)))
+
+
+# --- Cache keys ---
+def list_cache_key(request, scope='feed'):
+    """Key for a cached event list page; every query parameter is part of the key."""
+    digest = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    (version,), _ = _versions(FEED_VERSION_KEY)
+    return f'events:list:{scope}:{version}:{digest}'
+
+
+def detail_cache_key(pk):
+    return detail_validators(pk)[0]
+
+
+# --- HTTP validators ---
+def list_validators(request, scope='feed'):
+    """
+    Returns (etag, last_modified) for an event list as seen by request.user.
+    Lists depend on every event (the feed version) and on the user's own
+    bookmarks (the `is_bookmarked` flags).
+    """
+    keys = [FEED_VERSION_KEY]
+    if request.user.is_authenticated:
+        keys.append(BOOKMARKS_VERSION_KEY.format(user_id=request.user.id))
+    versions, last_modified = _versions(*keys)
+    identity = f'{scope}:{request.user.id}:{versions}:{request.get_full_path()}'
+    return f'"{hashlib.md5(identity.encode()).hexdigest()}"', last_modified
+
+
+def detail_validators(pk):
+    """
+    Returns (cache_key, etag, last_modified) for one event. A detail payload is
+    fully identified by its versioned cache key, so the ETag is a digest of it.
+    """
+    (event_version, tags_version), last_modified = _versions(EVENT_VERSION_KEY.format(pk=pk), TAGS_VERSION_KEY)
+    key = f'events:detail:{pk}:{event_version}:{tags_version}'
+    return key, f'"{hashlib.md5(key.encode()).hexdigest()}"', last_modified
+
+
+# --- Lookup ---
+def get_or_build(key, build):
+    """
+    Returns (payload, hit). On a miss the payload is built with `build()` and
+    stored; `build` may return None to signal that nothing should be cached.
+    """
+    payload = cache.get(key)
+    if payload is not None:
+        _count(HITS_KEY)
+        return payload, True
+
+    _count(MISSES_KEY)
+    payload = build()
+    if payload is not None:
+        cache.set(key, payload, _timeout())
+    return payload, False
+
+
+def cache_stats():
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
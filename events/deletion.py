@@ -0,0 +1,108 @@
+"""
+Two-phase deletion of events.
+
+Deleting an event with thousands of invitations, attendees and bookmarks in
+one go makes the ORM collector load every related row and keeps the database
+write-locked for the whole cascade (on SQLite that blocks every other
+writer). Instead:
+
+1. soft_delete_event() stamps deleted_at, which hides the event from
+   Event.objects straight away, and settles everything the rest of the app
+   derives from it (caches, search, facets, unread counters).
+2. purge_event() runs in the background pool and deletes the related rows in
+   small chunks, each in its own short transaction, and the event row last.
+
+Every chunk commits on its own, so an interrupted purge loses nothing and
+simply continues where it stopped when it is run again (the
+purge_deleted_events command picks up every event still waiting).
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from . import facets, personal_feed, search
+from .cache import bump_event_version
+from .models import Event, Invitation
+from .notifications import adjust_unread_count
+from .tasks import submit_after_commit
+
+logger = logging.getLogger(__name__)
+
+
+def _chunk_size():
+    return getattr(settings, 'EVENTS_PURGE_CHUNK_SIZE', 500)
+
+
+def soft_delete_event(event):
+    """Hides the event at once and schedules the purge of its rows."""
+    with transaction.atomic():
+        now = timezone.now()
+        if not Event.objects.filter(pk=event.pk).update(deleted_at=now, updated_at=now):
+            return  # Already deleted.
+
+        # Pending invitations stop counting as unread now rather than when the
+        # purge gets to them; marking them read keeps the post_delete receiver
+        # from releasing them a second time.
+        unread = Invitation.objects.filter(event_id=event.pk, is_read=False)
+        adjust_unread_count(unread.values('invitee_id'), -1)
+        unread.update(is_read=True, updated_at=now)
+
+        facets.adjust(facets.event_changes(
+            (event.event_date, event.category), None, lambda: event.tags.values_list('id', flat=True)
+        ))
+        search.remove_events([event.pk])
+        personal_feed.schedule_refresh([event.pk])
+        bump_event_version(event.pk)
+        submit_after_commit(purge_event, event.pk)
+
+
+# --- Purge ---
+def _purge_steps(event_id):
+    """(name, queryset) for every kind of row that belongs to the event, in deletion order."""
+    return [
+        ('invitations', Invitation.objects.filter(event_id=event_id)),
+        ('attendees', Event.attendees.through.objects.filter(event_id=event_id)),
+        ('bookmarks', CustomUser.bookmarked_events.through.objects.filter(event_id=event_id)),
+        ('tags', Event.tags.through.objects.filter(event_id=event_id)),
+    ]
+
+
+def purge_event(event_id, chunk_size=None, pause=0, on_progress=None):
+    """
+    Deletes a soft-deleted event chunk by chunk. `on_progress(step, deleted)`
+    is called after every chunk with the running total of that step; `pause`
+    sleeps between chunks to leave room for other writers. Returns the number
+    of rows deleted per step, or None when the event is not waiting for a purge.
+    """
+    chunk_size = chunk_size or _chunk_size()
+    if not Event.all_objects.filter(pk=event_id, deleted_at__isnull=False).exists():
+        return None
+
+    totals = {}
+    for step, rows in _purge_steps(event_id):
+        totals[step] = 0
+        while True:
+            with transaction.atomic():
+                chunk = list(rows.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+                if not chunk:
+                    break
+                rows.model.objects.filter(pk__in=chunk).delete()
+            totals[step] += len(chunk)
+            if on_progress:
+                on_progress(step, totals[step])
+            logger.info("Purging event %s: %s %s deleted", event_id, totals[step], step)
+            if pause:
+                time.sleep(pause)
+
+    # Nothing refers to the event any more, so this is a single-row delete.
+    Event.all_objects.filter(pk=event_id).delete()
+    logger.info("Purged event %s", event_id)
+    return totals
+
+
+def pending_purges():
+    return Event.all_objects.filter(deleted_at__isnull=False).order_by('deleted_at').values_list('id', flat=True)
@@ -0,0 +1,73 @@
+"""
+Streaming CSV / JSON Lines exports of an event's attendees and invitations.
+
+Rows come from values() projections read with .iterator(), so neither model
+instances nor the full result set are ever held in memory; they are encoded
+and handed to the StreamingHttpResponse a chunk at a time.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Event, Invitation
+
+FORMATS = ('csv', 'jsonl')
+CHUNK_SIZE = 2000
+
+# Export name -> (column name, values() path) pairs.
+EXPORTS = {
+    'attendees': (
+        ('user_id', 'customuser_id'),
+        ('username', 'customuser__username'),
+        ('first_name', 'customuser__first_name'),
+        ('last_name', 'customuser__last_name'),
+        ('email', 'customuser__email'),
+    ),
+    'invitations': (
+        ('invitation_id', 'id'),
+        ('user_id', 'invitee_id'),
+        ('username', 'invitee__username'),
+        ('email', 'invitee__email'),
+        ('status', 'status'),
+        ('is_read', 'is_read'),
+        ('invited_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ),
+}
+
+
+def _rows(event_id, export):
+    columns = EXPORTS[export]
+    if export == 'attendees':
+        queryset = Event.attendees.through.objects.filter(event_id=event_id).order_by('customuser_id')
+    else:
+        queryset = Invitation.objects.filter(event_id=event_id).order_by('id')
+    return queryset.values_list(*(path for _, path in columns)).iterator(chunk_size=CHUNK_SIZE)
+
+
+class _Echo:
+    """A file-like object whose write() just returns the line, for csv.writer."""
+    def write(self, value):
+        return value
+
+
+def stream_export(event_id, export, fmt):
+    """Yields the encoded export in chunks of up to CHUNK_SIZE rows."""
+    names = [name for name, _ in EXPORTS[export]]
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        encode = writer.writerow
+        yield writer.writerow(names)
+    else:
+        encoder = DjangoJSONEncoder()
+        encode = lambda row: encoder.encode(dict(zip(names, row))) + '\n'
+
+    chunk = []
+    for row in _rows(event_id, export):
+        chunk.append(encode(row))
+        if len(chunk) >= CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
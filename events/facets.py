@@ -0,0 +1,138 @@
+"""
+Category and tag counts of upcoming events, for the filter chips of the event
+browser.
+
+The counts are built with two aggregate queries and kept in the cache as one
+counter per category and per tag, under keys that include today's date (so
+events drop out of the counts on their own once their day has passed). Event
+and tag changes then adjust the affected counters with incr/decr instead of
+throwing everything away. Whenever an adjustment cannot be applied (a counter
+is missing, or a whole relation was cleared) the counts are simply dropped
+and rebuilt by the next reader.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+FACETS_KEY = 'events:facets:{day}'
+COUNTER_KEY = 'events:facets:{day}:{kind}:{value}'
+
+
+def _today():
+    return timezone.localdate()
+
+
+def _timeout():
+    return getattr(settings, 'EVENTS_CACHE_TIMEOUT', 60 * 60)
+
+
+def _counter_key(day, kind, value):
+    return COUNTER_KEY.format(day=day, kind=kind, value=value)
+
+
+def is_upcoming(event_date):
+    return event_date is not None and event_date >= _today()
+
+
+# --- Building and reading ---
+def _build(day):
+    from .models import Event
+    from personalize.models import Interest
+
+    categories = dict(
+        Event.objects.filter(event_date__gte=day)
+        .order_by()
+        .values_list('category')
+        .annotate(count=Count('id'))
+    )
+    tags = list(
+        Interest.objects.filter(events__event_date__gte=day, events__deleted_at__isnull=True)
+        .annotate(count=Count('events'))
+        .values_list('id', 'name', 'count')
+    )
+
+    # Counters first, then the key that marks them as complete.
+    tag_names = {pk: name for pk, name, _ in tags}
+    counts = {_counter_key(day, 'category', value): categories.get(value, 0) for value, _ in Event.CATEGORY_CHOICES}
+    counts.update({_counter_key(day, 'tag', pk): count for pk, _, count in tags})
+    cache.set_many(counts, _timeout())
+    cache.set(FACETS_KEY.format(day=day), tag_names, _timeout())
+    return tag_names, counts
+
+
+def get_facets():
+    """Returns {'categories': [...], 'tags': [...]}, each item with a count."""
+    from .models import Event
+
+    day = _today()
+    tag_names = cache.get(FACETS_KEY.format(day=day))
+    if tag_names is not None:
+        keys = [_counter_key(day, 'category', value) for value, _ in Event.CATEGORY_CHOICES]
+        keys += [_counter_key(day, 'tag', pk) for pk in tag_names]
+        counts = cache.get_many(keys)
+    if tag_names is None or len(counts) < len(keys):
+        tag_names, counts = _build(day)
+
+    categories = [
+        {'value': value, 'label': label, 'count': counts[_counter_key(day, 'category', value)]}
+        for value, label in Event.CATEGORY_CHOICES
+    ]
+    tags = [
+        {'id': pk, 'name': name, 'count': counts[_counter_key(day, 'tag', pk)]}
+        for pk, name in tag_names.items()
+    ]
+    tags = [tag for tag in tags if tag['count'] > 0]
+    tags.sort(key=lambda tag: (-tag['count'], tag['name']))
+    return {'categories': categories, 'tags': tags}
+
+
+# --- Incremental updates (called from the model signals) ---
+def invalidate():
+    transaction.on_commit(lambda: cache.delete(FACETS_KEY.format(day=_today())))
+
+
+def _apply(changes):
+    day = _today()
+    if cache.get(FACETS_KEY.format(day=day)) is None:
+        return  # Nothing built for today; the next reader counts from scratch.
+    try:
+        for (kind, value), delta in changes.items():
+            key = _counter_key(day, kind, value)
+            if delta > 0:
+                cache.incr(key, delta)
+            else:
+                cache.decr(key, -delta)
+    except ValueError:
+        # A counter expired or a tag got its first upcoming event.
+        cache.delete(FACETS_KEY.format(day=day))
+
+
+def adjust(changes):
+    """
+    Applies {('category', value) or ('tag', pk): delta} to today's counters once
+    the current transaction has committed.
+    """
+    changes = {facet: delta for facet, delta in changes.items() if delta}
+    if changes:
+        transaction.on_commit(lambda: _apply(changes))
+
+
+def event_changes(before, after, tag_ids):
+    """
+    The counter changes for one event going from `before` to `after`, each an
+    (event_date, category) pair or None when the event does not exist.
+    `tag_ids` is a callable, only called when the event's tags have to move.
+    """
+    changes = {}
+    was_counted = before is not None and is_upcoming(before[0])
+    is_counted = after is not None and is_upcoming(after[0])
+    if was_counted:
+        changes[('category', before[1])] = changes.get(('category', before[1]), 0) - 1
+    if is_counted:
+        changes[('category', after[1])] = changes.get(('category', after[1]), 0) + 1
+    if was_counted != is_counted:
+        for tag_id in tag_ids():
+            changes[('tag', tag_id)] = 1 if is_counted else -1
+    return changes
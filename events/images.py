@@ -0,0 +1,105 @@
+"""
+Resized variants of event images.
+
+The original upload is kept as-is; a worker from the background pool renders
+a small thumbnail (feed cards) and a medium image (detail page) from it after
+the event is saved. Variants are stored under a name derived from their own
+content, so they can be served with far-future cache headers and identical
+images are only stored once.
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from .cache import bump_event_version
+
+# Variant name -> (max width, max height), largest first. Images are only
+# ever scaled down and keep their aspect ratio.
+VARIANTS = {
+    'medium': (1024, 1024),
+    'thumbnail': (320, 320),
+}
+VARIANT_DIR = 'event_images/variants'
+
+
+def _output_format():
+    fmt = getattr(settings, 'EVENTS_IMAGE_FORMAT', 'WEBP').upper()
+    if fmt == 'WEBP' and not features.check('webp'):
+        # Pillow was built without libwebp.
+        return 'JPEG'
+    return fmt
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    if fmt == 'WEBP':
+        image.save(buffer, 'WEBP', quality=80, method=4)
+    else:
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.save(buffer, 'JPEG', quality=82, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def render_variants(source):
+    """
+    Returns {variant: (bytes, extension)} for an open image file. Each variant is
+    scaled from the previous (larger) one rather than from the full original.
+    """
+    fmt = _output_format()
+    extension = 'webp' if fmt == 'WEBP' else 'jpg'
+
+    image = Image.open(source)
+    # Lets the JPEG decoder skip straight to a reduced resolution that is
+    # still at least as large as the biggest variant.
+    image.draft('RGB', max(VARIANTS.values()))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    rendered = {}
+    for name, size in VARIANTS.items():
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        rendered[name] = (_encode(image, fmt), extension)
+    return rendered
+
+
+def store_variant(name, data, extension):
+    """Saves one variant under a content-hashed path and returns that path."""
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    path = f'{VARIANT_DIR}/{digest}-{name}.{extension}'
+    if not default_storage.exists(path):
+        path = default_storage.save(path, ContentFile(data))
+    return path
+
+
+def generate_event_variants(event_id):
+    """
+    Renders and stores the variants of one event's current image and records
+    them on the row. Returns False when there was nothing to do.
+    """
+    from .models import Event
+
+    source_name = Event.objects.filter(pk=event_id).values_list('image', flat=True).first()
+    if not source_name:
+        return False
+
+    with default_storage.open(source_name, 'rb') as source:
+        rendered = render_variants(source)
+    paths = {
+        f'image_{name}': store_variant(name, data, extension)
+        for name, (data, extension) in rendered.items()
+    }
+
+    # Matching on the source name means a worker that finishes after the image
+    # was replaced again cannot overwrite the newer variants. update() skips the
+    # post_save receivers, so the cached payloads are invalidated here.
+    updated = Event.objects.filter(pk=event_id, image=source_name).update(**paths, updated_at=timezone.now())
+    if updated:
+        bump_event_version(event_id)
+    return bool(updated)
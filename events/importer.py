@@ -0,0 +1,132 @@
+"""
+Bulk import of events from CSV or JSON Lines.
+
+Rows are read one at a time from the input stream, validated with
+EventImportSerializer and written in batches: one bulk INSERT for the events
+of a batch and one for their tag rows. Memory use therefore depends on the
+batch size, not on the size of the file.
+
+bulk_create() does not send model signals, so everything the Event receivers
+normally keep up to date is refreshed here: the search index per batch, and
+the cached responses, facet counts and "For You" index once at the end.
+Image variants are not rendered; run generate_event_image_variants afterwards.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from . import facets, personal_feed, search
+from .cache import bump_feed_version
+from .models import Event
+from .serializers import EventImportSerializer
+
+FORMATS = ('csv', 'jsonl')
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename):
+    """Guesses the format from a file name; defaults to CSV."""
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def read_rows(stream, fmt):
+    """
+    Yields (line_number, row) pairs from a binary or text stream. Rows that
+    cannot be parsed are yielded as (line_number, None).
+    """
+    if isinstance(stream.read(0), bytes):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Empty cells count as "not given", so optional columns can stay blank.
+            yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+class EventImporter:
+    """
+    Imports rows for one organizer. `on_progress(stats)` is called after every
+    batch and `on_error(line_number, errors)` for every rejected row.
+    """
+
+    def __init__(self, organizer, batch_size=1000, dry_run=False, on_progress=None, on_error=None):
+        from personalize.models import Interest
+
+        self.organizer = organizer
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.stats = {'processed': 0, 'created': 0, 'failed': 0, 'errors': []}
+
+        tag_ids = {}
+        for pk, name in Interest.objects.values_list('id', 'name'):
+            tag_ids[name.lower()] = pk
+            tag_ids[str(pk)] = pk
+        # One serializer validates every row; run_validation() keeps no per-row state.
+        self.serializer = EventImportSerializer(context={'tag_ids': tag_ids})
+
+    def _fail(self, line_number, errors):
+        self.stats['failed'] += 1
+        if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+            self.stats['errors'].append({'line': line_number, 'errors': errors})
+        if self.on_error:
+            self.on_error(line_number, errors)
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        if not self.dry_run:
+            with transaction.atomic():
+                events = Event.objects.bulk_create([event for event, _ in batch])
+                Through = Event.tags.through
+                Through.objects.bulk_create([
+                    Through(event_id=event.pk, interest_id=tag_id)
+                    for event, tag_ids in batch
+                    for tag_id in tag_ids
+                ])
+                search.index_events([event.pk for event in events])
+            self.stats['created'] += len(batch)
+        if self.on_progress:
+            self.on_progress(self.stats)
+
+    def run(self, rows):
+        """Imports (line_number, row) pairs, as produced by read_rows(). Returns the stats."""
+        batch = []
+        for line_number, row in rows:
+            self.stats['processed'] += 1
+            if row is None:
+                self._fail(line_number, {'non_field_errors': ["The line could not be parsed."]})
+                continue
+            try:
+                data = self.serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                self._fail(line_number, exc.detail)
+                continue
+
+            tag_ids = data.pop('tags', [])
+            batch.append((Event(organizer=self.organizer, **data), tag_ids))
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        self._flush(batch)
+
+        if self.stats['created']:
+            bump_feed_version()
+            facets.invalidate()
+            personal_feed.invalidate()
+        return self.stats
@@ -0,0 +1,31 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+
+from events.images import generate_event_variants
+from events.models import Event
+from events.tasks import submit
+
+
+class Command(BaseCommand):
+    help = "Renders the resized image variants of events that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Re-render the variants of every event.")
+
+    def handle(self, *args, **options):
+        events = Event.objects.exclude(image='')
+        if not options['all']:
+            events = events.filter(image_thumbnail='')
+        event_ids = list(events.values_list('id', flat=True))
+
+        futures = [submit(generate_event_variants, event_id) for event_id in event_ids]
+        done = failed = 0
+        for future in as_completed(futures):
+            try:
+                done += bool(future.result())
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Failed: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered variants for {done} of {len(event_ids)} events ({failed} failed)."))
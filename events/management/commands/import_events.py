@@ -0,0 +1,61 @@
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from events.importer import FORMATS, EventImporter, detect_format, read_rows
+
+
+class Command(BaseCommand):
+    help = "Imports events from a CSV or JSON Lines file ('-' reads standard input)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for standard input.")
+        parser.add_argument('--organizer', required=True, help="Username of the organizer the events belong to.")
+        parser.add_argument('--format', choices=FORMATS, help="Input format (default: guessed from the file name).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row without saving anything.")
+
+    def handle(self, *args, **options):
+        try:
+            organizer = get_user_model().objects.get(username=options['organizer'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['organizer']!r}.")
+
+        path = options['path']
+        fmt = options['format'] or ('csv' if path == '-' else detect_format(path))
+        started = time.monotonic()
+
+        def progress(stats):
+            rate = stats['processed'] / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f"{stats['processed']} rows read, {stats['failed']} rejected ({rate:.0f} rows/s)")
+
+        def error(line_number, errors):
+            self.stderr.write(f"Line {line_number}: {errors}")
+
+        importer = EventImporter(
+            organizer,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            on_progress=progress,
+            on_error=error,
+        )
+        if path == '-':
+            stats = importer.run(read_rows(sys.stdin.buffer, fmt))
+        else:
+            try:
+                stream = open(path, 'rb')
+            except OSError as exc:
+                raise CommandError(str(exc))
+            with stream:
+                stats = importer.run(read_rows(stream, fmt))
+
+        elapsed = time.monotonic() - started
+        if options['dry_run']:
+            valid = stats['processed'] - stats['failed']
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {valid} valid, {stats['failed']} rejected ({elapsed:.1f}s)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Imported {stats['created']} events, {stats['failed']} rejected ({elapsed:.1f}s)."
+            ))
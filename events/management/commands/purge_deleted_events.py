@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from events.deletion import pending_purges, purge_event
+
+
+class Command(BaseCommand):
+    help = "Finishes purging soft-deleted events, e.g. after a crash interrupted a background purge."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, help="Rows deleted per transaction.")
+        parser.add_argument('--pause', type=float, default=0, help="Seconds to sleep between chunks.")
+
+    def handle(self, *args, **options):
+        event_ids = list(pending_purges())
+        if not event_ids:
+            self.stdout.write("No deleted events are waiting to be purged.")
+            return
+
+        for event_id in event_ids:
+            self.stdout.write(f"Purging event {event_id}...")
+            totals = purge_event(
+                event_id,
+                chunk_size=options['chunk_size'],
+                pause=options['pause'],
+                on_progress=lambda step, deleted: self.stdout.write(f"  {step}: {deleted} deleted"),
+            )
+            if totals is not None:
+                summary = ', '.join(f"{count} {step}" for step, count in totals.items())
+                self.stdout.write(self.style.SUCCESS(f"Purged event {event_id} ({summary})."))
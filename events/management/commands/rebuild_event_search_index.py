@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from events.search import rebuild_index, uses_fts5
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text search index for events from scratch."
+
+    def handle(self, *args, **options):
+        if not uses_fts5():
+            self.stdout.write("This database searches events without a separate index; nothing to rebuild.")
+            return
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} events."))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from events.attendance import drifted_events, reconcile_attendee_counts
+
+
+class Command(BaseCommand):
+    help = "Repairs Event.attendee_count where it no longer matches the attendees relation."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report the drifted events.")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            for event in drifted_events().only('id', 'title', 'attendee_count'):
+                self.stdout.write(f"#{event.pk} {event.title}: stored {event.attendee_count}, actual {event.actual_count}")
+            return
+        fixed = reconcile_attendee_counts()
+        self.stdout.write(self.style.SUCCESS(f"Fixed the attendee count of {len(fixed)} events."))
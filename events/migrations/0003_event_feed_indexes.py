@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-17 05:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_event_attendees_invitation'),
+        ('personalize', '0005_day_touristspot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['-event_date', '-id'], name='event_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['organizer', '-event_date', '-id'], name='event_organizer_feed_idx'),
+        ),
+    ]
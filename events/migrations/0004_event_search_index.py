@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 only exists on SQLite; PostgreSQL searches with tsvector and needs no table.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS events_event_fts USING fts5("
+        "title, description, venue_name, address, tags, tokenize='unicode61 remove_diacritics 2')"
+    )
+    # Index whatever events already exist.
+    schema_editor.execute(
+        "INSERT INTO events_event_fts (rowid, title, description, venue_name, address, tags) "
+        "SELECT e.id, e.title, e.description, e.venue_name, e.address, "
+        "(SELECT group_concat(i.name, ' ') FROM events_event_tags t "
+        "JOIN personalize_interest i ON i.id = t.interest_id WHERE t.event_id = e.id) "
+        "FROM events_event e"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS events_event_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_event_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
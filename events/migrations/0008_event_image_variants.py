@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_event_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='image_medium',
+            field=models.ImageField(blank=True, editable=False, upload_to='event_images/variants/'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='event_images/variants/'),
+        ),
+    ]
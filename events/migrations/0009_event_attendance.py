@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:02
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_attendees(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    Attendee = Event.attendees.through
+    attendees = (
+        Attendee.objects.filter(event_id=OuterRef('pk'))
+        .order_by()
+        .values('event_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Event.objects.update(attendee_count=Coalesce(Subquery(attendees, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_event_image_variants'),
+        ('personalize', '0005_day_touristspot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='attendee_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['-attendee_count', '-id'], name='event_popular_idx'),
+        ),
+        migrations.RunPython(count_attendees, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_event_attendance'),
+        ('personalize', '0005_day_touristspot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['event_date', 'category'], name='event_calendar_idx'),
+        ),
+    ]
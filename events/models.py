@@ -1,6 +1,20 @@
 from django.db import models
 from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
 from personalize.models import Interest # Reusing Interest model for tags
+from .cache import bump_event_version, bump_tags_version
+from . import facets, personal_feed, search
+from .images import generate_event_variants
+from .tasks import submit_after_commit
+from .notifications import adjust_unread_count
+
+class ActiveEventManager(models.Manager):
+    """Hides soft-deleted events, which are waiting for the background purge."""
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 class Event(models.Model):
     # --- CHOICES FOR CATEGORY DROPDOWN ---
@@ -24,6 +38,9 @@ class Event(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     image = models.ImageField(upload_to='event_images/')
+    # Resized copies of `image`, rendered in the background (see images.py).
+    image_medium = models.ImageField(upload_to='event_images/variants/', blank=True, editable=False)
+    image_thumbnail = models.ImageField(upload_to='event_images/variants/', blank=True, editable=False)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
 
     # --- DATE & TIME ---
@@ -34,6 +51,13 @@ class Event(models.Model):
     # --- LOCATION ---
     venue_name = models.CharField(max_length=255)
     address = models.TextField()
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+
+    # --- ATTENDANCE ---
+    capacity = models.PositiveIntegerField(null=True, blank=True)  # None means unlimited
+    # Denormalized size of `attendees`, kept in step by attendance.py.
+    attendee_count = models.PositiveIntegerField(default=0, editable=False)
 
     # --- ORGANIZER DETAILS ---
     organizer_name = models.CharField(max_length=100)
@@ -42,6 +66,27 @@ class Event(models.Model):
     organizer_website = models.URLField(blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set when the organizer deletes the event; the row is purged later (see deletion.py).
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ActiveEventManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination for the public feed and the "My Events" tab.
+            models.Index(fields=['-event_date', '-id'], name='event_feed_idx'),
+            models.Index(fields=['organizer', '-event_date', '-id'], name='event_organizer_feed_idx'),
+            # Bounding-box prefilter for the "events near me" search. deleted_at
+            # is included so the ActiveEventManager filter is answered from the
+            # index too (SQLite does not treat a partial index as covering).
+            models.Index(fields=['latitude', 'longitude', 'deleted_at'], name='event_geo_idx'),
+            # "Most popular" ordering of the feed.
+            models.Index(fields=['-attendee_count', '-id'], name='event_popular_idx'),
+            # Date-range scans of the calendar view, optionally narrowed to a category.
+            models.Index(fields=['event_date', 'category'], name='event_calendar_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -58,11 +103,168 @@ class Invitation(models.Model):
     status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         # Ensure a user can only be invited to the same event once.
         unique_together = ('event', 'invitee')
         ordering = ['-created_at']
+        indexes = [
+            # The notification inbox, and the ?since= delta sync.
+            models.Index(fields=['invitee', '-created_at'], name='invitation_inbox_idx'),
+            models.Index(fields=['invitee', 'updated_at', 'id'], name='invitation_sync_idx'),
+        ]
 
     def __str__(self):
         return f"{self.inviter.username} invited {self.invitee.username} to {self.event.title}"
+
+
+# --- Response cache invalidation ---
+@receiver([post_save, post_delete], sender=Event)
+def invalidate_event_cache(sender, instance, **kwargs):
+    bump_event_version(instance.pk)
+
+def _changed_event_ids(sender, instance, action, reverse, pk_set):
+    """
+    Returns the ids of the events touched by an m2m_changed signal on one of the
+    Event relations, or None when the action is not one we react to.
+    """
+    if not reverse:
+        return [instance.pk] if action in ('post_add', 'post_remove', 'post_clear') else None
+
+    # Reverse side (an Interest or a user): the affected events are in pk_set,
+    # except for clear(), where they have to be looked up before the rows go away.
+    if action == 'pre_clear':
+        relation = 'tags' if sender is Event.tags.through else 'attendees'
+        return list(Event.objects.filter(**{relation: instance}).values_list('id', flat=True))
+    if action in ('post_add', 'post_remove'):
+        return list(pk_set or ())
+    return None
+
+@receiver(m2m_changed, sender=Event.tags.through)
+@receiver(m2m_changed, sender=Event.attendees.through)
+def invalidate_event_relations_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    # Only the detail payload shows tags and attendees, so the feed stays cached.
+    event_ids = _changed_event_ids(sender, instance, action, reverse, pk_set)
+    if not event_ids:
+        return
+    # A plain UPDATE keeps Last-Modified honest without firing the Event post_save receivers.
+    Event.objects.filter(pk__in=event_ids).update(updated_at=timezone.now())
+    for event_id in event_ids:
+        bump_event_version(event_id, feed=False)
+
+@receiver([post_save, post_delete], sender=Interest)
+def invalidate_tag_cache(sender, instance, **kwargs):
+    bump_tags_version()
+
+
+# --- Full-text search index ---
+@receiver(post_save, sender=Event)
+def update_search_index(sender, instance, **kwargs):
+    search.schedule_index([instance.pk])
+
+@receiver(post_delete, sender=Event)
+def remove_from_search_index(sender, instance, **kwargs):
+    search.remove_events([instance.pk])
+
+@receiver(m2m_changed, sender=Event.tags.through)
+def update_search_index_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    event_ids = _changed_event_ids(sender, instance, action, reverse, pk_set)
+    if event_ids:
+        search.schedule_index(event_ids)
+
+@receiver(post_save, sender=Interest)
+@receiver(pre_delete, sender=Interest)
+def update_search_index_interest(sender, instance, **kwargs):
+    # Tag names are part of the indexed text; a deleted tag is reindexed away after commit.
+    search.schedule_index(Event.objects.filter(tags=instance).values_list('id', flat=True))
+
+
+# --- Image variants ---
+@receiver(pre_save, sender=Event)
+def reset_image_variants(sender, instance, **kwargs):
+    # A new upload is still uncommitted here; its old variants no longer apply.
+    instance._image_changed = bool(instance.image) and not instance.image._committed
+    if instance._image_changed:
+        instance.image_medium = instance.image_thumbnail = ''
+
+@receiver(post_save, sender=Event)
+def schedule_image_variants(sender, instance, **kwargs):
+    if getattr(instance, '_image_changed', False):
+        submit_after_commit(generate_event_variants, instance.pk)
+
+
+# --- Facet counters ---
+def _facet_state(event):
+    return Event._meta.get_field('event_date').to_python(event.event_date), event.category
+
+@receiver(pre_save, sender=Event)
+def snapshot_facets(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'event_date', 'category'} & set(update_fields):
+        instance._facets_before = _facet_state(instance)
+        return
+    instance._facets_before = (
+        Event.objects.filter(pk=instance.pk).values_list('event_date', 'category').first() if instance.pk else None
+    )
+
+@receiver(post_save, sender=Event)
+def update_facets(sender, instance, created, **kwargs):
+    before, after = instance._facets_before, _facet_state(instance)
+    if before != after:
+        # A brand-new event has no tags yet; they are counted as they get added.
+        tag_ids = (lambda: ()) if created else (lambda: instance.tags.values_list('id', flat=True))
+        facets.adjust(facets.event_changes(before, after, tag_ids))
+
+@receiver(pre_delete, sender=Event)
+def snapshot_facet_tags(sender, instance, **kwargs):
+    # The tag rows are gone by post_delete.
+    instance._facets_tag_ids = list(instance.tags.values_list('id', flat=True))
+
+@receiver(post_delete, sender=Event)
+def release_facets(sender, instance, **kwargs):
+    if instance.deleted_at is not None:
+        return  # Already released when it was soft-deleted.
+    facets.adjust(facets.event_changes(_facet_state(instance), None, lambda: instance._facets_tag_ids))
+
+@receiver(m2m_changed, sender=Event.tags.through)
+def update_facets_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_clear':
+        facets.invalidate()
+        return
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    sign = 1 if action == 'post_add' else -1
+    if not reverse:
+        if facets.is_upcoming(_facet_state(instance)[0]):
+            facets.adjust({('tag', tag_id): sign for tag_id in pk_set})
+    else:
+        upcoming = Event.objects.filter(pk__in=pk_set, event_date__gte=timezone.localdate()).count()
+        facets.adjust({('tag', instance.pk): sign * upcoming})
+
+@receiver([post_save, post_delete], sender=Interest)
+def invalidate_facets(sender, instance, **kwargs):
+    # Renamed or deleted tags; deletes also drop their rows without an m2m signal.
+    facets.invalidate()
+
+
+# --- "Event For You" tag index ---
+@receiver([post_save, post_delete], sender=Event)
+def refresh_personal_feed(sender, instance, **kwargs):
+    personal_feed.schedule_refresh([instance.pk])
+
+@receiver(m2m_changed, sender=Event.tags.through)
+def refresh_personal_feed_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    personal_feed.schedule_refresh(_changed_event_ids(sender, instance, action, reverse, pk_set) or ())
+
+@receiver(post_delete, sender=Interest)
+def invalidate_personal_feed(sender, instance, **kwargs):
+    # The tag's event rows are removed by the cascade without an m2m signal.
+    personal_feed.invalidate()
+
+
+# --- Unread notification counter ---
+@receiver(post_delete, sender=Invitation)
+def release_unread_notification(sender, instance, **kwargs):
+    # Covers invitations removed by cascades (e.g. when their event is deleted).
+    if not instance.is_read:
+        adjust_unread_count([instance.invitee_id], -1)
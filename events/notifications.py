@@ -0,0 +1,80 @@
+"""
+Notification bookkeeping for invitations.
+
+- The denormalized unread counter on CustomUser. Every change is a single
+  UPDATE with an F() expression, so concurrent requests never lose increments,
+  and the counter is clamped at zero. Where two requests may both claim the
+  same new invitation, the counter is recounted instead.
+- Pushing invitation changes to connected clients through the broker.
+"""
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from accounts.models import CustomUser
+from .broker import get_broker
+
+
+def adjust_unread_count(user_ids, delta):
+    """
+    Adds `delta` (which may be negative) to the counter of every given user.
+    `user_ids` is a list of ids or a values() queryset, which runs as a subquery.
+    """
+    if not delta or (isinstance(user_ids, (list, tuple, set)) and not user_ids):
+        return
+    CustomUser.objects.filter(pk__in=user_ids).update(
+        unread_notification_count=Greatest(F('unread_notification_count') + delta, 0)
+    )
+
+
+
+def recount_unread(user_ids):
+    """
+    Sets the counter of every given user to their number of unread invitations.
+    Unlike adjust_unread_count, running it twice for the same change is harmless.
+    """
+    from .models import Invitation
+
+    if not user_ids:
+        return
+    unread = (
+        Invitation.objects.filter(invitee=OuterRef('pk'), is_read=False)
+        .order_by()
+        .values('invitee')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    CustomUser.objects.filter(pk__in=user_ids).update(
+        unread_notification_count=Coalesce(Subquery(unread, output_field=IntegerField()), 0)
+    )
+
+
+# --- Push notifications ---
+def _publish_after_commit(messages):
+    """Publishes (user_id, message) pairs once the current transaction commits."""
+    def publish():
+        broker = get_broker()
+        for user_id, message in messages:
+            broker.publish(user_id, message)
+    transaction.on_commit(publish)
+
+
+def publish_invitations_created(invitations):
+    """Tells each invitee about their new invitation."""
+    from .serializers import NotificationSerializer
+
+    _publish_after_commit([
+        (invitation.invitee_id, {'type': 'invitation.created', 'data': NotificationSerializer(invitation).data})
+        for invitation in invitations
+    ])
+
+
+def publish_invitation_response(invitation):
+    """Tells the inviter (and the invitee's other devices) that an invitation was answered."""
+    from .serializers import NotificationSerializer
+
+    data = NotificationSerializer(invitation).data
+    _publish_after_commit([
+        (invitation.inviter_id, {'type': 'invitation.responded', 'data': data}),
+        (invitation.invitee_id, {'type': 'invitation.updated', 'data': data}),
+    ])
@@ -0,0 +1,140 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+
+class KeysetPagination:
+    """
+    Opaque-cursor (keyset) pagination.
+
+    Pages are fetched with a WHERE clause on the ordering columns instead of an
+    OFFSET, so the cost of a page is the same no matter how deep the client has
+    scrolled, and rows inserted while a client is paging never shift or repeat
+    the items it has already seen. The ordering must end with a unique column
+    (normally 'id') and should be backed by a matching composite index.
+    """
+    ordering = ('-event_date', '-id')
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        self.next_cursor = None
+
+    def is_requested(self, request):
+        """The paginated mode is opt-in, so existing clients keep receiving a plain list."""
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def get_page_size(self, request):
+        default = getattr(settings, 'EVENTS_PAGE_SIZE', 20)
+        maximum = getattr(settings, 'EVENTS_MAX_PAGE_SIZE', 100)
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            return default
+        return max(1, min(size, maximum))
+
+    # --- Cursor encoding ---
+    def encode_cursor(self, values):
+        # isoformat() keeps full microsecond precision, which DjangoJSONEncoder truncates.
+        raw = json.dumps(list(values), default=lambda value: value.isoformat(), separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_values(self, token):
+        """Returns the raw (JSON) values stored in a cursor token, one per ordering column."""
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return values
+        except Exception:
+            raise NotFound("Invalid cursor.")
+
+    def decode_cursor(self, token, model):
+        """Turns a cursor token back into typed values for each ordering column."""
+        values = self.decode_values(token)
+        try:
+            return [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound("Invalid cursor.")
+
+    def cursor_values(self, obj):
+        return [getattr(obj, name.lstrip('-')) for name in self.ordering]
+
+    def after(self, values):
+        """
+        Builds the filter selecting rows that sort strictly after the cursor.
+        The leading bound on the first column lets the database seek straight
+        into the index instead of walking it from the start.
+        """
+        fields = [(name.lstrip('-'), 'lt' if name.startswith('-') else 'gt') for name in self.ordering]
+        first_field, first_op = fields[0]
+        condition = Q()
+        for position, (field, op) in enumerate(fields):
+            equal = {name: value for (name, _), value in zip(fields[:position], values)}
+            condition |= Q(**equal, **{f'{field}__{op}': values[position]})
+        return Q(**{f'{first_field}__{first_op}e': values[0]}) & condition
+
+    # --- DRF pagination interface ---
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            queryset = queryset.filter(self.after(self.decode_cursor(token, queryset.model)))
+
+        # Fetch one extra row to find out whether there is a next page.
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+        if len(rows) > page_size:
+            self.next_cursor = self.encode_cursor(self.cursor_values(page[-1]))
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({'next_cursor': self.next_cursor, 'results': data})
+
+
+class DeltaSyncPagination(KeysetPagination):
+    """
+    Keyset pagination over modification time, for `?since=` delta syncs.
+
+    Unlike a normal page, the response always carries a cursor: the position
+    of the last row returned, or the client's own cursor when nothing changed.
+    The client stores it and sends it back on its next poll.
+
+    `updated_at` is stamped when a row is saved, not when its transaction
+    commits, so a row can become visible after rows with later timestamps
+    have already been sent. To never step over such a row, only rows at
+    least EVENTS_SYNC_SETTLE_SECONDS old are returned: a change reaches
+    polling clients that much later (the notification stream is the
+    real-time path), and writers must commit within that window.
+    """
+    ordering = ('updated_at', 'id')
+    cursor_query_param = 'since'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        settle = timedelta(seconds=getattr(settings, 'EVENTS_SYNC_SETTLE_SECONDS', 5))
+        queryset = queryset.filter(updated_at__lte=timezone.now() - settle)
+        page = super().paginate_queryset(queryset, request, view)
+        self.has_more = self.next_cursor is not None
+        if page:
+            self.next_cursor = self.encode_cursor(self.cursor_values(page[-1]))
+        else:
+            self.next_cursor = request.query_params.get(self.cursor_query_param) or None
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({'since': self.next_cursor, 'has_more': self.has_more, 'results': data})
@@ -0,0 +1,120 @@
+"""
+The preference-ranked "Event For You" feed.
+
+Each process keeps an in-memory inverted index of upcoming events: tag id ->
+event ids, plus the event date and attendee count used as tie-breakers.
+Ranking a user walks only the posting lists of the user's preferred tags, so
+it never touches the events table; the page itself is then loaded by id.
+
+Writers refresh just the events they changed; other processes rebuild their
+index from a shared version counter (see events.versioning.VersionedIndex).
+"""
+import heapq
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .versioning import VersionCounter, VersionedIndex
+
+VERSION = VersionCounter('events:personal_feed:version')
+
+
+def _load(event_ids=None):
+    """Returns ({event_id: (event_date, attendee_count)}, [(event_id, tag_id), ...])."""
+    from .models import Event
+
+    events = Event.objects.filter(event_date__gte=timezone.localdate())
+    if event_ids is not None:
+        events = events.filter(pk__in=event_ids)
+    rows = {
+        event_id: (event_date, attendee_count)
+        for event_id, event_date, attendee_count in events.values_list('id', 'event_date', 'attendee_count')
+    }
+    links = Event.tags.through.objects.filter(event_id__in=events.values('id')).values_list('event_id', 'interest_id')
+    return rows, list(links)
+
+
+class TagIndex(VersionedIndex):
+    counter = VERSION
+
+    def __init__(self):
+        super().__init__()
+        self.events = {}
+        self.event_tags = {}
+        self.tag_events = defaultdict(set)
+
+    def _put(self, rows, links):
+        tags_of = defaultdict(set)
+        for event_id, tag_id in links:
+            tags_of[event_id].add(tag_id)
+        for event_id, row in rows.items():
+            self.events[event_id] = row
+            self.event_tags[event_id] = tags_of[event_id]
+            for tag_id in tags_of[event_id]:
+                self.tag_events[tag_id].add(event_id)
+
+    def _drop(self, event_ids):
+        for event_id in event_ids:
+            self.events.pop(event_id, None)
+            for tag_id in self.event_tags.pop(event_id, ()):
+                self.tag_events[tag_id].discard(event_id)
+
+    # --- Kept in step by VersionedIndex ---
+    def _load(self, event_ids=None):
+        return _load(event_ids)
+
+    def _replace(self, data):
+        self.events, self.event_tags, self.tag_events = {}, {}, defaultdict(set)
+        self._put(*data)
+
+    def _update(self, event_ids, data):
+        # Events that are gone or past are dropped; the rest are re-added.
+        self._drop(event_ids)
+        self._put(*data)
+
+    def rank(self, tag_ids, limit, after=None):
+        """
+        Returns up to `limit` (sort_key, overlap) pairs, best first. The sort key
+        is (-overlap, event_date, -attendee_count, id): most matching tags,
+        then soonest, then most popular. `after` is the sort key to continue from.
+        A user without preferences gets every upcoming event, soonest first.
+        """
+        today = timezone.localdate()
+        with self._lock:
+            if tag_ids:
+                overlap = Counter()
+                for tag_id in tag_ids:
+                    overlap.update(self.tag_events.get(tag_id, ()))
+            else:
+                overlap = dict.fromkeys(self.events, 0)
+
+            candidates = []
+            for event_id, matches in overlap.items():
+                event_date, attendee_count = self.events[event_id]
+                if event_date < today:
+                    continue  # Passed since the index was built.
+                key = (-matches, event_date, -attendee_count, event_id)
+                if after is None or key > after:
+                    candidates.append(key)
+        return [(key, -key[0]) for key in heapq.nsmallest(limit, candidates)]
+
+
+_index = TagIndex()
+
+
+def get_index():
+    _index.ensure_fresh()
+    return _index
+
+
+def schedule_refresh(event_ids):
+    """Refreshes the given events in the index once the current transaction commits."""
+    event_ids = list(event_ids)
+    if event_ids:
+        transaction.on_commit(lambda: _index.refresh(event_ids))
+
+
+def invalidate():
+    """For changes too broad to refresh event by event (e.g. a deleted tag)."""
+    VERSION.bump_on_commit()
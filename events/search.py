@@ -0,0 +1,141 @@
+"""
+Full-text search over events.
+
+On SQLite the text of every event (title, description, venue, address and tag
+names) is mirrored into an FTS5 virtual table whose rowid is the event id, and
+matches are ranked with bm25(). The mirror is kept up to date from the Event
+signals. On PostgreSQL the same search runs against a weighted tsvector built
+on the fly, so no extra table is needed there.
+"""
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+FTS_TABLE = 'events_event_fts'
+FTS_COLUMNS = ('title', 'description', 'venue_name', 'address', 'tags')
+
+# Column weights for bm25(), in FTS_COLUMNS order.
+BM25_WEIGHTS = (10.0, 1.0, 4.0, 2.0, 5.0)
+
+
+def uses_fts5():
+    return connection.vendor == 'sqlite'
+
+
+def _source_sql():
+    """
+    SELECT producing one FTS row per live (not soft-deleted) event, with its tag
+    names joined into one column.
+    """
+    from .models import Event
+    from personalize.models import Interest
+
+    event_table = Event._meta.db_table
+    tags_table = Event.tags.through._meta.db_table
+    interest_table = Interest._meta.db_table
+    return (
+        f"SELECT e.id, e.title, e.description, e.venue_name, e.address, "
+        f"(SELECT group_concat(i.name, ' ') FROM {tags_table} t "
+        f"JOIN {interest_table} i ON i.id = t.interest_id WHERE t.event_id = e.id) "
+        f"FROM {event_table} e WHERE e.deleted_at IS NULL"
+    )
+
+
+# --- Index maintenance ---
+def index_events(event_ids):
+    """(Re)indexes the given events; ids that no longer exist are just removed."""
+    event_ids = list(event_ids)
+    if not event_ids or not uses_fts5():
+        return
+    with connection.cursor() as cursor:
+        # Keep the number of bound parameters well under SQLite's limit.
+        for start in range(0, len(event_ids), 500):
+            chunk = event_ids[start:start + 500]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", chunk)
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+                f"{_source_sql()} AND e.id IN ({placeholders})",
+                chunk,
+            )
+
+
+def remove_events(event_ids):
+    event_ids = list(event_ids)
+    if not event_ids or not uses_fts5():
+        return
+    placeholders = ', '.join(['%s'] * len(event_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", event_ids)
+
+
+def schedule_index(event_ids):
+    """Reindexes the events once the current transaction has committed."""
+    event_ids = list(event_ids)
+    transaction.on_commit(lambda: index_events(event_ids))
+
+
+def rebuild_index():
+    """Rebuilds the whole index with a single INSERT ... SELECT. Returns the row count."""
+    if not uses_fts5():
+        return 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) {_source_sql()}")
+        cursor.execute(f"SELECT count(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+# --- Querying ---
+def _fts_query(text):
+    """
+    Turns free user input into a safe FTS5 query: every word becomes a quoted
+    prefix term and all terms must match.
+    """
+    terms = re.findall(r'\w+', text)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_event_ids(text, limit=20):
+    """Returns the ids of the best matching events, best match first."""
+    if uses_fts5():
+        match = _fts_query(text)
+        if not match:
+            return []
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    from .models import Event
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.aggregates import StringAgg
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = (
+            SearchVector('title', weight='A')
+            + SearchVector(StringAgg('tags__name', ' ', default=''), weight='B')
+            + SearchVector('venue_name', 'address', weight='C')
+            + SearchVector('description', weight='D')
+        )
+        query = SearchQuery(text, search_type='websearch')
+        return list(
+            Event.objects.annotate(rank=SearchRank(vector, query))
+            .filter(rank__gt=0)
+            .order_by('-rank', '-id')
+            .values_list('id', flat=True)[:limit]
+        )
+
+    # Any other backend: a plain (unindexed) substring match.
+    condition = Q()
+    for field in ('title', 'description', 'venue_name', 'address', 'tags__name'):
+        condition |= Q(**{f'{field}__icontains': text})
+    return list(
+        Event.objects.filter(condition).distinct().order_by('-event_date', '-id').values_list('id', flat=True)[:limit]
+    )
@@ -9,25 +9,94 @@ class EventCreateSerializer(serializers.ModelSerializer):
         model = Event
         fields = [
             'title', 'description', 'image', 'category', 'event_date',
-            'start_time', 'end_time', 'venue_name', 'address', 'tags',
+            'start_time', 'end_time', 'venue_name', 'address', 'latitude', 'longitude', 'capacity', 'tags',
             'organizer_name', 'organizer_email', 'organizer_phone', 'organizer_website'
         ]
 
+class EventImportSerializer(EventCreateSerializer):
+    """
+    Validates one row of a bulk import. Same rules as EventCreateSerializer,
+    except that the image is the path of a file already in media storage and
+    tags are given by name or id (a list, or a ';'-separated string in CSV).
+    Tag names are resolved against the `tag_ids` map passed in the context,
+    so a row is validated without any database query.
+    """
+    image = serializers.CharField(max_length=100)
+    tags = serializers.ListField(child=serializers.CharField(), required=False, default=list)
+
+    def to_internal_value(self, data):
+        if isinstance(data.get('tags'), str):
+            data = {**data, 'tags': [tag.strip() for tag in data['tags'].split(';') if tag.strip()]}
+        return super().to_internal_value(data)
+
+    def validate_tags(self, value):
+        tag_ids = self.context['tag_ids']
+        unknown = [tag for tag in value if tag.lower() not in tag_ids]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown tags: {', '.join(unknown)}.")
+        return sorted({tag_ids[tag.lower()] for tag in value})
+
 class EventListSerializer(serializers.ModelSerializer):
     """A lightweight serializer for the event list view."""
+    # Filled from an `is_bookmarked` annotation; False when the queryset has none.
+    is_bookmarked = serializers.BooleanField(read_only=True, default=False)
+
     class Meta:
         model = Event
         fields = [
-            'id', 'title', 'image', 'event_date', 'start_time',
-            'venue_name', 'address'
+            'id', 'title', 'image', 'image_thumbnail', 'event_date', 'start_time',
+            'venue_name', 'address', 'attendee_count', 'capacity', 'is_bookmarked'
         ]
 
+class EventListQuerySerializer(serializers.Serializer):
+    """Validates the sorting and filtering options of the event lists."""
+    sort = serializers.ChoiceField(choices=['date', 'popular'], default='date')
+    min_attendees = serializers.IntegerField(min_value=0, required=False)
+
+class PersonalFeedEventSerializer(EventListSerializer):
+    """The list serializer plus how many of the user's preferred tags the event has."""
+    matched_tags = serializers.IntegerField(read_only=True)
+
+    class Meta(EventListSerializer.Meta):
+        fields = EventListSerializer.Meta.fields + ['tags', 'matched_tags']
+
+class NearbyEventSerializer(EventListSerializer):
+    """The list serializer plus the distance from the requested point."""
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(EventListSerializer.Meta):
+        fields = EventListSerializer.Meta.fields + ['latitude', 'longitude', 'distance_km']
+
+class NearbyEventsRequestSerializer(serializers.Serializer):
+    """Validates the query parameters of the "events near me" search."""
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(min_value=0.1, max_value=100, default=10) # Kilometers
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+class CalendarRequestSerializer(serializers.Serializer):
+    """Validates the query parameters of the calendar view."""
+    MAX_DAYS = 92 # A quarter; enough for any month grid including the spill-over weeks
+
+    start = serializers.DateField()
+    end = serializers.DateField()
+    category = serializers.ChoiceField(choices=Event.CATEGORY_CHOICES, required=False)
+    tags = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=20) # ?tags=1&tags=2
+    mode = serializers.ChoiceField(choices=['events', 'counts'], default='events')
+
+    def validate(self, data):
+        if data['end'] < data['start']:
+            raise serializers.ValidationError("end must not be before start.")
+        if (data['end'] - data['start']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"The range can span at most {self.MAX_DAYS} days.")
+        return data
+
 class EventDetailSerializer(serializers.ModelSerializer):
     """A detailed serializer for the single event view."""
     tags = InterestSerializer(many=True, read_only=True) # Show full tag details
     class Meta:
         model = Event
-        exclude = ['organizer'] # Exclude the user ID, but show everything else
+        exclude = ['organizer', 'deleted_at'] # Exclude the user ID and soft-delete bookkeeping, but show everything else
         
 class UserInviteListSerializer(serializers.ModelSerializer):
     """A lightweight serializer to list users for inviting."""
@@ -42,6 +111,24 @@ class InvitationSerializer(serializers.ModelSerializer):
         fields = ['id', 'event', 'inviter', 'invitee', 'status']
         read_only_fields = ['inviter', 'status']
         
+class BulkInviteSerializer(serializers.Serializer):
+    """Validates the list of user IDs for a bulk invitation."""
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000
+    )
+
+class BookmarkSyncSerializer(serializers.Serializer):
+    """Validates a batch of bookmark changes sent by an offline client."""
+    add = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=1000)
+    remove = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list, max_length=1000)
+
+    def validate(self, data):
+        if set(data['add']) & set(data['remove']):
+            raise serializers.ValidationError("An event cannot be both added and removed in the same sync.")
+        return data
+
 class NotificationSerializer(serializers.ModelSerializer):
     """
     Serializer to display invitation notifications.
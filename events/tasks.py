@@ -0,0 +1,44 @@
+"""
+A small background worker pool for work that should not hold up a request
+(image processing, bulk clean-ups, ...).
+
+Jobs are handed to the pool only after the current transaction commits, so a
+worker never looks for rows that are not visible yet. Each job runs on its
+own database connection and gives it back when it is done.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    """Returns the process-wide pool, sized by EVENTS_BACKGROUND_WORKERS."""
+    workers = getattr(settings, 'EVENTS_BACKGROUND_WORKERS', 2)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='events-worker')
+
+
+def _run(func, args):
+    close_old_connections()
+    try:
+        return func(*args)
+    except Exception:
+        logger.exception("Background job %s failed", func.__name__)
+        raise
+    finally:
+        connection.close()
+
+
+def submit(func, *args):
+    """Runs func(*args) in the pool right away. Returns a Future."""
+    return get_executor().submit(_run, func, args)
+
+
+def submit_after_commit(func, *args):
+    """Runs func(*args) in the pool once the current transaction has committed."""
+    transaction.on_commit(lambda: submit(func, *args))
@@ -1,3 +1,1077 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.exceptions import NotFound
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from personalize.models import Interest
+from . import cache as response_cache, facets, images, personal_feed
+from .attendance import add_attendee, drifted_events, reconcile_attendee_counts, reserve_seat
+from .broker import BaseBroker, InProcessBroker, get_broker
+from .deletion import purge_event, soft_delete_event
+from .exports import stream_export
+from .importer import EventImporter, read_rows
+from .models import Event, Invitation
+from .notifications import adjust_unread_count, recount_unread
+from .pagination import KeysetPagination
+from .search import search_event_ids
+from .serializers import EventCreateSerializer
+from .versioning import VersionCounter, VersionedIndex, VersionedSnapshot, seed
+
+
+def make_user(username, **fields):
+    return CustomUser.objects.create_user(username=username, email=f'{username}@example.com', **fields)
+
+
+def make_event(organizer, title='Event', days=1, **fields):
+    values = dict(
+        organizer=organizer, title=title, description='A description', image='event_images/event.jpg',
+        category='MUSIC', event_date=timezone.localdate() + timedelta(days=days),
+        start_time=time(18), end_time=time(20), venue_name='Hall', address='1 Main St',
+        organizer_name='Organizer', organizer_email='organizer@example.com', organizer_phone='123',
+    )
+    values.update(fields)
+    return Event.objects.create(**values)
+
+
+def api_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+class EventTestCase(TestCase):
+    def setUp(self):
+        # Version counters and cached payloads live in the cache, not the test database.
+        cache.clear()
+        self.organizer = make_user('organizer')
+
+
+# --- Cursor pagination ---
+class KeysetPaginationTests(EventTestCase):
+    def test_cursor_round_trip_keeps_microseconds(self):
+        paginator = KeysetPagination(ordering=('updated_at', 'id'))
+        stamp = datetime(2025, 6, 1, 12, 30, 15, 123456, tzinfo=timezone.get_current_timezone())
+        token = paginator.encode_cursor([stamp, 42])
+        self.assertEqual(paginator.decode_cursor(token, Event), [stamp, 42])
+
+    def test_invalid_cursor_is_not_found(self):
+        paginator = KeysetPagination()
+        for token in ('not-a-cursor', paginator.encode_cursor(['2025-01-01'])):
+            with self.assertRaises(NotFound):
+                paginator.decode_cursor(token, Event)
+
+    def test_pages_break_ties_on_id(self):
+        # Five events on one date: only the id tells them apart.
+        ids = [make_event(self.organizer, title=f'e{number}', days=3).id for number in range(5)]
+        ids.append(make_event(self.organizer, title='later', days=9).id)
+
+        client, seen, cursor = api_client(), [], None
+        while True:
+            params = {'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            response = client.get('/api/events/events/', params)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.json()['results']]
+            cursor = response.json()['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, [ids[5], *sorted(ids[:5], reverse=True)])
+
+    def test_rows_inserted_while_paging_do_not_repeat(self):
+        for number in range(4):
+            make_event(self.organizer, title=f'e{number}', days=number)
+        client = api_client()
+        first = client.get('/api/events/events/', {'page_size': 2}).json()
+        make_event(self.organizer, title='newest', days=10)
+        second = client.get('/api/events/events/', {'page_size': 2, 'cursor': first['next_cursor']}).json()
+        first_ids = {row['id'] for row in first['results']}
+        self.assertFalse(first_ids & {row['id'] for row in second['results']})
+        self.assertEqual(len(second['results']), 2)
+
+    def test_plain_list_without_pagination_params(self):
+        make_event(self.organizer)
+        response = api_client().get('/api/events/events/')
+        self.assertIsInstance(response.json(), list)
+
+
+# --- Response cache ---
+class ResponseCacheTests(EventTestCase):
+    def test_event_change_invalidates_cached_list(self):
+        event = make_event(self.organizer, title='Before')
+        client = api_client()
+        self.assertEqual(client.get('/api/events/events/')['X-Cache'], 'MISS')
+        self.assertEqual(client.get('/api/events/events/')['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.title = 'After'
+            event.save()
+
+        response = client.get('/api/events/events/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()[0]['title'], 'After')
+
+    def test_event_change_invalidates_cached_detail(self):
+        event = make_event(self.organizer, title='Before')
+        client = api_client()
+        url = f'/api/events/events/{event.pk}/'
+        client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get(url)['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.title = 'After'
+            event.save()
+
+        response = client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['title'], 'After')
+
+    def test_missing_event_is_not_cached(self):
+        client = api_client()
+        self.assertEqual(client.get('/api/events/events/999/').status_code, 404)
+        event = make_event(self.organizer)
+        self.assertEqual(client.get(f'/api/events/events/{event.pk}/').status_code, 200)
+
+    def test_bumps_after_seeding_are_not_lost(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response_cache.bump_feed_version()
+        bumped = cache.get(response_cache.FEED_VERSION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            response_cache.bump_feed_version()
+        self.assertEqual(cache.get(response_cache.FEED_VERSION_KEY), bumped + 1)
+
+    def test_per_event_versions_expire(self):
+        response_cache.detail_validators(12345)
+        key = response_cache.EVENT_VERSION_KEY.format(pk=12345)
+        self.assertIsNotNone(cache.get(key))
+        self.assertEqual(response_cache._seed_timeout(key), response_cache._timeout())
+        self.assertIsNone(response_cache._seed_timeout(response_cache.FEED_VERSION_KEY))
+
+
+# --- Full-text search ---
+class SearchTests(EventTestCase):
+    def search(self, query):
+        response = api_client().get('/api/events/events/search/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()]
+
+    def test_title_match_ranks_first(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            in_description = make_event(self.organizer, title='Evening out', description='Live jazz all night')
+            in_title = make_event(self.organizer, title='Jazz night', description='Music by the river')
+        self.assertEqual(self.search('jazz'), [in_title.id, in_description.id])
+
+    def test_prefix_and_tag_names_match(self):
+        tag = Interest.objects.create(name='Photography')
+        with self.captureOnCommitCallbacks(execute=True):
+            event = make_event(self.organizer, title='Walk')
+            event.tags.add(tag)
+        self.assertEqual(self.search('photo'), [event.id])
+
+    def test_edits_and_deletes_reach_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            event = make_event(self.organizer, title='Salsa class')
+        with self.captureOnCommitCallbacks(execute=True):
+            event.title = 'Tango class'
+            event.save()
+        self.assertEqual(self.search('salsa'), [])
+        self.assertEqual(self.search('tango'), [event.id])
+
+        Event.all_objects.filter(pk=event.pk).delete()
+        self.assertEqual(self.search('tango'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_event(self.organizer, title='Rock night')
+        self.assertEqual(self.search('"rock" OR NEAR('), [])
+        self.assertEqual(len(self.search('rock*')), 1)
+
+    def test_query_is_required(self):
+        self.assertEqual(api_client().get('/api/events/events/search/').status_code, 400)
+
+
+# --- Events near me ---
+class NearbyEventsTests(EventTestCase):
+    def nearby(self, **params):
+        response = api_client().get('/api/events/events/nearby/', params)
+        self.assertEqual(response.status_code, 200)
+        return [(row['id'], row['distance_km']) for row in response.json()]
+
+    def test_nearest_first_within_radius(self):
+        # 0.01 degrees of latitude is about 1.1 km.
+        far = make_event(self.organizer, latitude=23.82, longitude=90.40)
+        near = make_event(self.organizer, latitude=23.81, longitude=90.40)
+        make_event(self.organizer, latitude=24.5, longitude=90.40)
+        make_event(self.organizer)  # No coordinates.
+
+        results = self.nearby(lat=23.80, lon=90.40, radius=5)
+        self.assertEqual([event_id for event_id, _ in results], [near.id, far.id])
+        self.assertAlmostEqual(results[0][1], 1.11, places=1)
+        self.assertEqual(len(self.nearby(lat=23.80, lon=90.40, radius=5, limit=1)), 1)
+
+    def test_event_just_inside_the_radius_due_north(self):
+        # 0.899 degrees north is 99.96 km away, right at the edge of a 100 km radius.
+        edge = make_event(self.organizer, latitude=23.8 + 0.899, longitude=90.4)
+        results = self.nearby(lat=23.8, lon=90.4, radius=100)
+        self.assertEqual([event_id for event_id, _ in results], [edge.id])
+        self.assertLessEqual(results[0][1], 100)
+
+    def test_search_crosses_the_antimeridian(self):
+        east = make_event(self.organizer, latitude=0.0, longitude=179.99)
+        west = make_event(self.organizer, latitude=0.0, longitude=-179.99)
+        results = self.nearby(lat=0.0, lon=180.0, radius=5)
+        self.assertCountEqual([event_id for event_id, _ in results], [east.id, west.id])
+
+    def test_invalid_coordinates(self):
+        response = api_client().get('/api/events/events/nearby/', {'lat': 91, 'lon': 0})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('lat', response.json())
+
+
+    def test_event_coordinates_must_be_on_the_globe(self):
+        serializer = EventCreateSerializer(data={'latitude': 500, 'longitude': -181})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('latitude', serializer.errors)
+        self.assertIn('longitude', serializer.errors)
+
+# --- Invitee picker ---
+class InviteeListTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.me = make_user('me')
+        self.event = make_event(self.organizer)
+        self.url = f'/api/events/events/{self.event.pk}/invite-list/'
+
+    def usernames(self, **params):
+        response = api_client(self.me).get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [row['username'] for row in response.json()]
+
+    def test_excludes_self_organizer_and_invited(self):
+        invited = make_user('invited')
+        make_user('free')
+        Invitation.objects.create(event=self.event, inviter=self.me, invitee=invited)
+        self.assertEqual(self.usernames(), ['free'])
+
+    def test_prefix_search_on_username_and_names(self):
+        make_user('alice', first_name='Alice', last_name='Xu')
+        make_user('bob', first_name='Robert', last_name='Allen')
+        make_user('carol', first_name='Carol', last_name='Mal')
+        self.assertEqual(self.usernames(q='AL'), ['alice', 'bob'])
+        self.assertEqual(self.usernames(q='rob'), ['bob'])
+
+    def test_prefix_search_on_non_ascii_names(self):
+        make_user('elodie', first_name='Élodie')
+        self.assertEqual(self.usernames(q='Élo'), ['elodie'])
+        self.assertEqual(self.usernames(q='É'), ['elodie'])
+
+    def test_cursor_pages_cover_every_user(self):
+        for name in ('dan', 'ann', 'cat', 'ben', 'eve'):
+            make_user(name)
+        client, seen, params = api_client(self.me), [], {'page_size': 2}
+        while True:
+            page = client.get(self.url, params).json()
+            seen += [row['username'] for row in page['results']]
+            if page['next_cursor'] is None:
+                break
+            params = {'page_size': 2, 'cursor': page['next_cursor']}
+        self.assertEqual(seen, ['ann', 'ben', 'cat', 'dan', 'eve'])
+
+
+# --- Bulk invitations ---
+class BulkInviteTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event(self.organizer)
+        self.url = f'/api/events/events/{self.event.pk}/invite/bulk/'
+
+    def invite(self, user_ids):
+        return api_client(self.organizer).post(self.url, {'user_ids': user_ids}, format='json')
+
+    def test_one_outcome_per_user(self):
+        new, invited = make_user('new'), make_user('invited')
+        Invitation.objects.create(event=self.event, inviter=self.organizer, invitee=invited)
+
+        response = self.invite([new.id, invited.id, self.organizer.id, 9999, new.id])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'invited': 1, 'results': [
+            {'user_id': new.id, 'status': 'invited'},
+            {'user_id': invited.id, 'status': 'already_invited'},
+            {'user_id': self.organizer.id, 'status': 'self'},
+            {'user_id': 9999, 'status': 'not_found'},
+        ]})
+        self.assertTrue(Invitation.objects.filter(event=self.event, invitee=new).exists())
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        users = [make_user(f'user{number}') for number in range(20)]
+        with CaptureQueriesContext(connection) as small:
+            self.invite([user.id for user in users[:2]])
+        with CaptureQueriesContext(connection) as large:
+            self.invite([user.id for user in users[2:]])
+        self.assertEqual(len(small), len(large))
+
+    def test_rows_lost_to_a_concurrent_invite_are_reported(self):
+        invitee, rival = make_user('invitee'), make_user('rival')
+        bulk_create = type(Invitation.objects).bulk_create
+
+        def concurrent_bulk_create(manager, objs, **kwargs):
+            Invitation.objects.create(event=self.event, inviter=rival, invitee=invitee)
+            return bulk_create(manager, objs, **kwargs)
+
+        with mock.patch.object(type(Invitation.objects), 'bulk_create', concurrent_bulk_create):
+            response = self.invite([invitee.id])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'invited': 0, 'results': [{'user_id': invitee.id, 'status': 'already_invited'}]})
+        self.assertEqual(Invitation.objects.get(invitee=invitee).inviter, rival)
+
+    def test_overlapping_batches_count_a_row_once(self):
+        invitee = make_user('invitee')
+        bulk_create = type(Invitation.objects).bulk_create
+
+        def overlapping_bulk_create(manager, objs, **kwargs):
+            # The other batch inserts the same row and updates the counter first.
+            Invitation.objects.create(event=self.event, inviter=self.organizer, invitee=invitee)
+            recount_unread([invitee.id])
+            return bulk_create(manager, objs, **kwargs)
+
+        with mock.patch.object(type(Invitation.objects), 'bulk_create', overlapping_bulk_create):
+            self.invite([invitee.id])
+
+        invitee.refresh_from_db()
+        self.assertEqual(invitee.unread_notification_count, 1)
+
+    def test_empty_list_is_rejected(self):
+        self.assertEqual(self.invite([]).status_code, 400)
+
+
+# --- Notification sync and unread counter ---
+class NotificationSyncTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.invitee = make_user('invitee')
+
+    def unread(self):
+        self.invitee.refresh_from_db()
+        return api_client(self.invitee).get('/api/events/notifications/unread-count/').json()['unread_count']
+
+    def invite(self, event):
+        return api_client(self.organizer).post(f'/api/events/events/{event.pk}/invite/{self.invitee.pk}/')
+
+    def test_unread_counter_follows_invites_and_reads(self):
+        first, second = make_event(self.organizer), make_event(self.organizer)
+        self.assertEqual(self.invite(first).status_code, 201)
+        self.invite(second)
+        self.assertEqual(self.unread(), 2)
+
+        invitation = Invitation.objects.get(event=first)
+        client = api_client(self.invitee)
+        client.post(f'/api/events/notifications/{invitation.pk}/mark-as-read/')
+        client.post(f'/api/events/notifications/{invitation.pk}/mark-as-read/')
+        self.assertEqual(self.unread(), 1)
+
+        client.post('/api/events/notifications/mark-all-as-read/')
+        self.assertEqual(self.unread(), 0)
+
+    def test_counter_never_goes_negative(self):
+        adjust_unread_count([self.invitee.id], -5)
+        self.assertEqual(self.unread(), 0)
+
+    def sync(self, since=''):
+        response = api_client(self.invitee).get('/api/events/notifications/', {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    @override_settings(EVENTS_SYNC_SETTLE_SECONDS=0)
+    def test_delta_sync_returns_only_changes(self):
+        first = Invitation.objects.create(event=make_event(self.organizer), inviter=self.organizer, invitee=self.invitee)
+        Invitation.objects.create(event=make_event(self.organizer), inviter=self.organizer, invitee=self.invitee)
+
+        initial = self.sync()
+        self.assertEqual(len(initial['results']), 2)
+        self.assertFalse(initial['has_more'])
+
+        unchanged = self.sync(initial['since'])
+        self.assertEqual((unchanged['results'], unchanged['since']), ([], initial['since']))
+
+        first.is_read = True
+        first.save()
+        changed = self.sync(initial['since'])
+        self.assertEqual([row['id'] for row in changed['results']], [first.id])
+
+    def test_unsettled_changes_wait_for_the_next_poll(self):
+        invitation = Invitation.objects.create(event=make_event(self.organizer), inviter=self.organizer, invitee=self.invitee)
+        self.assertEqual(self.sync()['results'], [])
+
+        Invitation.objects.filter(pk=invitation.pk).update(updated_at=timezone.now() - timedelta(minutes=1))
+        self.assertEqual([row['id'] for row in self.sync()['results']], [invitation.id])
+
+
+# --- Notification push channel ---
+class BrokerTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def subscribe(self, broker, user_id):
+        async def subscribe():
+            return broker.subscribe(user_id)
+        return self.loop.run_until_complete(subscribe())
+
+    def receive(self, subscription):
+        return self.loop.run_until_complete(asyncio.wait_for(subscription.get(), timeout=1))
+
+    def test_messages_reach_only_the_user_subscriptions(self):
+        broker = InProcessBroker()
+        mine, other = self.subscribe(broker, 1), self.subscribe(broker, 2)
+        broker.publish(1, {'type': 'ping'})
+        self.assertEqual(self.receive(mine), {'type': 'ping'})
+        self.assertTrue(other.queue.empty())
+
+    def test_slow_subscriber_drops_oldest_messages(self):
+        broker = InProcessBroker(queue_size=2)
+        subscription = self.subscribe(broker, 1)
+        for number in range(3):
+            broker.publish(1, number)
+        self.assertEqual([self.receive(subscription), self.receive(subscription)], [1, 2])
+
+    def test_closed_subscription_receives_nothing(self):
+        broker = InProcessBroker()
+        subscription = self.subscribe(broker, 1)
+        subscription.close()
+        broker.publish(1, 'lost')
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertTrue(subscription.queue.empty())
+
+    def test_invite_is_pushed_after_commit(self):
+        invitee = make_user('invitee')
+        event = make_event(self.organizer, title='Launch')
+        subscription = self.subscribe(get_broker(), invitee.id)
+        self.addCleanup(subscription.close)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            api_client(self.organizer).post(f'/api/events/events/{event.pk}/invite/{invitee.pk}/')
+
+        message = self.receive(subscription)
+        self.assertEqual(message['type'], 'invitation.created')
+        self.assertEqual(message['data']['event_title'], 'Launch')
+
+    def test_incomplete_broker_fails_when_created(self):
+        class PublishOnlyBroker(BaseBroker):
+            def publish(self, user_id, message):
+                pass
+
+        with self.assertRaises(TypeError):
+            PublishOnlyBroker()
+
+    async def test_stream_requires_a_token(self):
+        response = await self.async_client.get('/api/events/notifications/stream/')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get('/api/events/notifications/stream/', {'token': 'bad'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_is_refused_under_wsgi(self):
+        self.assertEqual(self.client.get('/api/events/notifications/stream/').status_code, 501)
+
+
+# --- Bookmarks ---
+class BookmarkTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('reader')
+        self.client = api_client(self.user)
+
+    def bookmarked_ids(self):
+        return set(self.user.bookmarked_events.values_list('id', flat=True))
+
+    def test_toggle_adds_then_removes(self):
+        event = make_event(self.organizer)
+        url = f'/api/events/events/{event.pk}/bookmark/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(self.bookmarked_ids(), {event.id})
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertEqual(self.bookmarked_ids(), set())
+        self.assertEqual(self.client.post('/api/events/events/999/bookmark/').status_code, 404)
+
+    def test_toggle_bumps_the_version_after_writing(self):
+        event = make_event(self.organizer)
+        url = f'/api/events/events/{event.pk}/bookmark/'
+        bump = response_cache.bump_bookmarks_version
+        seen = []
+
+        def spy(user_id):
+            seen.append(self.bookmarked_ids())
+            bump(user_id)
+
+        with mock.patch('events.views.response_cache.bump_bookmarks_version', spy):
+            self.client.post(url)
+            self.client.post(url)
+        self.assertEqual(seen, [{event.id}, set()])
+
+    def test_sync_applies_a_batch(self):
+        kept, dropped, added = (make_event(self.organizer, title=title) for title in ('kept', 'dropped', 'added'))
+        self.user.bookmarked_events.add(kept, dropped)
+
+        response = self.client.post('/api/events/bookmarks/sync/', {'add': [added.id, kept.id, 999], 'remove': [dropped.id]}, format='json')
+        self.assertEqual(response.json(), {'added': sorted([added.id, kept.id]), 'removed': 1, 'not_found': [999]})
+        self.assertEqual(self.bookmarked_ids(), {kept.id, added.id})
+
+    def test_sync_rejects_contradictory_changes(self):
+        response = self.client.post('/api/events/bookmarks/sync/', {'add': [1], 'remove': [1]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_lists_flag_the_user_bookmarks(self):
+        bookmarked, other = make_event(self.organizer, days=1), make_event(self.organizer, days=2)
+        self.user.bookmarked_events.add(bookmarked)
+        flags = {row['id']: row['is_bookmarked'] for row in self.client.get('/api/events/events/').json()}
+        self.assertEqual(flags, {bookmarked.id: True, other.id: False})
+        # The cached feed payload itself stays user-independent.
+        anonymous = api_client().get('/api/events/events/')
+        self.assertEqual(anonymous['X-Cache'], 'HIT')
+        self.assertEqual([row['is_bookmarked'] for row in anonymous.json()], [False, False])
+        self.assertEqual([row['id'] for row in self.client.get('/api/events/bookmarks/').json()], [bookmarked.id])
+
+
+# --- Conditional GET ---
+class ConditionalGetTests(EventTestCase):
+    def test_detail_revalidates_without_queries(self):
+        event = make_event(self.organizer)
+        client, url = api_client(), f'/api/events/events/{event.pk}/'
+        first = client.get(url)
+        self.assertTrue(first['ETag'] and first['Last-Modified'])
+
+        with self.assertNumQueries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.title = 'Changed'
+            event.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_list_etag_follows_the_user_bookmarks(self):
+        event = make_event(self.organizer)
+        user = make_user('reader')
+        client = api_client(user)
+        etag = client.get('/api/events/events/')['ETag']
+        self.assertEqual(client.get('/api/events/events/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/events/events/{event.pk}/bookmark/')
+        self.assertEqual(client.get('/api/events/events/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_etag_depends_on_the_query(self):
+        make_event(self.organizer)
+        client = api_client()
+        etag = client.get('/api/events/events/')['ETag']
+        self.assertNotEqual(client.get('/api/events/events/', {'sort': 'popular'})['ETag'], etag)
+
+
+# --- Image variants ---
+def image_file(name='photo.jpg', size=(2000, 1000)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ImageVariantTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_variants_are_scaled_down_keeping_the_aspect_ratio(self):
+        rendered = images.render_variants(image_file())
+        sizes = {name: Image.open(io.BytesIO(data)).size for name, (data, _) in rendered.items()}
+        self.assertEqual(sizes, {'medium': (1024, 512), 'thumbnail': (320, 160)})
+
+    def test_identical_variants_are_stored_once(self):
+        first = images.store_variant('thumbnail', b'same bytes', 'jpg')
+        self.assertEqual(images.store_variant('thumbnail', b'same bytes', 'jpg'), first)
+
+    def test_upload_schedules_variants_after_commit(self):
+        with mock.patch('events.models.submit_after_commit') as submit_after_commit:
+            event = make_event(self.organizer, image=image_file())
+        submit_after_commit.assert_called_once_with(images.generate_event_variants, event.pk)
+
+        self.assertTrue(images.generate_event_variants(event.pk))
+        event.refresh_from_db()
+        self.assertTrue(event.image_medium.name.startswith(images.VARIANT_DIR))
+        self.assertTrue(event.image_thumbnail.name.startswith(images.VARIANT_DIR))
+
+    def test_stale_job_does_not_overwrite_a_newer_image(self):
+        with mock.patch('events.models.submit_after_commit'):
+            event = make_event(self.organizer, image=image_file('old.jpg'))
+            original = images.render_variants
+
+            def replace_meanwhile(source):
+                rendered = original(source)
+                Event.objects.filter(pk=event.pk).update(image='event_images/new.jpg')
+                return rendered
+
+            with mock.patch('events.images.render_variants', replace_meanwhile):
+                self.assertFalse(images.generate_event_variants(event.pk))
+        event.refresh_from_db()
+        self.assertEqual(event.image_medium.name, '')
+
+
+# --- Attendance and capacity ---
+class AttendanceTests(EventTestCase):
+    def test_seats_run_out_at_capacity(self):
+        event = make_event(self.organizer, capacity=2)
+        self.assertEqual([reserve_seat(event.pk) for _ in range(3)], [True, True, False])
+        event.refresh_from_db()
+        self.assertEqual(event.attendee_count, 2)
+
+    def test_unlimited_event_never_fills(self):
+        event = make_event(self.organizer)
+        self.assertTrue(all(reserve_seat(event.pk) for _ in range(5)))
+
+    def test_adding_an_attendee_twice_takes_one_seat(self):
+        event = make_event(self.organizer, capacity=1)
+        user = make_user('guest')
+        self.assertTrue(add_attendee(event, user))
+        self.assertTrue(add_attendee(event, user))
+        event.refresh_from_db()
+        self.assertEqual((event.attendee_count, list(event.attendees.all())), (1, [user]))
+
+    def test_accepting_a_full_event_changes_nothing(self):
+        event = make_event(self.organizer, capacity=1)
+        add_attendee(event, make_user('first'))
+        late = make_user('late')
+        invitation = Invitation.objects.create(event=event, inviter=self.organizer, invitee=late)
+        adjust_unread_count([late.id], +1)
+
+        response = api_client(late).post(f'/api/events/invitations/{invitation.pk}/respond/', {'response': 'accept'}, format='json')
+        self.assertEqual(response.status_code, 409)
+        invitation.refresh_from_db()
+        late.refresh_from_db()
+        self.assertEqual((invitation.status, invitation.is_read), (Invitation.Status.PENDING, False))
+        self.assertEqual(late.unread_notification_count, 1)
+        self.assertFalse(event.attendees.filter(pk=late.pk).exists())
+
+    def test_accepting_takes_a_seat(self):
+        event = make_event(self.organizer, capacity=1)
+        guest = make_user('guest')
+        invitation = Invitation.objects.create(event=event, inviter=self.organizer, invitee=guest)
+        response = api_client(guest).post(f'/api/events/invitations/{invitation.pk}/respond/', {'response': 'accept'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        event.refresh_from_db()
+        self.assertEqual(event.attendee_count, 1)
+
+    def test_reconcile_fixes_drifted_counts(self):
+        event = make_event(self.organizer)
+        event.attendees.add(make_user('guest'))
+        Event.objects.filter(pk=event.pk).update(attendee_count=7)
+        self.assertEqual(list(drifted_events().values_list('pk', flat=True)), [event.pk])
+        self.assertEqual(reconcile_attendee_counts(), [event.pk])
+        event.refresh_from_db()
+        self.assertEqual(event.attendee_count, 1)
+
+    def test_popular_sort_and_minimum(self):
+        quiet, busy = make_event(self.organizer, title='quiet'), make_event(self.organizer, title='busy')
+        Event.objects.filter(pk=busy.pk).update(attendee_count=5)
+        response = api_client().get('/api/events/events/', {'sort': 'popular'})
+        self.assertEqual([row['id'] for row in response.json()], [busy.id, quiet.id])
+        response = api_client().get('/api/events/events/', {'min_attendees': 1})
+        self.assertEqual([row['id'] for row in response.json()], [busy.id])
+
+
+# --- Calendar ---
+class CalendarTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.start = timezone.localdate()
+        self.end = self.start + timedelta(days=6)
+
+    def calendar(self, **params):
+        response = api_client().get('/api/events/events/calendar/', {'start': self.start, 'end': self.end, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['days']
+
+    def test_events_grouped_by_day_in_start_order(self):
+        late = make_event(self.organizer, days=1, start_time=time(20), end_time=time(21))
+        early = make_event(self.organizer, days=1, start_time=time(9), end_time=time(10))
+        other_day = make_event(self.organizer, days=3)
+        make_event(self.organizer, days=30)
+
+        days = self.calendar()
+        day_one = (self.start + timedelta(days=1)).isoformat()
+        self.assertEqual(list(days), [day_one, (self.start + timedelta(days=3)).isoformat()])
+        self.assertEqual([row['id'] for row in days[day_one]], [early.id, late.id])
+        self.assertEqual(self.calendar(mode='counts'), {day_one: 2, (self.start + timedelta(days=3)).isoformat(): 1})
+        self.assertEqual([row['id'] for row in days[(self.start + timedelta(days=3)).isoformat()]], [other_day.id])
+
+    def test_filters_by_category_and_any_tag(self):
+        music, sport = Interest.objects.create(name='Music'), Interest.objects.create(name='Sport')
+        tagged = make_event(self.organizer, category='MUSIC')
+        tagged.tags.add(music, sport)
+        make_event(self.organizer, category='SPORTS')
+
+        day = (self.start + timedelta(days=1)).isoformat()
+        self.assertEqual(self.calendar(mode='counts', tags=[music.id, sport.id]), {day: 1})
+        self.assertEqual(self.calendar(mode='counts', category='MUSIC'), {day: 1})
+
+    def test_rejects_long_or_reversed_ranges(self):
+        client = api_client()
+        for start, end in ((self.end, self.start), (self.start, self.start + timedelta(days=200))):
+            response = client.get('/api/events/events/calendar/', {'start': start, 'end': end})
+            self.assertEqual(response.status_code, 400)
+
+
+# --- Facet counts ---
+class FacetTests(EventTestCase):
+    def facets(self):
+        response = api_client().get('/api/events/events/facets/').json()
+        categories = {row['value']: row['count'] for row in response['categories'] if row['count']}
+        return categories, [(row['name'], row['count']) for row in response['tags']]
+
+    def rebuilt(self):
+        cache.delete(facets.FACETS_KEY.format(day=timezone.localdate()))
+        return self.facets()
+
+    def test_counts_upcoming_events(self):
+        music, food = Interest.objects.create(name='Music'), Interest.objects.create(name='Food')
+        Interest.objects.create(name='Unused')
+        make_event(self.organizer, category='MUSIC').tags.add(music, food)
+        make_event(self.organizer, category='MUSIC').tags.add(music)
+        make_event(self.organizer, category='SPORTS', days=-1).tags.add(food)
+
+        self.assertEqual(self.facets(), ({'MUSIC': 2}, [('Music', 2), ('Food', 1)]))
+
+    def test_changes_adjust_the_cached_counts(self):
+        music = Interest.objects.create(name='Music')
+        event = make_event(self.organizer, category='MUSIC')
+        make_event(self.organizer, category='MUSIC').tags.add(music)
+        self.facets()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.category = 'SPORTS'
+            event.save()
+            event.tags.add(music)
+            make_event(self.organizer, category='MUSIC')
+        # Adjusted in place rather than dropped and rebuilt.
+        self.assertIsNotNone(cache.get(facets.FACETS_KEY.format(day=timezone.localdate())))
+        adjusted = self.facets()
+        self.assertEqual(adjusted, ({'MUSIC': 2, 'SPORTS': 1}, [('Music', 2)]))
+        self.assertEqual(self.rebuilt(), adjusted)
+
+    def test_deleted_events_leave_the_counts(self):
+        event = make_event(self.organizer, category='MUSIC')
+        self.facets()
+        with self.captureOnCommitCallbacks(execute=True), mock.patch('events.deletion.submit_after_commit'):
+            soft_delete_event(event)
+        self.assertEqual(self.facets(), ({}, []))
+        self.assertEqual(self.rebuilt(), ({}, []))
+
+
+# --- "Event For You" feed ---
+class PersonalFeedTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.music, self.food, self.art = (Interest.objects.create(name=name) for name in ('Music', 'Food', 'Art'))
+        self.user = make_user('reader')
+        self.user.preferences.add(self.music, self.food)
+
+    def feed(self, **params):
+        response = api_client(self.user).get('/api/events/events/for-you/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, **params):
+        return [row['id'] for row in self.feed(**params)['results']]
+
+    def test_ranks_by_overlap_then_date_then_popularity(self):
+        both = make_event(self.organizer, days=5)
+        both.tags.add(self.music, self.food)
+        soon = make_event(self.organizer, days=1)
+        soon.tags.add(self.music)
+        popular = make_event(self.organizer, days=2, attendee_count=10)
+        popular.tags.add(self.food)
+        quiet = make_event(self.organizer, days=2)
+        quiet.tags.add(self.food)
+        make_event(self.organizer, days=1).tags.add(self.art)
+        make_event(self.organizer, days=-1).tags.add(self.music)
+
+        self.assertEqual(self.ids(), [both.id, soon.id, popular.id, quiet.id])
+        self.assertEqual(self.feed()['results'][0]['matched_tags'], 2)
+
+    def test_cursor_pages_through_the_ranking(self):
+        events = [make_event(self.organizer, days=days) for days in (1, 2, 3, 4, 5)]
+        for event in events:
+            event.tags.add(self.music)
+        seen, params = [], {'page_size': 2}
+        while True:
+            page = self.feed(**params)
+            seen += [row['id'] for row in page['results']]
+            if page['next_cursor'] is None:
+                break
+            params = {'page_size': 2, 'cursor': page['next_cursor']}
+        self.assertEqual(seen, [event.id for event in events])
+
+    def test_tag_change_refreshes_the_built_index(self):
+        event = make_event(self.organizer)
+        self.assertEqual(self.ids(), [])
+        version = personal_feed.get_index().version
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.tags.add(self.music)
+        self.assertEqual(personal_feed.get_index().version, version + 1)
+        self.assertEqual(self.ids(), [event.id])
+
+    def test_change_from_another_process_triggers_a_rebuild(self):
+        self.assertEqual(self.ids(), [])
+        make_event(self.organizer).tags.add(self.food)
+        personal_feed.VERSION.bump()  # As another worker's refresh would.
+        self.assertEqual(len(self.ids()), 1)
+
+    def test_user_without_preferences_gets_soonest_first(self):
+        self.user.preferences.clear()
+        later, sooner = make_event(self.organizer, days=4), make_event(self.organizer, days=2)
+        self.assertEqual(self.ids(), [sooner.id, later.id])
+
+
+# --- Bulk import ---
+IMPORT_HEADER = 'title,description,image,category,event_date,start_time,end_time,venue_name,address,tags,organizer_name,organizer_email,organizer_phone\n'
+
+
+def import_row(title, tags='', event_date='2030-05-01', category='MUSIC'):
+    return f'{title},Imported,event_images/a.jpg,{category},{event_date},10:00,11:00,Hall,Street,{tags},Org,org@example.com,1\n'
+
+
+class ImportTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.jazz = Interest.objects.create(name='Jazz')
+
+    def write_file(self, content, suffix='.csv'):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w') as file:
+            file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_command_imports_in_batches_and_reports_bad_rows(self):
+        path = self.write_file(
+            IMPORT_HEADER + import_row('Alpha', tags='jazz') + import_row('Beta', tags=str(self.jazz.id))
+            + import_row('Gamma', tags='Polka') + import_row('Delta', event_date='not-a-date') + import_row('Epsilon')
+        )
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_events', path, organizer='organizer', batch_size=2, stdout=out, stderr=err)
+
+        self.assertIn('Imported 3 events, 2 rejected', out.getvalue())
+        self.assertIn('Line 4:', err.getvalue())
+        self.assertIn('Line 5:', err.getvalue())
+        self.assertEqual(set(Event.objects.values_list('title', flat=True)), {'Alpha', 'Beta', 'Epsilon'})
+        self.assertEqual(set(self.jazz.events.values_list('title', flat=True)), {'Alpha', 'Beta'})
+        self.assertEqual(len(search_event_ids('alpha')), 1)
+
+    def test_json_lines_with_an_unreadable_line(self):
+        row = {
+            'title': 'Lined', 'description': 'Imported', 'image': 'event_images/a.jpg', 'category': 'MUSIC',
+            'event_date': '2030-05-01', 'start_time': '10:00', 'end_time': '11:00', 'venue_name': 'Hall',
+            'address': 'Street', 'tags': ['Jazz'], 'organizer_name': 'Org', 'organizer_email': 'org@example.com',
+            'organizer_phone': '1',
+        }
+        rows = read_rows(io.BytesIO(f'{json.dumps(row)}\n{{broken\n'.encode()), 'jsonl')
+        stats = EventImporter(self.organizer).run(rows)
+        self.assertEqual((stats['created'], stats['failed'], stats['errors'][0]['line']), (1, 1, 2))
+
+    def test_dry_run_saves_nothing(self):
+        rows = read_rows(io.BytesIO((IMPORT_HEADER + import_row('Dry')).encode()), 'csv')
+        stats = EventImporter(self.organizer, dry_run=True).run(rows)
+        self.assertEqual((stats['processed'], stats['created'], Event.objects.count()), (1, 0, 0))
+
+    def test_upload_endpoint_is_for_admins(self):
+        upload = SimpleUploadedFile('events.csv', (IMPORT_HEADER + import_row('Uploaded')).encode())
+        self.assertEqual(api_client(self.organizer).post('/api/events/events/import/', {'file': upload}).status_code, 403)
+
+        admin = make_user('admin', is_staff=True)
+        upload.seek(0)
+        response = api_client(admin).post('/api/events/events/import/', {'file': upload})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Event.objects.get().organizer, admin)
+
+
+# --- Exports ---
+class ExportTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event(self.organizer)
+        self.guests = [make_user(f'guest{number}') for number in range(3)]
+        self.event.attendees.add(*self.guests)
+        for guest in self.guests[:2]:
+            Invitation.objects.create(event=self.event, inviter=self.organizer, invitee=guest)
+
+    def export(self, export, user=None, **params):
+        return api_client(user or self.organizer).get(f'/api/events/events/{self.event.pk}/export/{export}/', params)
+
+    def test_attendees_as_csv(self):
+        response = self.export('attendees')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="event-{self.event.pk}-attendees.csv"')
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['user_id', 'username', 'first_name', 'last_name', 'email'])
+        self.assertEqual([row[1] for row in rows[1:]], ['guest0', 'guest1', 'guest2'])
+
+    def test_invitations_as_json_lines(self):
+        response = self.export('invitations', output='jsonl')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(row['username'], row['status']) for row in rows], [('guest0', 'PENDING'), ('guest1', 'PENDING')])
+
+    def test_chunks_hold_at_most_chunk_size_rows(self):
+        with mock.patch('events.exports.CHUNK_SIZE', 2):
+            chunks = list(stream_export(self.event.pk, 'attendees', 'jsonl'))
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [2, 1])
+
+    def test_only_the_organizer_may_export(self):
+        self.assertEqual(self.export('attendees', user=self.guests[0]).status_code, 403)
+        self.assertEqual(self.export('everything').status_code, 404)
+        self.assertEqual(self.export('attendees', output='xml').status_code, 400)
+
+
+# --- Deletion ---
+class DeletionTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.event = make_event(self.organizer, title='Doomed', latitude=10.0, longitude=10.0)
+        self.guests = [make_user(f'guest{number}') for number in range(5)]
+        self.event.attendees.add(*self.guests)
+        for guest in self.guests:
+            Invitation.objects.create(event=self.event, inviter=self.organizer, invitee=guest)
+            guest.bookmarked_events.add(self.event)
+        adjust_unread_count([guest.id for guest in self.guests], +1)
+
+    def delete(self):
+        with self.captureOnCommitCallbacks(execute=True), mock.patch('events.deletion.submit_after_commit') as submit:
+            response = api_client(self.organizer).delete(f'/api/events/events/{self.event.pk}/')
+        self.assertEqual(response.status_code, 204)
+        return submit
+
+    def test_deleted_event_is_hidden_then_purged(self):
+        submit = self.delete()
+        submit.assert_called_once_with(purge_event, self.event.pk)
+
+        client = api_client(self.guests[0])
+        self.assertEqual(client.get('/api/events/events/').json(), [])
+        self.assertEqual(client.get(f'/api/events/events/{self.event.pk}/').status_code, 404)
+        self.assertEqual(client.get('/api/events/events/search/', {'q': 'doomed'}).json(), [])
+        self.assertEqual(client.get('/api/events/events/nearby/', {'lat': 10, 'lon': 10}).json(), [])
+        self.assertEqual(client.get('/api/events/notifications/').json(), [])
+        self.assertTrue(Event.all_objects.filter(pk=self.event.pk).exists())
+
+        progress = []
+        totals = purge_event(self.event.pk, chunk_size=2, on_progress=lambda step, deleted: progress.append((step, deleted)))
+        self.assertEqual(totals, {'invitations': 5, 'attendees': 5, 'bookmarks': 5, 'tags': 0})
+        self.assertEqual([deleted for step, deleted in progress if step == 'invitations'], [2, 4, 5])
+        self.assertFalse(Event.all_objects.filter(pk=self.event.pk).exists())
+        self.assertIsNone(purge_event(self.event.pk))
+
+    def test_unread_invitations_are_released_once(self):
+        self.delete()
+        purge_event(self.event.pk)
+        self.assertEqual(
+            list(CustomUser.objects.filter(pk__in=[guest.pk for guest in self.guests]).values_list('unread_notification_count', flat=True)),
+            [0] * 5,
+        )
+
+    def test_invitation_to_a_deleted_event_cannot_be_answered(self):
+        invitation = Invitation.objects.get(invitee=self.guests[0])
+        self.delete()
+        response = api_client(self.guests[0]).post(f'/api/events/invitations/{invitation.pk}/respond/', {'response': 'accept'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_detail_does_not_expose_deleted_at(self):
+        self.assertNotIn('deleted_at', api_client().get(f'/api/events/events/{self.event.pk}/').json())
+
+    def test_command_finishes_interrupted_purges(self):
+        self.delete()
+        out = io.StringIO()
+        call_command('purge_deleted_events', chunk_size=3, stdout=out)
+        self.assertIn(f'Purged event {self.event.pk} (5 invitations, 5 attendees, 5 bookmarks, 0 tags).', out.getvalue())
+        self.assertFalse(Event.all_objects.exists())
+
+
+# --- Version counters ---
+class VersionCounterTests(EventTestCase):
+    def test_seeded_from_the_clock_and_bumped_by_one(self):
+        counter = VersionCounter('tests:version')
+        before = seed()
+        version = counter.current()
+        self.assertGreaterEqual(version, before)
+        self.assertEqual(counter.current(), version)
+        self.assertEqual(counter.bump(), version + 1)
+
+    def test_bump_of_a_missing_counter_reseeds(self):
+        counter = VersionCounter('tests:version')
+        self.assertIsNone(counter.bump())
+        self.assertIsNotNone(cache.get('tests:version'))
+
+    def test_index_applies_only_the_next_version(self):
+        class Rows(VersionedIndex):
+            counter = VersionCounter('tests:version')
+            rows = {1: 'a', 2: 'b'}
+
+            def _load(self, ids=None):
+                return {key: value for key, value in self.rows.items() if ids is None or key in ids}
+
+            def _replace(self, data):
+                self.data = dict(data)
+
+            def _update(self, ids, data):
+                self.data.update(data)
+
+        index = Rows()
+        index.ensure_fresh()
+        index.rows = {1: 'a', 2: 'changed'}
+        index.refresh([2])
+        self.assertEqual(index.data, {1: 'a', 2: 'changed'})
+        self.assertEqual(index.version, Rows.counter.current())
+
+        Rows.counter.bump()  # Another process refreshed first.
+        index.refresh([1])
+        self.assertIsNone(index.version)
+        index.ensure_fresh()
+        self.assertEqual(index.version, Rows.counter.current())
+
+    def test_snapshot_is_rebuilt_once_per_version(self):
+        counter = VersionCounter('tests:version')
+        build = mock.Mock(side_effect=lambda version: mock.Mock(version=version))
+        snapshot = VersionedSnapshot(counter, build)
+        self.assertIs(snapshot.get(), snapshot.get())
+        counter.bump()
+        self.assertEqual(snapshot.get().version, counter.current())
+        self.assertEqual(build.call_count, 2)
+
+    def test_bump_on_commit_waits_for_the_transaction(self):
+        counter = VersionCounter('tests:version')
+        version = counter.current()
+        with self.captureOnCommitCallbacks(execute=True):
+            counter.bump_on_commit()
+            self.assertEqual(counter.current(), version)
+        self.assertEqual(counter.current(), version + 1)
@@ -5,7 +5,19 @@ from .views import (event_list_create, event_detail, my_event_list, user_invite_
                     mark_notification_as_read,
                     respond_to_invitation,
                     toggle_bookmark,        
-                    bookmarked_events_list
+                    bookmarked_events_list,
+                    event_cache_stats,
+                    search_events,
+                    nearby_events,
+                    send_bulk_invite,
+                    unread_notification_count,
+                    notification_stream,
+                    sync_bookmarks,
+                    event_calendar,
+                    event_facets,
+                    personal_event_feed,
+                    import_events,
+                    export_event_people
                     )
 
 urlpatterns = [
@@ -15,14 +27,40 @@ urlpatterns = [
     # For "My Event" tab
     path('events/my-events/', my_event_list, name='my-event-list'),
 
+    # Bulk import from a CSV / JSON Lines upload (admin only)
+    path('events/import/', import_events, name='event-import'),
+
+    # "Event For You": upcoming events ranked by the user's preferred tags
+    path('events/for-you/', personal_event_feed, name='event-for-you'),
+
+    # Full-text search over events (e.g., /api/events/events/search/?q=jazz)
+    path('events/search/', search_events, name='event-search'),
+
+    # Events near a point, nearest first (e.g., /api/events/events/nearby/?lat=23.8&lon=90.4&radius=5)
+    path('events/nearby/', nearby_events, name='event-nearby'),
+
+    # Events grouped by day for a calendar (e.g., /api/events/events/calendar/?start=2025-06-01&end=2025-06-30)
+    path('events/calendar/', event_calendar, name='event-calendar'),
+
+    # Upcoming-event counts per category and tag, for the filter chips
+    path('events/facets/', event_facets, name='event-facets'),
+
     # For viewing, updating, and deleting a specific event
     path('events/<int:pk>/', event_detail, name='event-detail'),
     path('events/<int:event_id>/invite-list/', user_invite_list, name='user-invite-list'),
+    # Download the attendees or invitations of an event (organizer only), e.g. .../export/attendees/?output=csv
+    path('events/<int:pk>/export/<str:export>/', export_event_people, name='event-export'),
     
     # To send an invitation to a specific user for a specific event
     path('events/<int:event_id>/invite/<int:user_id>/', send_invite, name='send-invite'),
+    # To invite many users at once, body: {"user_ids": [...]}
+    path('events/<int:event_id>/invite/bulk/', send_bulk_invite, name='send-bulk-invite'),
     # Get the list of all notifications for the logged-in user
     path('notifications/', notification_list, name='notification-list'),
+    # Number of unread notifications (cheap, meant for frequent polling)
+    path('notifications/unread-count/', unread_notification_count, name='notification-unread-count'),
+    # Live invitation updates as server-sent events (run under ASGI)
+    path('notifications/stream/', notification_stream, name='notification-stream'),
 
     # Mark all notifications as read
     path('notifications/mark-all-as-read/', mark_all_notifications_as_read, name='notifications-mark-all-read'),
@@ -36,5 +74,10 @@ urlpatterns = [
 
     # To get the list of all of the user's bookmarked events
     path('bookmarks/', bookmarked_events_list, name='bookmark-list'),
+    # Apply a batch of bookmark adds/removes from an offline client
+    path('bookmarks/sync/', sync_bookmarks, name='bookmark-sync'),
+
+    # Hit/miss counters of the event response cache (admin only)
+    path('cache-stats/', event_cache_stats, name='event-cache-stats'),
 ]
 
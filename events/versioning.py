@@ -0,0 +1,115 @@
+"""
+Version counters in the shared cache, for process-local indexes.
+
+Several modules keep an in-memory structure per process (the "For You" tag
+index, the spot matrix, the spatial index, the interest catalogue) and use
+one counter in the shared cache to tell the processes apart: a writer bumps
+the counter after its transaction commits, and a process whose structure was
+built at another version rebuilds it on its next read.
+
+VersionedIndex and VersionedSnapshot hold that handshake for the two kinds of
+structure: one patched in place by the writing process, and one immutable and
+only ever rebuilt. Both read the version before the rows, so a change that
+lands while the rows load leaves the structure marked stale rather than
+wrongly current.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def seed():
+    # Versions start from the clock rather than from 1, so a restarted or
+    # flushed cache can never hand out a version number it used before.
+    return time.time_ns() // 1000
+
+
+class VersionCounter:
+    def __init__(self, key):
+        self.key = key
+
+    def current(self):
+        """The current version, seeding the counter when it is missing."""
+        version = cache.get(self.key)
+        if version is None:
+            cache.add(self.key, seed(), timeout=None)
+            version = cache.get(self.key)
+        return version
+
+    def bump(self):
+        """Increments the version; returns None when it had to be re-seeded."""
+        try:
+            return cache.incr(self.key)
+        except ValueError:
+            self.current()
+            return None
+
+    def bump_on_commit(self):
+        """Bumps the version once the current transaction commits."""
+        transaction.on_commit(self.bump)
+
+
+class VersionedIndex:
+    """
+    A structure that the writing process patches in place. A refresh bumps the
+    counter and is applied locally only when the bump lands exactly on the
+    version the structure was built at; otherwise another process changed rows
+    too, and the structure is rebuilt on its next read.
+
+    Subclasses set `counter` and implement _load(ids=None), which reads the
+    rows of the given ids (all rows when None), and _replace(data) and
+    _update(ids, data), which apply a full or partial load under self._lock.
+    """
+    counter = None
+
+    def __init__(self):
+        self.version = None
+        self._lock = threading.Lock()
+
+    def ensure_fresh(self):
+        version = self.counter.current()
+        if version == self.version:
+            return
+        data = self._load()
+        with self._lock:
+            self._replace(data)
+            self.version = version
+
+    def refresh(self, ids):
+        """Re-reads the given rows (dropping the ones that are gone)."""
+        version = self.counter.bump()
+        if version is None or self.version is None:
+            return
+        data = self._load(ids)
+        with self._lock:
+            if version != self.version + 1:
+                self.version = None
+                return
+            self._update(ids, data)
+            self.version = version
+
+
+class VersionedSnapshot:
+    """
+    An immutable structure shared by every thread of the process and rebuilt,
+    by one thread, once the counter has moved. build(version) returns the
+    structure, which must keep the version it was built at as `.version`.
+    """
+
+    def __init__(self, counter, build):
+        self.counter = counter
+        self._build = build
+        self._current = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        version = self.counter.current()
+        current = self._current
+        if current is not None and current.version == version:
+            return current
+        with self._lock:
+            if self._current is None or self._current.version != version:
+                self._current = self._build(version)
+            return self._current
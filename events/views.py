@@ -4,21 +4,144 @@ from rest_framework.response import Response
 from .models import Event, Invitation
 from accounts.models import CustomUser
 from django.shortcuts import get_object_or_404
-from .serializers import EventListSerializer, EventDetailSerializer, EventCreateSerializer, InvitationSerializer, UserInviteListSerializer, NotificationSerializer
+from django.db import transaction
+from django.conf import settings
+from django.utils import timezone
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed, NotFound
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from django.db.models import Count, Exists, OuterRef, Q, Value
+from django.db.models.functions import Lower
+from .serializers import EventListSerializer, EventDetailSerializer, EventCreateSerializer, InvitationSerializer, UserInviteListSerializer, NotificationSerializer, NearbyEventSerializer, PersonalFeedEventSerializer, NearbyEventsRequestSerializer, EventListQuerySerializer, CalendarRequestSerializer, BulkInviteSerializer, BookmarkSyncSerializer
+from .pagination import KeysetPagination, DeltaSyncPagination
+from .notifications import adjust_unread_count, recount_unread, publish_invitations_created, publish_invitation_response
+from .broker import get_broker
+from . import cache as response_cache
+from .search import search_event_ids
+from .attendance import add_attendee
+from .facets import get_facets
+from . import personal_feed
+from .importer import FORMATS as IMPORT_FORMATS, EventImporter, detect_format, read_rows
+from .deletion import soft_delete_event
+from .exports import EXPORTS, FORMATS as EXPORT_FORMATS, stream_export
+from personalize.geo import EARTH_RADIUS_KM
+from personalize.views import haversine_distance
+from math import asin, cos, degrees, radians, sin
+from datetime import date
+import heapq
+from itertools import groupby
+import asyncio
+import json
+
+def _event_list_payload(request, events, ordering=('-event_date', '-id')):
+    """
+    Serializes a list of events. When the client asks for a page (`?page_size=`
+    and/or `?cursor=`), a keyset-paginated page is returned instead of the full list.
+    """
+    paginator = KeysetPagination(ordering)
+    if paginator.is_requested(request):
+        page = paginator.paginate_queryset(events, request)
+        serializer = EventListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data).data
+
+    serializer = EventListSerializer(events.order_by(*ordering), many=True)
+    return serializer.data
+
+def _event_list_response(request, events, ordering=('-event_date', '-id')):
+    return Response(_event_list_payload(request, events, ordering))
+
+def _apply_list_options(events, options):
+    """
+    Applies `?sort=popular` and `?min_attendees=`. Returns (events, ordering).
+    Both read the denormalized attendee_count, so the M2M table is never aggregated.
+    """
+    if 'min_attendees' in options:
+        events = events.filter(attendee_count__gte=options['min_attendees'])
+    if options['sort'] == 'popular':
+        return events, ('-attendee_count', '-id')
+    return events, ('-event_date', '-id')
+
+# --- Bookmark helpers ---
+Bookmark = CustomUser.bookmarked_events.through
+
+def _with_bookmark_flag(events, user):
+    """Annotates `is_bookmarked` for the user with a correlated EXISTS subquery."""
+    if not user.is_authenticated:
+        return events
+    return events.annotate(
+        is_bookmarked=Exists(Bookmark.objects.filter(customuser_id=user.id, event_id=OuterRef('pk')))
+    )
+
+def _mark_bookmarked(payload, user):
+    """
+    Sets `is_bookmarked` on a cached, user-independent list payload, looking up
+    the bookmarks of the whole page in one query.
+    """
+    rows = payload['results'] if isinstance(payload, dict) else payload
+    if not user.is_authenticated or not rows:
+        return payload
+    bookmarked = set(
+        Bookmark.objects.filter(customuser_id=user.id, event_id__in=[row['id'] for row in rows])
+        .values_list('event_id', flat=True)
+    )
+    rows = [{**row, 'is_bookmarked': row['id'] in bookmarked} for row in rows]
+    return {**payload, 'results': rows} if isinstance(payload, dict) else rows
+
+def _cached_response(payload, hit):
+    response = Response(payload)
+    response['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+# --- Conditional GET helpers ---
+def _with_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+def _not_modified(request, etag, last_modified):
+    """
+    Returns a 304 response when the client's If-None-Match / If-Modified-Since
+    still matches, or None when the full response has to be built.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    return _with_validators(response, etag, last_modified) if response is not None else None
 
 # --- View for Listing All Events and Creating a New Event ---
 @api_view(['GET', 'POST'])
 @permission_classes([permissions.IsAuthenticatedOrReadOnly])
 def event_list_create(request):
     """
-    - GET: List all events (publicly accessible).
+    - GET: List all events (publicly accessible). Supports cursor pagination,
+      `?sort=date|popular` and `?min_attendees=`.
     - POST: Create a new event (requires authentication).
     """
     # --- Logic for GET (Listing all events) ---
     if request.method == 'GET':
-        events = Event.objects.all().order_by('-event_date')
-        serializer = EventListSerializer(events, many=True)
-        return Response(serializer.data)
+        params = EventListQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # The validators come from the cache version counters, so a matching
+        # If-None-Match is answered without touching the database.
+        etag, last_modified = response_cache.list_validators(request)
+        not_modified = _not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        # Served from the versioned response cache; any event change bumps the feed version.
+        events, ordering = _apply_list_options(Event.objects.all(), params.validated_data)
+        payload, hit = response_cache.get_or_build(
+            response_cache.list_cache_key(request),
+            lambda: _event_list_payload(request, events, ordering),
+        )
+        response = _cached_response(_mark_bookmarked(payload, request.user), hit)
+        return _with_validators(response, etag, last_modified)
 
     # --- Logic for POST (Creating a new event) ---
     elif request.method == 'POST':
@@ -36,12 +159,191 @@ def event_list_create(request):
 def my_event_list(request):
     """
     List only the events created by the currently authenticated user.
+    Takes the same `?sort=` and `?min_attendees=` options as the main feed.
     """
+    params = EventListQuerySerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
     # The decorator ensures request.user exists.
-    events = Event.objects.filter(organizer=request.user).order_by('-event_date')
-    serializer = EventListSerializer(events, many=True)
+    etag, last_modified = response_cache.list_validators(request, scope='mine')
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    events, ordering = _apply_list_options(Event.objects.filter(organizer=request.user), params.validated_data)
+    events = _with_bookmark_flag(events, request.user)
+    return _with_validators(_event_list_response(request, events, ordering), etag, last_modified)
+
+# --- View for searching events ---
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def search_events(request):
+    """
+    Full-text search over event titles, descriptions, venues, addresses and tags.
+    Expects `?q=<text>` and an optional `?limit=`. Results are ordered by relevance.
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({"error": "A search query (q) is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = int(request.query_params.get('limit', settings.EVENTS_PAGE_SIZE))
+    except ValueError:
+        return Response({"error": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, settings.EVENTS_MAX_PAGE_SIZE))
+
+    event_ids = search_event_ids(query, limit=limit)
+    events = _with_bookmark_flag(Event.objects.all(), request.user).in_bulk(event_ids)
+    ranked = [events[event_id] for event_id in event_ids if event_id in events]
+    serializer = EventListSerializer(ranked, many=True)
     return Response(serializer.data)
 
+# --- View for the "Event For You" feed ---
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def personal_event_feed(request):
+    """
+    Upcoming events ranked for the current user: most tags in common with the
+    user's preferences first, then the soonest, then the most attended.
+    Always cursor-paginated (`?page_size=`, `?cursor=`).
+    """
+    paginator = KeysetPagination(('matched_tags', 'event_date', 'attendee_count', 'id'))
+    after = None
+    token = request.query_params.get(paginator.cursor_query_param)
+    if token:
+        values = paginator.decode_values(token)
+        try:
+            after = (int(values[0]), date.fromisoformat(values[1]), int(values[2]), int(values[3]))
+        except (TypeError, ValueError):
+            raise NotFound("Invalid cursor.")
+
+    page_size = paginator.get_page_size(request)
+    preferred = list(request.user.preferences.values_list('id', flat=True))
+    # One extra entry tells whether there is a next page.
+    ranked = personal_feed.get_index().rank(preferred, page_size + 1, after=after)
+    page = ranked[:page_size]
+    next_cursor = paginator.encode_cursor(page[-1][0]) if len(ranked) > page_size else None
+
+    events = _with_bookmark_flag(Event.objects.prefetch_related('tags'), request.user).in_bulk([key[-1] for key, _ in page])
+    results = []
+    for key, matched in page:
+        event = events.get(key[-1])
+        if event is not None:
+            event.matched_tags = matched
+            results.append(event)
+
+    serializer = PersonalFeedEventSerializer(results, many=True)
+    return Response({'next_cursor': next_cursor, 'results': serializer.data})
+
+# --- View for "Events Near Me" ---
+def _bounding_box(lat, lon, radius_km):
+    """
+    Returns the latitude range and the longitude ranges (two of them when the
+    box crosses the antimeridian) that contain every point within radius_km.
+    """
+    dlat = degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+
+    # Near the poles the box spans every longitude.
+    widest_lat = max(abs(min_lat), abs(max_lat))
+    ratio = sin(radius_km / EARTH_RADIUS_KM) / cos(radians(widest_lat)) if widest_lat < 89.9 else 1.0
+    if ratio >= 1.0:
+        return (min_lat, max_lat), [(-180.0, 180.0)]
+
+    dlon = degrees(asin(ratio))
+    min_lon, max_lon = lon - dlon, lon + dlon
+    if min_lon < -180.0:
+        return (min_lat, max_lat), [(min_lon + 360.0, 180.0), (-180.0, max_lon)]
+    if max_lon > 180.0:
+        return (min_lat, max_lat), [(min_lon, 180.0), (-180.0, max_lon - 360.0)]
+    return (min_lat, max_lat), [(min_lon, max_lon)]
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def nearby_events(request):
+    """
+    Lists events within `radius` km of (`lat`, `lon`), nearest first.
+    Candidates come from an indexed bounding-box scan; exact distances are only
+    computed for those.
+    """
+    params = NearbyEventsRequestSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    lat, lon = params.validated_data['lat'], params.validated_data['lon']
+    radius, limit = params.validated_data['radius'], params.validated_data['limit']
+
+    (min_lat, max_lat), lon_ranges = _bounding_box(lat, lon, radius)
+    in_box = Q()
+    for min_lon, max_lon in lon_ranges:
+        in_box |= Q(longitude__range=(min_lon, max_lon))
+    # Only (id, latitude, longitude) is read and only deleted_at is filtered on
+    # besides the box, so the geo index (latitude, longitude, deleted_at) covers it.
+    candidates = Event.objects.filter(in_box, latitude__range=(min_lat, max_lat)).values_list('id', 'latitude', 'longitude')
+
+    nearest = []
+    for event_id, event_lat, event_lon in candidates:
+        distance = haversine_distance(lat, lon, event_lat, event_lon)
+        if distance <= radius:
+            nearest.append((distance, event_id))
+    nearest = heapq.nsmallest(limit, nearest)
+
+    events = _with_bookmark_flag(Event.objects.all(), request.user).in_bulk([event_id for _, event_id in nearest])
+    results = []
+    for distance, event_id in nearest:
+        event = events.get(event_id)
+        if event is not None:
+            event.distance_km = round(distance, 2)
+            results.append(event)
+
+    serializer = NearbyEventSerializer(results, many=True)
+    return Response(serializer.data)
+
+# --- View for the filter chips of the event browser ---
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def event_facets(request):
+    """
+    Number of upcoming events per category and per tag. Served from cached
+    counters that the Event and tag signals keep up to date.
+    """
+    return Response(get_facets())
+
+# --- View for the monthly calendar ---
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def event_calendar(request):
+    """
+    Events between `start` and `end` (inclusive, YYYY-MM-DD), grouped by day.
+    Optional filters: `category` and `tags` (repeatable; events with any of them).
+    With `?mode=counts` only the number of events per day is returned.
+    Days without events are left out.
+    """
+    params = CalendarRequestSerializer(data=request.query_params)
+    if not params.is_valid():
+        return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+    options = params.validated_data
+
+    # One range scan over the (event_date, category) index.
+    events = Event.objects.filter(event_date__range=(options['start'], options['end']))
+    if 'category' in options:
+        events = events.filter(category=options['category'])
+    if options.get('tags'):
+        # EXISTS instead of a join, so an event with several matching tags isn't repeated.
+        events = events.filter(Exists(
+            Event.tags.through.objects.filter(event_id=OuterRef('pk'), interest_id__in=options['tags'])
+        ))
+
+    if options['mode'] == 'counts':
+        per_day = events.order_by('event_date').values('event_date').annotate(count=Count('id'))
+        days = {row['event_date'].isoformat(): row['count'] for row in per_day}
+    else:
+        events = _with_bookmark_flag(events, request.user).order_by('event_date', 'start_time', 'id')
+        rows = EventListSerializer(events, many=True).data
+        days = {day: list(day_rows) for day, day_rows in groupby(rows, key=lambda row: row['event_date'])}
+
+    return Response({"start": options['start'], "end": options['end'], "days": days})
+
 # --- View for Detail, Update, and Delete actions ---
 @api_view(['GET', 'PUT', 'DELETE'])
 # We handle permissions manually inside the function for this view.
@@ -51,16 +353,29 @@ def event_detail(request, pk):
     - PUT: Update an event (organizer only).
     - DELETE: Delete an event (organizer only).
     """
+    # --- Logic for GET (Viewing a single event) ---
+    # A cache hit is answered without touching the database at all, and so is
+    # a revalidation (If-None-Match / If-Modified-Since) that still matches.
+    if request.method == 'GET':
+        key, etag, last_modified = response_cache.detail_validators(pk)
+        not_modified = _not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        def build():
+            event = Event.objects.filter(pk=pk).prefetch_related('tags', 'attendees').first()
+            return EventDetailSerializer(event).data if event else None
+
+        payload, hit = response_cache.get_or_build(key, build)
+        if payload is None:
+            return Response({"error": "Event not found."}, status=status.HTTP_404_NOT_FOUND)
+        return _with_validators(_cached_response(payload, hit), etag, last_modified)
+
     try:
         event = Event.objects.get(pk=pk)
     except Event.DoesNotExist:
         return Response({"error": "Event not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    # --- Logic for GET (Viewing a single event) ---
-    if request.method == 'GET':
-        serializer = EventDetailSerializer(event)
-        return Response(serializer.data)
-
     # --- The following methods require the user to be the organizer ---
     # Manual Permission Check: Is the request user the organizer of the event?
     if event.organizer != request.user:
@@ -80,30 +395,86 @@ def event_detail(request, pk):
 
     # --- Logic for DELETE (Deleting an event) ---
     elif request.method == 'DELETE':
-        event.delete()
+        # The event disappears right away; its rows are purged in the background.
+        soft_delete_event(event)
         return Response(status=status.HTTP_204_NO_CONTENT)
     
+@api_view(['GET'])
+# Permissions are checked manually, exactly as in event_detail.
+def export_event_people(request, pk, export):
+    """
+    Streams the attendees or invitations of an event (organizer only).
+    `?output=csv` (default) or `?output=jsonl`. (`?format=` is taken by DRF's
+    content negotiation.)
+    """
+    if export not in EXPORTS:
+        return Response({"error": f"Unknown export. Choose one of: {', '.join(EXPORTS)}."}, status=status.HTTP_404_NOT_FOUND)
+    fmt = request.query_params.get('output', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return Response({"error": f"output must be one of: {', '.join(EXPORT_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    organizer_id = Event.objects.filter(pk=pk).values_list('organizer_id', flat=True).first()
+    if organizer_id is None:
+        return Response({"error": "Event not found."}, status=status.HTTP_404_NOT_FOUND)
+    if organizer_id != request.user.id:
+        return Response(
+            {"error": "You do not have permission to perform this action."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(stream_export(pk, export, fmt), content_type=f'{content_type}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="event-{pk}-{export}.{fmt}"'
+    return response
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_invite_list(request, event_id):
     """
     Returns a list of users who can be invited to a specific event.
     Excludes the current user, the event organizer, and anyone already invited.
+    - `?q=<text>` keeps users whose username, first or last name starts with the text.
+    - `?page_size=` / `?cursor=` switch to cursor pagination (ordered by username).
     """
     try:
-        event = Event.objects.get(pk=event_id)
+        event = Event.objects.only('id', 'organizer_id').get(pk=event_id)
     except Event.DoesNotExist:
         return Response({"error": "Event not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    # Get IDs of users who have already been invited to this event
-    already_invited_ids = Invitation.objects.filter(event=event).values_list('invitee__id', flat=True)
-    
-    # Get all users, excluding the current user, the organizer, and those already invited
-    users_to_invite = CustomUser.objects.exclude(
-        id__in=[request.user.id, event.organizer.id, *already_invited_ids]
+    # Already-invited users are filtered with a NOT EXISTS subquery, so their IDs
+    # never have to be loaded into Python.
+    already_invited = Invitation.objects.filter(event_id=event.id, invitee_id=OuterRef('pk'))
+    users_to_invite = (
+        CustomUser.objects.exclude(id__in=[request.user.id, event.organizer_id])
+        .filter(~Exists(already_invited))
+        .only('id', 'username', 'first_name', 'last_name')
     )
 
-    serializer = UserInviteListSerializer(users_to_invite, many=True)
+    query = request.query_params.get('q', '').strip()
+    if query:
+        # Prefix match as a range on the lower-cased columns, which the
+        # expression indexes on CustomUser can answer directly. The term is
+        # lower-cased by the database too: SQLite's LOWER() only folds ASCII,
+        # and Python's str.lower() would fold "É" where the column keeps it.
+        upper_bound = Lower(Value(query + '\U0010ffff'))
+        query = Lower(Value(query))
+        users_to_invite = users_to_invite.alias(
+            username_lower=Lower('username'),
+            first_name_lower=Lower('first_name'),
+            last_name_lower=Lower('last_name'),
+        ).filter(
+            Q(username_lower__gte=query, username_lower__lt=upper_bound)
+            | Q(first_name_lower__gte=query, first_name_lower__lt=upper_bound)
+            | Q(last_name_lower__gte=query, last_name_lower__lt=upper_bound)
+        )
+
+    paginator = KeysetPagination(ordering=('username', 'id'))
+    if paginator.is_requested(request):
+        page = paginator.paginate_queryset(users_to_invite, request)
+        serializer = UserInviteListSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    serializer = UserInviteListSerializer(users_to_invite.order_by('username', 'id'), many=True)
     return Response(serializer.data)
 
 # --- NEW VIEW TO SEND AN INVITATION ---
@@ -131,31 +502,198 @@ def send_invite(request, event_id, user_id):
         inviter=request.user,
         invitee=invitee
     )
-    
-    # You could add logic here to send a push notification or email to the invitee
-    
+    adjust_unread_count([invitee.id], +1)
+
+    # Push it to the invitee's open notification streams.
+    publish_invitations_created([invitation])
+
     serializer = InvitationSerializer(invitation)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def send_bulk_invite(request, event_id):
+    """
+    Invites many users to an event in one request.
+    Expects a body like: {"user_ids": [3, 8, 15]}
+    Returns one outcome per user: invited, already_invited, not_found or self.
+    The number of queries does not depend on how many users are invited.
+    """
+    serializer = BulkInviteSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        event = Event.objects.only('id', 'title').get(pk=event_id)
+    except Event.DoesNotExist:
+        return Response({"error": "Event not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    # Drop duplicates but keep the order the client sent.
+    user_ids = list(dict.fromkeys(serializer.validated_data['user_ids']))
+
+    # One query each for "does the user exist" and "is the user already invited".
+    existing_ids = set(CustomUser.objects.filter(id__in=user_ids).values_list('id', flat=True))
+    with transaction.atomic():
+        # The invitees already invited are read in the same transaction as the insert.
+        invited_ids = set(
+            Invitation.objects.filter(event_id=event.id, invitee_id__in=user_ids).values_list('invitee_id', flat=True)
+        )
+
+        results = []
+        new_invitations = []
+        for user_id in user_ids:
+            if user_id == request.user.id:
+                outcome = 'self'
+            elif user_id not in existing_ids:
+                outcome = 'not_found'
+            elif user_id in invited_ids:
+                outcome = 'already_invited'
+            else:
+                outcome = 'invited'
+                new_invitations.append(Invitation(event=event, inviter=request.user, invitee_id=user_id))
+            results.append({"user_id": user_id, "status": outcome})
+
+        # The (event, invitee) unique constraint turns a concurrent duplicate into a
+        # no-op. bulk_create(ignore_conflicts=True) neither returns primary keys nor
+        # says which rows it skipped, so the new rows are read back (one query): none
+        # of these (event, invitee) pairs existed before the insert, and ours are the
+        # ones sent by this inviter.
+        Invitation.objects.bulk_create(new_invitations, batch_size=500, ignore_conflicts=True)
+        inserted = []
+        if new_invitations:
+            inserted = list(
+                Invitation.objects.filter(
+                    event_id=event.id,
+                    invitee_id__in=[invitation.invitee_id for invitation in new_invitations],
+                    inviter=request.user,
+                ).select_related('event', 'inviter')
+            )
+        if inserted:
+            # Recounted rather than incremented: two overlapping batches from the same
+            # inviter may both read back the same row, and must not count it twice.
+            recount_unread([invitation.invitee_id for invitation in inserted])
+            publish_invitations_created(inserted)
+
+    # Planned invitations that lost the race to a concurrent request already existed.
+    inserted_ids = {invitation.invitee_id for invitation in inserted}
+    for result in results:
+        if result["status"] == 'invited' and result["user_id"] not in inserted_ids:
+            result["status"] = 'already_invited'
+
+    return Response(
+        {"invited": len(inserted), "results": results},
+        status=status.HTTP_201_CREATED if inserted else status.HTTP_200_OK
+    )
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def notification_list(request):
     """
     Lists all event invitations received by the currently logged-in user.
+    With `?since=<cursor>` only invitations created or changed after the cursor
+    are returned, together with the cursor to send on the next poll
+    (use an empty `?since=` for the first sync). A change is only handed out
+    once it is a few seconds old (see DeltaSyncPagination).
     """
-    invitations = Invitation.objects.filter(invitee=request.user)
+    # Invitations of deleted events only linger until the background purge reaches them.
+    invitations = Invitation.objects.filter(invitee=request.user, event__deleted_at__isnull=True).select_related('inviter', 'event')
+
+    paginator = DeltaSyncPagination()
+    if paginator.is_requested(request):
+        page = paginator.paginate_queryset(invitations, request)
+        serializer = NotificationSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     serializer = NotificationSerializer(invitations, many=True)
     return Response(serializer.data)
 
+# --- Server-sent events stream (served by the ASGI application) ---
+async def _authenticate_stream(request):
+    """
+    Authenticates a streaming request with the usual JWT, taken from the
+    Authorization header or, because browsers' EventSource cannot set headers,
+    from a `?token=` query parameter.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else request.GET.get('token', '').encode()
+    if not raw_token:
+        return None
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        return await sync_to_async(authentication.get_user)(validated_token)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+async def notification_stream(request):
+    """
+    Pushes invitation changes to the user as server-sent events.
+    One lightweight coroutine per connection holds the stream open; a comment
+    line is sent every few seconds to keep proxies from closing it. Clients that
+    cannot stream can keep polling notification_list with `?since=`.
+
+    Only served over ASGI (e.g. `uvicorn config.asgi:application`). A WSGI
+    server would hold a worker for as long as the client stays connected.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"error": "The notification stream needs an ASGI server."}, status=501)
+
+    user = await _authenticate_stream(request)
+    if user is None:
+        return JsonResponse({"error": "Authentication credentials were not provided or are invalid."}, status=401)
+
+    keepalive = getattr(settings, 'EVENTS_STREAM_KEEPALIVE', 20)
+    subscription = get_broker().subscribe(user.id)
+
+    async def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message['data'], cls=DjangoJSONEncoder)}\n\n"
+        finally:
+            # Runs when the client disconnects and the ASGI handler cancels the stream.
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def unread_notification_count(request):
+    """
+    Returns how many of the user's invitations are unread.
+    Reads the denormalized counter on the user, so it costs no extra query.
+    """
+    return Response({"unread_count": request.user.unread_notification_count})
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def mark_all_notifications_as_read(request):
     """
     Marks all of the user's received invitations as read.
     """
-    Invitation.objects.filter(invitee=request.user, is_read=False).update(is_read=True)
+    marked = Invitation.objects.filter(invitee=request.user, is_read=False).update(is_read=True, updated_at=timezone.now())
+    adjust_unread_count([request.user.id], -marked)
     return Response({"message": "All notifications marked as read."}, status=status.HTTP_200_OK)
 
+def _respond_to_pending(invitation, new_status):
+    """
+    Moves a still-pending invitation to new_status and marks it read.
+    Returns (responded, was_unread).
+    """
+    pending = Invitation.objects.filter(pk=invitation.pk, status=Invitation.Status.PENDING)
+    changes = {'status': new_status, 'is_read': True, 'updated_at': timezone.now()}
+    if pending.filter(is_read=False).update(**changes):
+        return True, True
+    return bool(pending.update(**changes)), False
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def respond_to_invitation(request, invitation_id):
@@ -164,6 +702,8 @@ def respond_to_invitation(request, invitation_id):
     Expects a body like: {"response": "accept"} or {"response": "decline"}
     """
     invitation = get_object_or_404(Invitation, pk=invitation_id, invitee=request.user)
+    if invitation.event.deleted_at is not None:
+        return Response({"error": "Event not found."}, status=status.HTTP_404_NOT_FOUND)
     
     response = request.data.get('response', '').lower()
 
@@ -171,17 +711,33 @@ def respond_to_invitation(request, invitation_id):
         return Response({"error": "This invitation has already been responded to."}, status=status.HTTP_400_BAD_REQUEST)
 
     if response == 'accept':
-        invitation.status = 'ACCEPTED'
-        # Also add the user to the event's attendee list
-        invitation.event.attendees.add(request.user)
+        new_status = Invitation.Status.ACCEPTED
     elif response == 'decline':
-        invitation.status = 'DECLINED'
+        new_status = Invitation.Status.DECLINED
     else:
         return Response({"error": "Invalid response. Please provide 'accept' or 'decline'."}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Mark as read since the user is interacting with it.
-    invitation.is_read = True
-    invitation.save()
+    with transaction.atomic():
+        # Conditional updates, so two concurrent responses can't both go through
+        # (or both release the unread notification).
+        responded, was_unread = _respond_to_pending(invitation, new_status)
+        if not responded:
+            return Response({"error": "This invitation has already been responded to."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Also add the user to the event's attendee list, if a seat is left.
+        if new_status == Invitation.Status.ACCEPTED and not add_attendee(invitation.event, request.user):
+            # reserve_seat() also fails for an event deleted since the check above.
+            # (Checked before set_rollback(), after which no query may run.)
+            deleted = not Event.objects.filter(pk=invitation.event_id).exists()
+            transaction.set_rollback(True)
+            if deleted:
+                return Response({"error": "Event not found."}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"error": "This event is full."}, status=status.HTTP_409_CONFLICT)
+
+    if was_unread:
+        adjust_unread_count([request.user.id], -1)
+    invitation.refresh_from_db(fields=['status', 'is_read', 'updated_at'])
+    publish_invitation_response(invitation)
     
     serializer = NotificationSerializer(invitation)
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -196,10 +752,11 @@ def mark_notification_as_read(request, invitation_id):
     # one user from marking another's notifications as read.
     invitation = get_object_or_404(Invitation, pk=invitation_id, invitee=request.user)
 
-    # If it's not already read, update it.
+    # If it's not already read, update it. The conditional update makes sure
+    # two concurrent requests only decrement the unread counter once.
     if not invitation.is_read:
-        invitation.is_read = True
-        invitation.save(update_fields=['is_read'])
+        marked = Invitation.objects.filter(pk=invitation.pk, is_read=False).update(is_read=True, updated_at=timezone.now())
+        adjust_unread_count([request.user.id], -marked)
 
     return Response({"message": "Notification marked as read."}, status=status.HTTP_200_OK)
 
@@ -212,17 +769,58 @@ def toggle_bookmark(request, event_id):
     If it's not bookmarked, it will be added.
     """
     user = request.user
-    event = get_object_or_404(Event, pk=event_id)
+    if not Event.objects.filter(pk=event_id).exists():
+        return Response({"error": "Event not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    # Check if the user has already bookmarked this event
-    if event in user.bookmarked_events.all():
-        # If yes, remove it
-        user.bookmarked_events.remove(event)
+    with transaction.atomic():
+        # Try to remove the bookmark first: a single indexed DELETE on the
+        # (user, event) row of the through table doubles as the membership check.
+        removed, _ = Bookmark.objects.filter(customuser_id=user.id, event_id=event_id).delete()
+        if not removed:
+            # If nothing was removed, add it
+            Bookmark.objects.bulk_create([Bookmark(customuser_id=user.id, event_id=event_id)], ignore_conflicts=True)
+        # The through table is written directly, so no m2m_changed signal fires.
+        # Bumped once the write commits, so no ETag is handed out for the old flags.
+        response_cache.bump_bookmarks_version(user.id)
+
+    if removed:
         return Response({"message": "Bookmark removed successfully."}, status=status.HTTP_200_OK)
-    else:
-        # If no, add it
-        user.bookmarked_events.add(event)
-        return Response({"message": "Event bookmarked successfully."}, status=status.HTTP_201_CREATED)
+    return Response({"message": "Event bookmarked successfully."}, status=status.HTTP_201_CREATED)
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def sync_bookmarks(request):
+    """
+    Applies a batch of bookmark changes from an offline client in one transaction.
+    Expects a body like: {"add": [1, 2], "remove": [3]}
+    Unknown event IDs in "add" are reported back and skipped.
+    """
+    serializer = BookmarkSyncSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    to_add = set(serializer.validated_data['add'])
+    to_remove = set(serializer.validated_data['remove'])
+    user = request.user
+
+    with transaction.atomic():
+        removed = 0
+        if to_remove:
+            removed, _ = Bookmark.objects.filter(customuser_id=user.id, event_id__in=to_remove).delete()
+
+        existing = set(Event.objects.filter(pk__in=to_add).values_list('id', flat=True)) if to_add else set()
+        # Already-bookmarked events hit the unique (user, event) constraint and are skipped.
+        Bookmark.objects.bulk_create(
+            [Bookmark(customuser_id=user.id, event_id=event_id) for event_id in existing],
+            batch_size=500,
+            ignore_conflicts=True
+        )
+        response_cache.bump_bookmarks_version(user.id)
+
+    return Response({
+        "added": sorted(existing),
+        "removed": removed,
+        "not_found": sorted(to_add - existing),
+    }, status=status.HTTP_200_OK)
 
 # --- NEW VIEW TO LIST ALL BOOKMARKED EVENTS ---
 @api_view(['GET'])
@@ -232,8 +830,43 @@ def bookmarked_events_list(request):
     Returns a list of all events bookmarked by the currently authenticated user.
     """
     user = request.user
-    bookmarked_events = user.bookmarked_events.all().order_by('-created_at')
-    
+    etag, last_modified = response_cache.list_validators(request, scope='bookmarks')
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    bookmarked_events = user.bookmarked_events.annotate(is_bookmarked=Value(True))
+
     # We can reuse the EventListSerializer as it contains the right info for a list
-    serializer = EventListSerializer(bookmarked_events, many=True)
-    return Response(serializer.data)
+    response = _event_list_response(request, bookmarked_events, ordering=('-created_at', '-id'))
+    return _with_validators(response, etag, last_modified)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def import_events(request):
+    """
+    Bulk-imports events from an uploaded CSV or JSON Lines `file` (admin only).
+    The events belong to the requesting admin. Optional fields: `format`
+    ("csv" or "jsonl", guessed from the file name otherwise) and `dry_run`.
+    Large files should go through the import_events management command.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"error": "Upload the events as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+    fmt = request.data.get('format') or detect_format(upload.name)
+    if fmt not in IMPORT_FORMATS:
+        return Response({"error": f"format must be one of: {', '.join(IMPORT_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
+    dry_run = str(request.data.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+
+    importer = EventImporter(request.user, dry_run=dry_run)
+    stats = importer.run(read_rows(upload.file, fmt))
+    return Response(stats, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def event_cache_stats(request):
+    """
+    Reports hit/miss counters of the event response cache (admin only).
+    """
+    return Response(response_cache.cache_stats())
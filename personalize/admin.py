@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Interest, Itinerary
+from .models import Interest, Itinerary, Spot
 
 admin.site.register(Interest)
 admin.site.register(Itinerary) # Also register Itinerary for easy viewing
+admin.site.register(Spot)
@@ -0,0 +1,49 @@
+"""
+A process-local snapshot of the interest catalogue.
+
+Interests change rarely but are read on every preference or recommendation
+request, and listed by the app at start-up. Each process keeps an immutable
+snapshot of the table: the id set used to validate preference ids, and the
+list endpoint's JSON already encoded, with its ETag. Checking that the
+snapshot is current costs one cache read of a version counter, which the
+Interest signals bump after every change.
+"""
+from dataclasses import dataclass
+
+from rest_framework.renderers import JSONRenderer
+
+from events.versioning import VersionCounter, VersionedSnapshot
+
+VERSION = VersionCounter('personalize:interests:version')
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    ids: frozenset
+    body: bytes  # The list endpoint's response, as InterestSerializer renders it.
+    etag: str
+
+
+def _build(version):
+    from .models import Interest
+    from .serializers import InterestSerializer
+
+    interests = list(Interest.objects.order_by('id'))
+    return Snapshot(
+        version=version,
+        ids=frozenset(interest.pk for interest in interests),
+        body=JSONRenderer().render(InterestSerializer(interests, many=True).data),
+        etag=f'"interests-{version}"',
+    )
+
+
+_snapshot = VersionedSnapshot(VERSION, _build)
+
+
+def get_snapshot():
+    return _snapshot.get()
+
+
+def invalidate():
+    VERSION.bump_on_commit()
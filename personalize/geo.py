@@ -0,0 +1,41 @@
+"""
+Great-circle distances, shared by every location feature.
+
+All of them use the haversine formula on a sphere of EARTH_RADIUS_KM, so a
+bounding box or grid search sized from a radius always agrees with the exact
+distance computed for its candidates. The functions work element-wise on NumPy
+arrays (with broadcasting) as well as on plain floats, in radians.
+"""
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_term(lat1, lon1, lat2, lon2, cos_lat1=None, cos_lat2=None):
+    """
+    The haversine of the central angle between the points ("a" in the usual
+    formula). Callers that keep cos(latitude) precomputed pass it in. Float32
+    arrays stay float32 as long as the other arguments are Python floats.
+    """
+    if cos_lat1 is None:
+        cos_lat1 = np.cos(lat1)
+    if cos_lat2 is None:
+        cos_lat2 = np.cos(lat2)
+    return np.sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * cos_lat2 * np.sin((lon2 - lon1) / 2) ** 2
+
+
+def term_to_km(a):
+    """Distance in km for a haversine term."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def km_to_term(radius_km):
+    """The largest haversine term within radius_km; comparing terms saves an arcsin per point."""
+    return math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi) / 2) ** 2
+
+
+def haversine_km(lat1, lon1, lat2, lon2, cos_lat1=None, cos_lat2=None):
+    """Great-circle distance in km between points given in radians."""
+    return term_to_km(haversine_term(lat1, lon1, lat2, lon2, cos_lat1, cos_lat2))
@@ -0,0 +1,218 @@
+"""
+Fills an itinerary with a day-by-day route of spots.
+
+1. The best spots of the destination city are picked: the ones matching the
+   most of the user's interests first. How many depends on the trip length
+   and on how many stops a day suit the trip type and budget.
+2. The spots are split into one geographic cluster per day (k-means with
+   capped cluster sizes, so no day gets all the stops).
+3. Each day's visiting order is a nearest-neighbour route improved with
+   2-opt, read from one distance matrix computed up front for all spots.
+4. Days and spots are written with two bulk_create calls, each day's spots
+   numbered in visiting order.
+"""
+import math
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Q, Value
+
+from .geo import EARTH_RADIUS_KM, haversine_km
+from .models import Day, Spot, TouristSpot
+from .spot_editing import POSITION_STEP
+
+DURATION_DAYS = {'3_DAYS': 3, '5_DAYS': 5, '1_WEEK': 7, '10_DAYS': 10, '2_WEEKS': 14}
+# Families and groups move slower than solo travellers; a bigger budget
+# (taxis instead of buses) fits one more stop into a day.
+STOPS_PER_DAY = {'SOLO': 5, 'COUPLE': 4, 'FAMILY': 3, 'GROUP': 3}
+BUDGET_EXTRA_STOPS = {'50-100': 0, '100-200': 0, '200-300': 1, '300-500+': 1}
+KMEANS_ITERATIONS = 20
+
+
+def trip_days(itinerary):
+    """The trip length from `duration`, but never more days than the dates cover."""
+    span = (itinerary.end_date - itinerary.start_date).days + 1
+    return max(1, min(DURATION_DAYS.get(itinerary.duration, span), span))
+
+
+def stops_per_day(itinerary):
+    return STOPS_PER_DAY.get(itinerary.trip_type, 4) + BUDGET_EXTRA_STOPS.get(itinerary.budget, 0)
+
+
+def candidate_spots(destination, interest_ids, limit):
+    """[(id, name, latitude, longitude), ...] of the destination, best matches first."""
+    city = destination.split(',')[0].strip()
+    spots = Spot.objects.filter(city__iexact=city)
+    if interest_ids:
+        spots = spots.annotate(matches=Count('tags', filter=Q(tags__in=interest_ids)))
+    else:
+        spots = spots.annotate(matches=Value(0))
+    return list(spots.order_by('-matches', 'id').values_list('id', 'name', 'latitude', 'longitude')[:limit])
+
+
+# --- Geometry ---
+def distance_matrix(latitudes, longitudes):
+    """Great-circle distances in km between every pair of points."""
+    lat, lon = np.radians(latitudes), np.radians(longitudes)
+    return haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+
+def _project(latitudes, longitudes):
+    """Local flat x/y in km; accurate enough for clustering within one city."""
+    lat0 = math.radians(float(np.mean(latitudes)))
+    return np.column_stack([
+        np.radians(longitudes) * EARTH_RADIUS_KM * math.cos(lat0),
+        np.radians(latitudes) * EARTH_RADIUS_KM,
+    ])
+
+
+def cluster(points, k, seed=0):
+    """
+    Splits points (n x 2) into k groups of at most ceil(n / k) points. Returns
+    one label per point.
+    """
+    n = len(points)
+    capacity = math.ceil(n / k)
+    rng = np.random.default_rng(seed)
+
+    # k-means++ seeding.
+    centers = [points[rng.integers(n)]]
+    for _ in range(1, k):
+        nearest = np.min(((points[:, None, :] - np.array(centers)[None, :, :]) ** 2).sum(axis=2), axis=1)
+        centers.append(points[rng.choice(n, p=nearest / nearest.sum())] if nearest.sum() else points[rng.integers(n)])
+    centers = np.array(centers)
+
+    labels = None
+    for _ in range(KMEANS_ITERATIONS):
+        distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        # Points with the most to lose from their second choice pick first.
+        ranked = np.sort(distances, axis=1)
+        regret = ranked[:, 1] - ranked[:, 0] if k > 1 else np.zeros(n)
+        new_labels = np.empty(n, dtype=np.int64)
+        room = np.full(k, capacity)
+        for point in np.argsort(-regret, kind='stable'):
+            for center in np.argsort(distances[point], kind='stable'):
+                if room[center]:
+                    new_labels[point] = center
+                    room[center] -= 1
+                    break
+        if labels is not None and np.array_equal(labels, new_labels):
+            break
+        labels = new_labels
+        for center in range(k):
+            members = points[labels == center]
+            if len(members):
+                centers[center] = members.mean(axis=0)
+    return labels
+
+
+def route_length(distances, order):
+    return float(sum(distances[a, b] for a, b in zip(order, order[1:])))
+
+
+def _nearest_neighbour(distances, start):
+    order, left = [start], set(range(len(distances))) - {start}
+    while left:
+        here = order[-1]
+        order.append(min(left, key=lambda stop: (distances[here, stop], stop)))
+        left.remove(order[-1])
+    return order
+
+
+def _two_opt(distances, order):
+    """Reverses segments of the open path while that makes it shorter."""
+    n = len(order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                before = distances[order[i - 1], order[i]] if i else 0.0
+                after = distances[order[j], order[j + 1]] if j + 1 < n else 0.0
+                new_before = distances[order[i - 1], order[j]] if i else 0.0
+                new_after = distances[order[i], order[j + 1]] if j + 1 < n else 0.0
+                if new_before + new_after < before + after - 1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    improved = True
+    return order
+
+
+def order_route(distances):
+    """Shortest open path found by nearest-neighbour from every start, then 2-opt."""
+    if len(distances) < 3:
+        return list(range(len(distances)))
+    best = min(
+        (_nearest_neighbour(distances, start) for start in range(len(distances))),
+        key=lambda order: route_length(distances, order),
+    )
+    return _two_opt(distances, best)
+
+
+def plan(latitudes, longitudes, days, seed=0):
+    """
+    Splits points into `days` routes. Returns (routes, distances): one list of
+    point indexes per day in visiting order, and the full distance matrix.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    distances = distance_matrix(latitudes, longitudes)
+    n = len(latitudes)
+    if not n:
+        return [[] for _ in range(days)], distances
+
+    k = min(days, n)
+    points = _project(latitudes, longitudes)
+    labels = cluster(points, k, seed=seed)
+    groups = [np.flatnonzero(labels == label) for label in range(k)]
+
+    # Visit the clusters in nearest-neighbour order too, starting from the one
+    # farthest out, so consecutive days are next to each other.
+    centers = np.array([points[group].mean(axis=0) for group in groups])
+    spread = np.linalg.norm(centers - points.mean(axis=0), axis=1)
+    center_distances = np.linalg.norm(centers[:, None, :] - centers[None, :, :], axis=2)
+    day_order = _nearest_neighbour(center_distances, int(np.argmax(spread)))
+
+    routes = []
+    for label in day_order:
+        group = groups[label]
+        routes.append([int(group[stop]) for stop in order_route(distances[np.ix_(group, group)])])
+    routes += [[] for _ in range(days - k)]
+    return routes, distances
+
+
+# --- Writing ---
+def generate_itinerary(itinerary, interest_ids=(), seed=None):
+    """
+    Replaces the days of `itinerary` with a generated schedule. Returns
+    (days, spots_by_day, total_km), or None when the destination has no spots.
+    """
+    days = trip_days(itinerary)
+    candidates = candidate_spots(itinerary.destination, list(interest_ids), days * stops_per_day(itinerary))
+    if not candidates:
+        return None
+
+    routes, distances = plan(
+        [spot[2] for spot in candidates], [spot[3] for spot in candidates], days,
+        seed=itinerary.pk if seed is None else seed,
+    )
+
+    with transaction.atomic():
+        itinerary.days.all().delete()
+        day_rows = Day.objects.bulk_create([
+            Day(itinerary=itinerary, day_number=number) for number in range(1, days + 1)
+        ])
+        spot_rows = TouristSpot.objects.bulk_create([
+            TouristSpot(
+                day=day, name=candidates[stop][1], location=f"{candidates[stop][2]:.6f}, {candidates[stop][3]:.6f}",
+                position=number * POSITION_STEP,
+            )
+            for day, route in zip(day_rows, routes)
+            for number, stop in enumerate(route, start=1)
+        ])
+
+    spots_by_day, position = [], 0
+    for route in routes:
+        spots_by_day.append(spot_rows[position:position + len(route)])
+        position += len(route)
+    total_km = sum(route_length(distances, route) for route in routes)
+    return day_rows, spots_by_day, total_km
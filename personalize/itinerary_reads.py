@@ -0,0 +1,44 @@
+"""
+The full itinerary tree (itinerary -> days -> spots) read with two values()
+queries and assembled as plain dicts.
+
+ItineraryReadSerializer produces the same JSON, but without prefetching it
+runs one query per day plus one for the planning progress, and builds a
+serializer field per value. This path skips both; its output must stay
+identical to the serializer's (benchmark_itinerary_reads checks this).
+"""
+from .models import Day, Itinerary
+from .serializers import days_left, planning_progress
+
+ITINERARY_FIELDS = ('id', 'destination', 'trip_type', 'budget', 'duration', 'start_date', 'end_date')
+
+
+def itinerary_tree(itinerary_id, user):
+    """Returns the itinerary as ItineraryReadSerializer would render it, or None if not the user's."""
+    rows = list(Itinerary.objects.filter(id=itinerary_id, user=user).values(*ITINERARY_FIELDS)[:1])
+    if not rows:
+        return None
+    itinerary = rows[0]
+    start_date, end_date = itinerary['start_date'], itinerary['end_date']
+
+    # One row per spot in visiting order, or a single row with NULL spot
+    # columns for an empty day.
+    days, current = [], None
+    spot_rows = (
+        Day.objects.filter(itinerary_id=itinerary_id)
+        .order_by('id', 'spots__position', 'spots__id')
+        .values_list('id', 'day_number', 'spots__id', 'spots__name', 'spots__location')
+    )
+    for day_id, day_number, spot_id, name, location in spot_rows:
+        if current is None or current['id'] != day_id:
+            current = {'id': day_id, 'day_number': day_number, 'spots': []}
+            days.append(current)
+        if spot_id is not None:
+            current['spots'].append({'id': spot_id, 'name': name, 'location': location})
+
+    itinerary['start_date'] = start_date.isoformat()
+    itinerary['end_date'] = end_date.isoformat()
+    itinerary['days'] = days
+    itinerary['days_left'] = days_left(start_date)
+    itinerary['planning_progress'] = planning_progress(start_date, end_date, sum(1 for day in days if day['spots']))
+    return itinerary
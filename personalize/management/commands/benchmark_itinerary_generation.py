@@ -0,0 +1,68 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import CustomUser
+from personalize.itinerary_generator import generate_itinerary, plan
+from personalize.models import Interest, Itinerary, Spot
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the generation of a 2-week itinerary over synthetic spots. "
+        "Everything is created in a transaction that is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spots', type=int, default=5000, help="Spots in the synthetic city.")
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _report(self, label, durations):
+        durations = sorted(durations)
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        self.stdout.write(f"{label}: min {durations[0]:.1f} ms, median {statistics.median(durations):.1f} ms, p95 {p95:.1f} ms")
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(username='itinerary-benchmark', email='itinerary-benchmark@example.com')
+            interests = Interest.objects.bulk_create([Interest(name=f"itinerary-benchmark-{i}") for i in range(20)])
+            user.preferences.set(interests[:4])
+
+            spots = Spot.objects.bulk_create([
+                Spot(name=f"Spot {i}", city='Benchmark', latitude=27.7 + rng.normal(0, 0.05), longitude=85.3 + rng.normal(0, 0.05))
+                for i in range(options['spots'])
+            ])
+            Through = Spot.tags.through
+            Through.objects.bulk_create([
+                Through(spot_id=spot.pk, interest_id=interests[tag].pk)
+                for spot in spots
+                for tag in rng.choice(len(interests), size=2, replace=False).tolist()
+            ])
+            itinerary = Itinerary.objects.create(
+                user=user, destination='Benchmark', trip_type='SOLO', budget='300-500+', duration='2_WEEKS',
+                start_date=date.today(), end_date=date.today() + timedelta(days=13),
+            )
+            interest_ids = list(user.preferences.values_list('id', flat=True))
+
+            planning, total, stops = [], [], 0
+            for run in range(options['runs']):
+                started = time.perf_counter()
+                days, spots_by_day, total_km = generate_itinerary(itinerary, interest_ids, seed=run)
+                total.append((time.perf_counter() - started) * 1000)
+                stops = sum(len(day_spots) for day_spots in spots_by_day)
+
+                latitudes, longitudes = rng.normal(27.7, 0.05, stops), rng.normal(85.3, 0.05, stops)
+                started = time.perf_counter()
+                plan(latitudes, longitudes, len(days), seed=run)
+                planning.append((time.perf_counter() - started) * 1000)
+
+            self.stdout.write(f"{len(days)} days, {stops} stops, picked from {options['spots']} spots")
+            self._report("Clustering and routing", planning)
+            self._report("Whole generation (queries and writes included)", total)
+            transaction.set_rollback(True)
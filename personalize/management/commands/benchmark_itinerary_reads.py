@@ -0,0 +1,68 @@
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import CustomUser
+from personalize.itinerary_reads import itinerary_tree
+from personalize.models import Day, Itinerary, TouristSpot
+from personalize.serializers import ItineraryReadSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares ItineraryReadSerializer with the compact itinerary_tree() read path on a "
+        "synthetic itinerary. Everything is created in a transaction that is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=14)
+        parser.add_argument('--spots-per-day', type=int, default=6)
+        parser.add_argument('--runs', type=int, default=200)
+
+    def _measure(self, label, read):
+        with CaptureQueriesContext(connection) as queries:
+            body = JSONRenderer().render(read())
+        durations = []
+        for _ in range(self.runs):
+            started = time.perf_counter()
+            JSONRenderer().render(read())
+            durations.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"{label}: {len(queries.captured_queries)} queries, "
+            f"median {statistics.median(durations):.2f} ms, min {min(durations):.2f} ms"
+        )
+        return body, statistics.median(durations)
+
+    def handle(self, *args, **options):
+        self.runs = options['runs']
+        with transaction.atomic():
+            user = CustomUser.objects.create_user(username='itinerary-read-benchmark', email='itinerary-read-benchmark@example.com')
+            itinerary = Itinerary.objects.create(
+                user=user, destination='Benchmark', start_date=date.today() + timedelta(days=30),
+                end_date=date.today() + timedelta(days=30 + options['days'] - 1),
+            )
+            days = Day.objects.bulk_create([
+                Day(itinerary=itinerary, day_number=number) for number in range(1, options['days'] + 1)
+            ])
+            TouristSpot.objects.bulk_create([
+                TouristSpot(day=day, name=f"Spot {day.day_number}.{stop}", location=f"Street {stop}")
+                for day in days
+                for stop in range(options['spots_per_day'])
+            ])
+
+            serialized, serializer_ms = self._measure(
+                "ItineraryReadSerializer", lambda: ItineraryReadSerializer(Itinerary.objects.get(id=itinerary.id, user=user)).data
+            )
+            compact, compact_ms = self._measure("itinerary_tree", lambda: itinerary_tree(itinerary.id, user))
+            transaction.set_rollback(True)
+
+        if serialized != compact:
+            raise CommandError("The two read paths rendered different JSON.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Identical output ({len(compact)} bytes); the compact path is {serializer_ms / compact_ms:.1f}x faster."
+        ))
@@ -0,0 +1,59 @@
+import statistics
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from personalize.recommender import MINUTES_PER_DAY, TIMING_WINDOWS, SpotMatrix
+
+
+class Command(BaseCommand):
+    help = "Times SpotMatrix.recommend() on synthetic spots (nothing is read from or written to the database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spots', type=int, default=1_000_000)
+        parser.add_argument('--tags', type=int, default=40, help="Number of distinct interests.")
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--radius', type=float, default=10, help="Search radius in km.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        count, tag_count = options['spots'], options['tags']
+
+        # Spots scattered around a city-sized area (~60 km across), with one to
+        # three tags each and a mix of day, evening, overnight and all-day hours.
+        ids = np.arange(1, count + 1)
+        latitudes = 27.7 + rng.normal(0, 0.15, count)
+        longitudes = 85.3 + rng.normal(0, 0.15, count)
+        opens = rng.integers(0, 20, count) * 60
+        closes = (opens + rng.integers(2, 14, count) * 60) % MINUTES_PER_DAY
+        always = rng.random(count) < 0.2
+        opens[always], closes[always] = 0, MINUTES_PER_DAY
+        spot_ids = np.repeat(ids, rng.integers(1, 4, count))
+        tag_pairs = np.column_stack([spot_ids, rng.integers(1, tag_count + 1, len(spot_ids))])
+
+        started = time.perf_counter()
+        matrix = SpotMatrix()
+        matrix.load_arrays(ids, latitudes, longitudes, opens, closes, tag_pairs)
+        self.stdout.write(f"Loaded {count} spots in {time.perf_counter() - started:.2f}s")
+
+        timings = list(TIMING_WINDOWS)
+        durations, found = [], 0
+        for _ in range(options['queries']):
+            tag_ids = rng.choice(np.arange(1, tag_count + 1), size=3, replace=False).tolist()
+            started = time.perf_counter()
+            result = matrix.recommend(
+                27.7 + rng.normal(0, 0.1), 85.3 + rng.normal(0, 0.1), options['radius'],
+                tag_ids=tag_ids, timing=timings[rng.integers(len(timings))], k=20,
+            )
+            durations.append((time.perf_counter() - started) * 1000)
+            found += len(result)
+
+        durations.sort()
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['queries']} queries over {count} spots: "
+            f"min {durations[0]:.1f} ms, median {statistics.median(durations):.1f} ms, p95 {p95:.1f} ms "
+            f"({found / len(durations):.1f} results per query)"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personalize', '0006_spot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spot',
+            name='city',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+    ]
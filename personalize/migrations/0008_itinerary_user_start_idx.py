@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personalize', '0007_spot_city'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='itinerary',
+            index=models.Index(fields=['user', '-start_date', '-id'], name='itinerary_user_start_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-17 06:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def number_existing_spots(apps, schema_editor):
+    # Spots were shown in id order; spaced-out positions keep that order.
+    TouristSpot = apps.get_model('personalize', 'TouristSpot')
+    TouristSpot.objects.update(position=F('id') * 1024.0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personalize', '0008_itinerary_user_start_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='touristspot',
+            options={'ordering': ['position', 'id']},
+        ),
+        migrations.AddField(
+            model_name='touristspot',
+            name='position',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='touristspot',
+            index=models.Index(fields=['day', 'position'], name='touristspot_day_position_idx'),
+        ),
+        migrations.RunPython(number_existing_spots, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from . import catalogue, recommender, spatial
 
 class Interest(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -29,6 +32,12 @@ class Itinerary(models.Model):
     # from django.utils import timezone
     start_date = models.DateField() # <-- Django will ask about this too.
     end_date = models.DateField()   # <-- And this.
+
+    class Meta:
+        indexes = [
+            # Backs the keyset-paginated "my itineraries" list.
+            models.Index(fields=['user', '-start_date', '-id'], name='itinerary_user_start_idx'),
+        ]
     
 class Day(models.Model):
     itinerary = models.ForeignKey(Itinerary, on_delete=models.CASCADE, related_name="days")
@@ -42,6 +51,59 @@ class TouristSpot(models.Model):
     day = models.ForeignKey(Day, on_delete=models.CASCADE, related_name="spots")
     name = models.CharField(max_length=255)
     location = models.CharField(max_length=255)
+    # Sparse ordering key within the day: an insert or move takes a value
+    # between its neighbours, so no other row has to be renumbered.
+    position = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['position', 'id']
+        indexes = [models.Index(fields=['day', 'position'], name='touristspot_day_position_idx')]
+
+    def __str__(self):
+        return f"{self.name} ({self.location}) on {self.day}"
+
+
+class Spot(models.Model):
+    """A place that can be recommended to a user (see recommender.py)."""
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    city = models.CharField(max_length=100, blank=True, db_index=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    tags = models.ManyToManyField(Interest, blank=True, related_name='spots')
+    # Daily opening window; both empty means open all day. A window that
+    # closes before it opens runs past midnight.
+    opens_at = models.TimeField(null=True, blank=True)
+    closes_at = models.TimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.name} ({self.location}) on {self.day}"
\ No newline at end of file
+        return self.name
+
+
+# --- Keep the in-memory recommendation matrix and spatial index in step ---
+@receiver([post_save, post_delete], sender=Spot)
+def refresh_spot_matrix(sender, instance, **kwargs):
+    recommender.schedule_refresh([instance.pk])
+
+@receiver([post_save, post_delete], sender=Spot)
+def invalidate_spatial_index(sender, instance, **kwargs):
+    spatial.invalidate()
+
+@receiver(m2m_changed, sender=Spot.tags.through)
+def refresh_spot_matrix_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        recommender.schedule_refresh([instance.pk])
+    elif action == 'post_clear':
+        recommender.invalidate()  # An interest lost all its spots; their ids are gone by now.
+    else:
+        recommender.schedule_refresh(pk_set or ())
+
+
+# --- Keep the interest catalogue snapshot in step ---
+@receiver([post_save, post_delete], sender=Interest)
+def invalidate_interest_catalogue(sender, **kwargs):
+    catalogue.invalidate()
@@ -0,0 +1,243 @@
+"""
+Spot recommendations scored with NumPy.
+
+SpotMatrix holds every spot as one row of a few flat arrays: coordinates in
+radians (plus the cosine of the latitude), a bitmask of its tags (one bit per
+Interest, in as many 64-bit words as needed) and its opening window in
+minutes since midnight. A recommendation is then one vectorized pass over the
+arrays - haversine distance, tag match and opening-time overlap - followed by
+np.argpartition for the k nearest matches, instead of a Python loop per spot.
+
+Each process keeps its own matrix. Saving or deleting a spot rewrites just
+that row; a version counter in the shared cache tells other processes that
+they missed a change, and they rebuild from the database on their next query.
+"""
+import math
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+
+from events.versioning import VersionCounter, VersionedIndex
+from .geo import haversine_term, km_to_term, term_to_km
+
+MINUTES_PER_DAY = 24 * 60
+VERSION = VersionCounter('personalize:spot_matrix:version')
+
+# Timing filter of the recommendation request -> (start, end) in minutes.
+TIMING_WINDOWS = {
+    'ALL_DAY': None,
+    'MORNING': (6 * 60, 12 * 60),
+    'AFTERNOON': (12 * 60, 18 * 60),
+    'EVENING': (18 * 60, MINUTES_PER_DAY),
+}
+
+
+def _minutes(value, default):
+    return default if value is None else value.hour * 60 + value.minute
+
+
+def _load(spot_ids=None):
+    """Returns ([(id, latitude, longitude, opens_at, closes_at), ...], [(spot_id, tag_id), ...])."""
+    from .models import Spot
+
+    spots = Spot.objects.all()
+    if spot_ids is not None:
+        spots = spots.filter(pk__in=spot_ids)
+    rows = list(spots.values_list('id', 'latitude', 'longitude', 'opens_at', 'closes_at'))
+    links = Spot.tags.through.objects.filter(spot_id__in=spots.values('id')).values_list('spot_id', 'interest_id')
+    return rows, list(links)
+
+
+class SpotMatrix(VersionedIndex):
+    """Spot data as column arrays, one row per spot; `rows` maps spot ids to rows."""
+    counter = VERSION
+
+    def __init__(self, capacity=1024):
+        super().__init__()
+        self.rows = {}          # spot id -> row
+        self.tag_bits = {}      # interest id -> bit number
+        self.size = 0
+        self._allocate(capacity, words=1)
+
+    def _allocate(self, capacity, words):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.lat = np.zeros(capacity, dtype=np.float32)
+        self.lon = np.zeros(capacity, dtype=np.float32)
+        self.cos_lat = np.zeros(capacity, dtype=np.float32)
+        self.opens = np.zeros(capacity, dtype=np.int16)
+        self.closes = np.zeros(capacity, dtype=np.int16)
+        self.tags = np.zeros((capacity, words), dtype=np.uint64)
+
+    def _grow(self, capacity=None, words=None):
+        capacity = capacity or len(self.ids)
+        words = words or self.tags.shape[1]
+        old = {name: getattr(self, name) for name in ('ids', 'alive', 'lat', 'lon', 'cos_lat', 'opens', 'closes', 'tags')}
+        self._allocate(capacity, words)
+        for name, array in old.items():
+            if name == 'tags':
+                self.tags[:len(array), :array.shape[1]] = array
+            else:
+                getattr(self, name)[:len(array)] = array
+
+    def _tag_mask(self, tag_ids, assign=False):
+        """Bitmask (one uint64 per word) of the given interest ids."""
+        if assign:
+            for tag_id in tag_ids:
+                if tag_id not in self.tag_bits:
+                    self.tag_bits[tag_id] = len(self.tag_bits)
+            words_needed = max(1, -(-len(self.tag_bits) // 64))
+            if words_needed > self.tags.shape[1]:
+                self._grow(words=words_needed)
+        mask = np.zeros(self.tags.shape[1], dtype=np.uint64)
+        for tag_id in tag_ids:
+            bit = self.tag_bits.get(tag_id)
+            if bit is not None:
+                mask[bit // 64] |= np.uint64(1 << (bit % 64))
+        return mask
+
+    # --- Loading ---
+    def put(self, spot_id, latitude, longitude, opens_at, closes_at, tag_ids):
+        """Inserts or overwrites one spot."""
+        row = self.rows.get(spot_id)
+        if row is None:
+            if self.size == len(self.ids):
+                self._grow(capacity=2 * len(self.ids))
+            row = self.rows[spot_id] = self.size
+            self.size += 1
+        lat = np.radians(latitude)
+        self.ids[row] = spot_id
+        self.alive[row] = True
+        self.lat[row] = lat
+        self.lon[row] = np.radians(longitude)
+        self.cos_lat[row] = np.cos(lat)
+        self.opens[row] = _minutes(opens_at, 0)
+        self.closes[row] = _minutes(closes_at, MINUTES_PER_DAY)
+        self.tags[row] = self._tag_mask(tag_ids, assign=True)
+
+    def remove(self, spot_id):
+        row = self.rows.pop(spot_id, None)
+        if row is not None:
+            self.alive[row] = False
+            # Dead rows are still scanned by every query; drop them once they
+            # make up half of the matrix.
+            if self.size - len(self.rows) > max(self.size // 2, 64):
+                self._compact()
+
+    def _compact(self):
+        live = np.flatnonzero(self.alive[:self.size])
+        for name in ('ids', 'alive', 'lat', 'lon', 'cos_lat', 'opens', 'closes', 'tags'):
+            array = getattr(self, name)
+            array[:len(live)] = array[live]
+            array[len(live):self.size] = 0
+        self.size = len(live)
+        self.rows = dict(zip(self.ids[:self.size].tolist(), range(self.size)))
+
+    def load_arrays(self, ids, latitudes, longitudes, opens, closes, tag_pairs=()):
+        """
+        Bulk-loads spots from arrays (degrees, minutes since midnight) and
+        (spot id, interest id) pairs, replacing the current contents.
+        """
+        count = len(ids)
+        self.rows, self.tag_bits, self.size = {}, {}, count
+        tag_pairs = np.asarray(tag_pairs, dtype=np.int64).reshape(-1, 2)
+        for tag_id in np.unique(tag_pairs[:, 1]).tolist():
+            self.tag_bits[tag_id] = len(self.tag_bits)
+        self._allocate(max(count, 1024), words=max(1, -(-len(self.tag_bits) // 64)))
+
+        self.ids[:count] = ids
+        self.alive[:count] = True
+        self.lat[:count] = np.radians(latitudes)
+        self.lon[:count] = np.radians(longitudes)
+        self.cos_lat[:count] = np.cos(self.lat[:count])
+        self.opens[:count] = opens
+        self.closes[:count] = closes
+        self.rows = dict(zip(np.asarray(ids).tolist(), range(count)))
+
+        if len(tag_pairs):
+            rows = np.fromiter((self.rows[spot_id] for spot_id in tag_pairs[:, 0].tolist()), dtype=np.int64, count=len(tag_pairs))
+            bits = np.array([self.tag_bits[tag_id] for tag_id in tag_pairs[:, 1].tolist()], dtype=np.int64)
+            np.bitwise_or.at(self.tags, (rows, bits // 64), np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64)))
+
+    # --- Kept in step by VersionedIndex ---
+    def _load(self, spot_ids=None):
+        return _load(spot_ids)
+
+    def _replace(self, data):
+        rows, links = data
+        self.load_arrays(
+            [row[0] for row in rows],
+            [row[1] for row in rows],
+            [row[2] for row in rows],
+            [_minutes(row[3], 0) for row in rows],
+            [_minutes(row[4], MINUTES_PER_DAY) for row in rows],
+            links,
+        )
+
+    def _update(self, spot_ids, data):
+        rows, links = data
+        tags_of = defaultdict(list)
+        for spot_id, tag_id in links:
+            tags_of[spot_id].append(tag_id)
+        # Spots still in the database are overwritten in their own row.
+        for spot_id in set(spot_ids) - {row[0] for row in rows}:
+            self.remove(spot_id)
+        for spot_id, latitude, longitude, opens_at, closes_at in rows:
+            self.put(spot_id, latitude, longitude, opens_at, closes_at, tags_of[spot_id])
+
+    # --- Querying ---
+    def recommend(self, latitude, longitude, radius_km, tag_ids=None, timing='ALL_DAY', k=20):
+        """
+        Returns [(spot_id, distance_km), ...] for the k nearest spots within
+        radius_km that have any of tag_ids (all spots when not given) and are
+        open during the timing window.
+        """
+        with self._lock:
+            n = self.size
+            lat0, lon0 = math.radians(latitude), math.radians(longitude)
+
+            # Haversine, on float32 to halve the memory traffic.
+            a = haversine_term(lat0, lon0, self.lat[:n], self.lon[:n], math.cos(lat0), self.cos_lat[:n])
+            keep = self.alive[:n] & (a <= np.float32(km_to_term(radius_km)))
+
+            if tag_ids:
+                mask = self._tag_mask(tag_ids)
+                if not mask.any():
+                    return []
+                keep &= (self.tags[:n] & mask).any(axis=1)
+
+            window = TIMING_WINDOWS.get(timing)
+            if window is not None:
+                start, end = window
+                opens, closes = self.opens[:n], self.closes[:n]
+                same_day = (opens < end) & (closes > start)
+                overnight = (opens < end) | (closes > start)
+                keep &= np.where(closes > opens, same_day, overnight)
+
+            rows = np.flatnonzero(keep)
+            if len(rows) > k:
+                rows = rows[np.argpartition(a[rows], k)[:k]]
+            rows = rows[np.argsort(a[rows], kind='stable')]
+            distances = term_to_km(a[rows].astype(np.float64))
+            return list(zip(self.ids[rows].tolist(), distances.tolist()))
+
+
+_matrix = SpotMatrix()
+
+
+def get_matrix():
+    _matrix.ensure_fresh()
+    return _matrix
+
+
+def schedule_refresh(spot_ids):
+    """Refreshes the given spots in the matrix once the current transaction commits."""
+    spot_ids = list(spot_ids)
+    if spot_ids:
+        transaction.on_commit(lambda: _matrix.refresh(spot_ids))
+
+
+def invalidate():
+    """For changes too broad to refresh spot by spot (e.g. a deleted interest)."""
+    VERSION.bump_on_commit()
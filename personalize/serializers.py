@@ -1,7 +1,7 @@
 from rest_framework import serializers
-from .models import Interest, Itinerary, TouristSpot, Day
+from .models import Interest, Itinerary, TouristSpot, Day, Spot
+from . import catalogue
 from django.utils import timezone
-from datetime import date
 
 class InterestSerializer(serializers.ModelSerializer):
     """Serializer for listing available interests."""
@@ -9,12 +9,28 @@ class InterestSerializer(serializers.ModelSerializer):
         model = Interest
         fields = ['id', 'name']
 
+class InterestIdsField(serializers.ListField):
+    """
+    A list of interest ids, checked against the catalogue snapshot instead of
+    a database query. Duplicates are dropped; the ids keep their order.
+    """
+    child = serializers.IntegerField()
+    default_error_messages = {
+        'does_not_exist': 'Invalid pk "{pk_value}" - object does not exist.',
+    }
+
+    def to_internal_value(self, data):
+        ids = list(dict.fromkeys(super().to_internal_value(data)))
+        known = catalogue.get_snapshot().ids
+        for pk in ids:
+            if pk not in known:
+                self.fail('does_not_exist', pk_value=pk)
+        return ids
+
+
 class UserPreferenceSerializer(serializers.Serializer):
     """Serializer for creating/updating a user's preference list."""
-    preferences = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Interest.objects.all()
-    )
+    preferences = InterestIdsField()
 
     def validate_preferences(self, value):
         if not value:
@@ -38,7 +54,9 @@ class ItineraryCreateSerializer(serializers.ModelSerializer):
 class TouristSpotSerializer(serializers.ModelSerializer):
     class Meta:
         model = TouristSpot
-        fields = ['id', 'day', 'name', 'location']
+        fields = ['id', 'day', 'name', 'location', 'position']
+        # Both are set by add_tourist_spot: the day from the URL, the position at the end of it.
+        read_only_fields = ['day', 'position']
         
 class TouristSpotReadSerializer(serializers.ModelSerializer):
     class Meta:
@@ -54,6 +72,23 @@ class DayReadSerializer(serializers.ModelSerializer):
         fields = ['id', 'day_number', 'spots']
 
 
+def days_left(start_date):
+    # The same "today" as the annotated list in personalize.views.my_itineraries.
+    today = timezone.localdate()
+    if start_date > today:
+        delta = start_date - today
+        return delta.days
+    return None # Return None or 0 if the trip is in progress or over
+
+
+def planning_progress(start_date, end_date, days_with_spots):
+    """Percentage of the trip's days that have at least one spot."""
+    total_days = (end_date - start_date).days + 1
+    if total_days > 0:
+        return int(days_with_spots / total_days * 100)
+    return 0
+
+
 class ItineraryReadSerializer(serializers.ModelSerializer):
     days = DayReadSerializer(many=True, read_only=True)
     days_left = serializers.SerializerMethodField()
@@ -72,26 +107,83 @@ class ItineraryReadSerializer(serializers.ModelSerializer):
         Calculates the number of days until the trip starts.
         Returns None if the trip has already started or passed.
         """
-        today = date.today()
-        if obj.start_date > today:
-            delta = obj.start_date - today
-            return delta.days
-        return None # Return None or 0 if the trip is in progress or over
+        return days_left(obj.start_date)
     
     def get_planning_progress(self, obj):
         """
         Calculates the planning progress of the itinerary.
         This is a simplified example. You can make this logic as complex as you need.
         """
-        # Example logic: Assume 100% complete if it has at least one activity per day.
-        total_days = (obj.end_date - obj.start_date).days + 1
-        days_with_activities = obj.days.filter(activities__isnull=False).distinct().count()
-
-        if total_days > 0:
-            progress = (days_with_activities / total_days) * 100
-            return int(progress)
-        return 0
+        # Example logic: Assume 100% complete if it has at least one spot per day.
+        days_with_spots = getattr(obj, 'days_with_spots', None)
+        if days_with_spots is None:
+            days_with_spots = obj.days.filter(spots__isnull=False).distinct().count()
+        return planning_progress(obj.start_date, obj.end_date, days_with_spots)
     
+class ItineraryListSerializer(serializers.ModelSerializer):
+    """
+    One row of the "my itineraries" list. Reads the counts annotated by
+    personalize.views.my_itineraries instead of querying per itinerary.
+    """
+    days_with_spots = serializers.IntegerField(read_only=True)
+    total_spots = serializers.IntegerField(read_only=True)
+    days_left = serializers.SerializerMethodField()
+    planning_progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Itinerary
+        fields = [
+            'id', 'destination', 'trip_type', 'budget',
+            'duration', 'start_date', 'end_date',
+            'days_with_spots', 'total_spots', 'days_left', 'planning_progress'
+        ]
+
+    def get_days_left(self, obj):
+        # `until_start` is start_date minus today; None once the trip has started.
+        return obj.until_start.days if obj.until_start.days > 0 else None
+
+    def get_planning_progress(self, obj):
+        return planning_progress(obj.start_date, obj.end_date, obj.days_with_spots)
+
+class SpotEditOperationSerializer(serializers.Serializer):
+    """
+    One operation of a batch spot edit:
+    - add:    `day`, `name`, `location`
+    - remove: `spot`
+    - move:   `spot`, plus `day` to move it to another day
+    `after` (add and move) is the spot to place it after, null for the start
+    of the day; without it the spot goes to the end.
+    """
+    op = serializers.ChoiceField(choices=['add', 'remove', 'move'])
+    spot = serializers.IntegerField(required=False)
+    day = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=255, required=False)
+    location = serializers.CharField(max_length=255, required=False)
+    after = serializers.IntegerField(required=False, allow_null=True)
+
+    REQUIRED = {'add': ('day', 'name', 'location'), 'remove': ('spot',), 'move': ('spot',)}
+
+    def validate(self, data):
+        missing = [field for field in self.REQUIRED[data['op']] if field not in data]
+        if missing:
+            raise serializers.ValidationError(f"'{data['op']}' requires: {', '.join(missing)}.")
+        return data
+
+
+class SpotEditSerializer(serializers.Serializer):
+    MAX_OPERATIONS = 500
+
+    operations = SpotEditOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, value):
+        if len(value) > self.MAX_OPERATIONS:
+            raise serializers.ValidationError(f"At most {self.MAX_OPERATIONS} operations per request.")
+        return value
+
+class GenerateItinerarySerializer(serializers.Serializer):
+    # Must be set to overwrite days that already have spots.
+    replace = serializers.BooleanField(default=False)
+
 class RecommendationRequestSerializer(serializers.Serializer):
     """
     Validates the data for a "What's Happening" recommendation request.
@@ -102,9 +194,7 @@ class RecommendationRequestSerializer(serializers.Serializer):
     longitude = serializers.DecimalField(max_digits=10, decimal_places=6, required=True)
 
     # --- User's Filters ---
-    preferences = serializers.PrimaryKeyRelatedField(
-        many=True,
-        queryset=Interest.objects.all(),
+    preferences = InterestIdsField(
         required=False # Allow requests with no specific preference
     )
     timing = serializers.ChoiceField(
@@ -114,4 +204,28 @@ class RecommendationRequestSerializer(serializers.Serializer):
     distance = serializers.ChoiceField(
         choices=[2, 5, 10], # Kilometers
         default=5
-    )
\ No newline at end of file
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class NearbySpotsQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the nearby-spots lookup. With `distance`, every spot
+    within that many km (up to `limit`); without it, the `limit` nearest spots.
+    """
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    distance = serializers.ChoiceField(choices=[2, 5, 10], required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class SpotSerializer(serializers.ModelSerializer):
+    """A recommended spot; `distance_km` is set on the instance by the view."""
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Spot
+        fields = [
+            'id', 'name', 'description', 'city', 'latitude', 'longitude',
+            'tags', 'opens_at', 'closes_at', 'distance_km'
+        ]
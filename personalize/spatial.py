@@ -0,0 +1,139 @@
+"""
+A grid index over spot coordinates, for "within N km" and "k nearest" lookups.
+
+The globe is cut into square cells of CELL_DEGREES; the spots are sorted by
+cell, so the spots of a run of neighbouring cells in one grid row form one
+contiguous slice found with np.searchsorted. A query only computes exact
+distances for the spots of the cells its radius touches.
+
+An index is immutable once built (its arrays are read-only), so all threads
+of a worker share it without locking. Writes do not touch it: they bump a
+version counter in the shared cache, and the next query in any process sees
+the new version and builds a fresh index to swap in.
+"""
+import math
+
+import numpy as np
+
+from events.versioning import VersionCounter, VersionedSnapshot
+from .geo import EARTH_RADIUS_KM, haversine_km
+
+VERSION = VersionCounter('personalize:spot_index:version')
+# ~5.5 km at the equator: a 2 km radius touches at most 4 cells, 10 km at most 16.
+CELL_DEGREES = 0.05
+ROWS = math.ceil(180 / CELL_DEGREES)
+COLUMNS = math.ceil(360 / CELL_DEGREES)
+
+
+def _cells(latitudes, longitudes):
+    rows = np.clip(((np.asarray(latitudes) + 90) // CELL_DEGREES).astype(np.int64), 0, ROWS - 1)
+    columns = ((np.asarray(longitudes) + 180) // CELL_DEGREES).astype(np.int64) % COLUMNS
+    return rows * COLUMNS + columns
+
+
+def _column_ranges(longitude, degrees):
+    """(first, last) column ranges covering longitude +- degrees, split at the antimeridian."""
+    if degrees >= 180:
+        return [(0, COLUMNS - 1)]
+    first = math.floor((longitude - degrees + 180) / CELL_DEGREES)
+    last = math.floor((longitude + degrees + 180) / CELL_DEGREES)
+    if last - first + 1 >= COLUMNS:
+        return [(0, COLUMNS - 1)]
+    if first < 0:
+        return [(first + COLUMNS, COLUMNS - 1), (0, last)]
+    if last >= COLUMNS:
+        return [(first, COLUMNS - 1), (0, last - COLUMNS)]
+    return [(first, last)]
+
+
+class SpatialIndex:
+    def __init__(self, ids, latitudes, longitudes, version=None):
+        cells = _cells(latitudes, longitudes)
+        order = np.argsort(cells, kind='stable')
+        self.version = version
+        self.cells = cells[order]
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.lat = np.radians(np.asarray(latitudes, dtype=np.float64))[order]
+        self.lon = np.radians(np.asarray(longitudes, dtype=np.float64))[order]
+        self.cos_lat = np.cos(self.lat)
+        for array in (self.cells, self.ids, self.lat, self.lon, self.cos_lat):
+            array.flags.writeable = False
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _candidates(self, latitude, longitude, radius_km):
+        """Positions of the spots in the cells a circle of radius_km touches."""
+        degrees = math.degrees(radius_km / EARTH_RADIUS_KM)
+        first_row = max(0, math.floor((latitude - degrees + 90) / CELL_DEGREES))
+        last_row = min(ROWS - 1, math.floor((latitude + degrees + 90) / CELL_DEGREES))
+        # Longitude span of the circle at its widest point (all of it near a pole).
+        widest = math.cos(math.radians(min(90.0, max(abs(latitude - degrees), abs(latitude + degrees)))))
+        ratio = math.sin(radius_km / EARTH_RADIUS_KM) / widest if widest > 1e-12 else 2
+        lon_degrees = math.degrees(math.asin(ratio)) if ratio < 1 and radius_km < EARTH_RADIUS_KM * math.pi / 2 else 180
+        ranges = _column_ranges(longitude, lon_degrees)
+
+        bounds = np.array([
+            (row * COLUMNS + first, row * COLUMNS + last + 1)
+            for row in range(first_row, last_row + 1)
+            for first, last in ranges
+        ], dtype=np.int64).reshape(-1, 2)
+        starts = np.searchsorted(self.cells, bounds[:, 0])
+        ends = np.searchsorted(self.cells, bounds[:, 1])
+        slices = [np.arange(start, end) for start, end in zip(starts.tolist(), ends.tolist()) if end > start]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def _distances(self, positions, latitude, longitude):
+        lat0, lon0 = math.radians(latitude), math.radians(longitude)
+        return haversine_km(lat0, lon0, self.lat[positions], self.lon[positions], math.cos(lat0), self.cos_lat[positions])
+
+    def _nearest_first(self, positions, distances, limit):
+        if limit is not None and len(positions) > limit:
+            keep = np.argpartition(distances, limit)[:limit]
+            positions, distances = positions[keep], distances[keep]
+        order = np.lexsort((self.ids[positions], distances))
+        return list(zip(self.ids[positions[order]].tolist(), distances[order].tolist()))
+
+    def within(self, latitude, longitude, radius_km, limit=None):
+        """[(spot_id, distance_km), ...] of the spots within radius_km, nearest first."""
+        positions = self._candidates(latitude, longitude, radius_km)
+        distances = self._distances(positions, latitude, longitude)
+        inside = distances <= radius_km
+        return self._nearest_first(positions[inside], distances[inside], limit)
+
+    def nearest(self, latitude, longitude, k):
+        """[(spot_id, distance_km), ...] of the k nearest spots, nearest first."""
+        k = min(k, len(self))
+        radius_km = CELL_DEGREES * 111.0
+        while k:
+            # Every spot within the radius is a candidate, so once k of them
+            # are found the k nearest overall are among them.
+            positions = self._candidates(latitude, longitude, radius_km)
+            distances = self._distances(positions, latitude, longitude)
+            inside = distances <= radius_km
+            if inside.sum() >= k or radius_km >= EARTH_RADIUS_KM * math.pi:
+                return self._nearest_first(positions[inside], distances[inside], k)
+            radius_km *= 2
+        return []
+
+
+def _build(version):
+    from .models import Spot
+
+    rows = list(Spot.objects.values_list('id', 'latitude', 'longitude'))
+    return SpatialIndex(
+        [row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows], version=version
+    )
+
+
+_index = VersionedSnapshot(VERSION, _build)
+
+
+def get_index():
+    """The current index; built on the first query after a write, by one thread."""
+    return _index.get()
+
+
+def invalidate():
+    """Marks every process's index stale once the current transaction commits."""
+    VERSION.bump_on_commit()
@@ -0,0 +1,134 @@
+"""
+Batch edits of the spots of an itinerary: adds, removes and moves (a move
+within the same day is a reorder), applied in one transaction.
+
+Spots are ordered within a day by TouristSpot.position, a sparse float key.
+A spot placed between two others takes the midpoint of their positions, so
+a move writes that one row. Only when repeated inserts at the same place
+have used up the gap is the whole day renumbered.
+
+The batch is worked out in memory first, then written with at most one
+DELETE, one bulk_create and one bulk_update.
+"""
+from django.db import transaction
+from django.db.models import Max
+
+from .models import TouristSpot
+
+POSITION_STEP = 1024.0
+MIN_GAP = 1e-6
+
+
+class SpotEditError(Exception):
+    """An operation refers to a spot or day that is not part of the itinerary."""
+
+    def __init__(self, index, message):
+        super().__init__(message)
+        self.index = index
+
+
+def next_position(day):
+    """Position that puts a new spot at the end of the day."""
+    last = day.spots.aggregate(last=Max('position'))['last']
+    return POSITION_STEP if last is None else last + POSITION_STEP
+
+
+class _Batch:
+    def __init__(self, itinerary):
+        self.days = {day.id: day for day in itinerary.days.all()}
+        self.order = {day_id: [] for day_id in self.days}
+        self.spots = {}
+        for spot in TouristSpot.objects.filter(day__itinerary=itinerary).order_by('position', 'id'):
+            self.spots[spot.id] = spot
+            self.order[spot.day_id].append(spot)
+        self.created, self.changed, self.removed = [], {}, []
+
+    def _day(self, index, day_id):
+        if day_id not in self.days:
+            raise SpotEditError(index, f"Day {day_id} is not part of this itinerary.")
+        return day_id
+
+    def _spot(self, index, spot_id):
+        if spot_id not in self.spots:
+            raise SpotEditError(index, f"Spot {spot_id} is not part of this itinerary.")
+        return self.spots[spot_id]
+
+    def _place(self, index, spot, day_id, after):
+        """Inserts spot into the day's order: after spot `after`, first if None, last if missing."""
+        order = self.order[day_id]
+        if after is ...:
+            slot = len(order)
+        elif after is None:
+            slot = 0
+        else:
+            anchor = self._spot(index, after)
+            if anchor.day_id != day_id or anchor is spot:
+                raise SpotEditError(index, f"Spot {after} is not another spot of day {day_id}.")
+            slot = order.index(anchor) + 1
+        order.insert(slot, spot)
+        spot.day_id = day_id
+
+        before = order[slot - 1].position if slot > 0 else None
+        following = order[slot + 1].position if slot + 1 < len(order) else None
+        if before is None and following is None:
+            spot.position = POSITION_STEP
+        elif before is None:
+            spot.position = following - POSITION_STEP
+        elif following is None:
+            spot.position = before + POSITION_STEP
+        elif following - before > MIN_GAP:
+            spot.position = (before + following) / 2
+        else:
+            self._renumber(day_id)
+            return
+        self._touch(spot)
+
+    def _renumber(self, day_id):
+        for number, spot in enumerate(self.order[day_id], start=1):
+            spot.position = number * POSITION_STEP
+            self._touch(spot)
+
+    def _touch(self, spot):
+        if spot.pk is not None:
+            self.changed[spot.pk] = spot
+
+    # --- Operations ---
+    def add(self, index, operation):
+        day_id = self._day(index, operation['day'])
+        spot = TouristSpot(day_id=day_id, name=operation['name'], location=operation['location'])
+        self._place(index, spot, day_id, operation.get('after', ...))
+        self.created.append(spot)
+
+    def remove(self, index, operation):
+        spot = self._spot(index, operation['spot'])
+        self.order[spot.day_id].remove(spot)
+        del self.spots[spot.pk]
+        self.changed.pop(spot.pk, None)
+        self.removed.append(spot.pk)
+
+    def move(self, index, operation):
+        spot = self._spot(index, operation['spot'])
+        day_id = self._day(index, operation.get('day', spot.day_id))
+        self.order[spot.day_id].remove(spot)
+        self._place(index, spot, day_id, operation.get('after', ...))
+
+    def save(self):
+        if self.removed:
+            TouristSpot.objects.filter(pk__in=self.removed).delete()
+        if self.created:
+            TouristSpot.objects.bulk_create(self.created)
+        if self.changed:
+            TouristSpot.objects.bulk_update(list(self.changed.values()), ['day', 'position'])
+
+
+def apply_spot_edits(itinerary, operations):
+    """
+    Applies validated operations (see SpotEditSerializer) in order, all or
+    nothing. Raises SpotEditError for an operation that cannot be applied.
+    """
+    with transaction.atomic():
+        batch = _Batch(itinerary)
+        for index, operation in enumerate(operations):
+            getattr(batch, operation['op'])(index, operation)
+        batch.save()
+    return {'created': len(batch.created), 'updated': len(batch.changed), 'removed': len(batch.removed)}
@@ -1,3 +1,463 @@
+import json
+from datetime import date, time, timedelta
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from . import recommender, spatial
+from .itinerary_generator import cluster, distance_matrix, order_route, plan, stops_per_day, trip_days
+from .itinerary_reads import itinerary_tree
+from .models import Day, Interest, Itinerary, Spot, TouristSpot
+from .recommender import SpotMatrix
+from .serializers import ItineraryReadSerializer
+from .spot_editing import MIN_GAP, POSITION_STEP, apply_spot_edits
+from .spatial import SpatialIndex
+from .views import haversine_distance
+
+
+def make_user(username, **fields):
+    return CustomUser.objects.create_user(username=username, email=f'{username}@example.com', **fields)
+
+
+def api_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+class PersonalizeTestCase(TestCase):
+    def setUp(self):
+        # The in-memory indexes compare themselves against version counters in the cache.
+        cache.clear()
+        self.user = make_user('traveller')
+
+
+# --- Recommendations ---
+class SpotMatrixTests(TestCase):
+    def setUp(self):
+        self.matrix = SpotMatrix(capacity=2)
+
+    def test_filters_by_distance_tags_and_opening_hours(self):
+        self.matrix.put(1, 0.0, 0.00, None, None, [10])
+        self.matrix.put(2, 0.0, 0.01, time(9), time(17), [10, 20])
+        self.matrix.put(3, 0.0, 0.02, time(20), time(2), [20])   # Open overnight.
+        self.matrix.put(4, 0.0, 1.00, None, None, [10])          # ~111 km away.
+
+        ids = lambda **options: [spot_id for spot_id, _ in self.matrix.recommend(0.0, 0.0, 5, **options)]
+        self.assertEqual(ids(), [1, 2, 3])
+        self.assertEqual(ids(tag_ids=[20]), [2, 3])
+        self.assertEqual(ids(timing='MORNING'), [1, 2])
+        self.assertEqual(ids(timing='EVENING'), [1, 3])
+        self.assertEqual(ids(tag_ids=[99]), [])
+        self.assertEqual(ids(k=2), [1, 2])
+
+    def test_matches_a_plain_haversine_scan(self):
+        rng = np.random.default_rng(7)
+        points = rng.uniform([23.7, 90.3], [23.9, 90.5], size=(300, 2))
+        for spot_id, (latitude, longitude) in enumerate(points, start=1):
+            self.matrix.put(spot_id, latitude, longitude, None, None, [])
+
+        expected = sorted(
+            (haversine_distance(23.8, 90.4, latitude, longitude), spot_id)
+            for spot_id, (latitude, longitude) in enumerate(points, start=1)
+        )
+        expected = [spot_id for distance, spot_id in expected if distance <= 5][:20]
+        self.assertEqual([spot_id for spot_id, _ in self.matrix.recommend(23.8, 90.4, 5, k=20)], expected)
+
+    def test_removed_spots_are_skipped(self):
+        self.matrix.put(1, 0.0, 0.0, None, None, [])
+        self.matrix.remove(1)
+        self.assertEqual(self.matrix.recommend(0.0, 0.0, 5), [])
+
+
+    def test_compacts_once_half_the_rows_are_dead(self):
+        for spot_id in range(1, 201):
+            self.matrix.put(spot_id, 0.0, spot_id / 10000, None, None, [])
+        for spot_id in range(1, 102):
+            self.matrix.remove(spot_id)
+        self.assertEqual(self.matrix.size, 99)
+        self.assertEqual([spot_id for spot_id, _ in self.matrix.recommend(0.0, 0.0, 5, k=3)], [102, 103, 104])
+        self.matrix.put(102, 0.0, 0.0, None, None, [])
+        self.assertEqual(self.matrix.size, 99)
+
+class RecommendationTests(PersonalizeTestCase):
+    def recommend(self, **data):
+        response = api_client(self.user).post('/api/personalize/recommendations/', data, format='json')
+        self.assertEqual(response.status_code, 200)
+        return [(row['name'], row['distance_km']) for row in response.json()]
+
+    def test_spot_changes_reach_the_built_matrix(self):
+        museum = Interest.objects.create(name='Museum')
+        spot = Spot.objects.create(name='Gallery', latitude=23.81, longitude=90.40)
+        self.assertEqual(self.recommend(latitude=23.8, longitude=90.4, preferences=[museum.id]), [])
+        version = recommender.get_matrix().version
+
+        with self.captureOnCommitCallbacks(execute=True):
+            spot.tags.add(museum)
+        self.assertEqual(recommender.get_matrix().version, version + 1)
+        self.assertEqual(self.recommend(latitude=23.8, longitude=90.4, preferences=[museum.id]), [('Gallery', 1.11)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            spot.delete()
+        self.assertEqual(self.recommend(latitude=23.8, longitude=90.4), [])
+
+    def test_saving_a_spot_overwrites_its_row(self):
+        spot = Spot.objects.create(name='Park', latitude=23.8, longitude=90.4)
+        self.recommend(latitude=23.8, longitude=90.4)
+        for _ in range(5):
+            with self.captureOnCommitCallbacks(execute=True):
+                spot.save()
+        matrix = recommender.get_matrix()
+        self.assertEqual((matrix.size, len(matrix.rows)), (1, 1))
+
+    def test_change_from_another_process_triggers_a_rebuild(self):
+        self.assertEqual(self.recommend(latitude=23.8, longitude=90.4), [])
+        Spot.objects.create(name='Park', latitude=23.8, longitude=90.4)
+        recommender.VERSION.bump()  # As another worker's refresh would.
+        self.assertEqual(self.recommend(latitude=23.8, longitude=90.4), [('Park', 0.0)])
+
+
+# --- Spatial index ---
+class SpatialIndexTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.points = rng.uniform([23.6, 90.2], [24.0, 90.6], size=(400, 2))
+        self.ids = list(range(1, len(self.points) + 1))
+        self.index = SpatialIndex(self.ids, self.points[:, 0], self.points[:, 1])
+
+    def scan(self, latitude, longitude):
+        return sorted(
+            (haversine_distance(latitude, longitude, point_lat, point_lon), spot_id)
+            for spot_id, (point_lat, point_lon) in zip(self.ids, self.points)
+        )
+
+    def test_within_matches_a_full_scan(self):
+        expected = [spot_id for distance, spot_id in self.scan(23.8, 90.4) if distance <= 5]
+        self.assertEqual([spot_id for spot_id, _ in self.index.within(23.8, 90.4, 5)], expected)
+        self.assertEqual([spot_id for spot_id, _ in self.index.within(23.8, 90.4, 5, limit=3)], expected[:3])
+
+    def test_nearest_widens_the_search_until_k_are_found(self):
+        # A point well outside the cloud: the first cells searched are empty.
+        expected = [spot_id for _, spot_id in self.scan(25.0, 91.0)[:5]]
+        self.assertEqual([spot_id for spot_id, _ in self.index.nearest(25.0, 91.0, 5)], expected)
+        self.assertEqual(len(self.index.nearest(23.8, 90.4, 1000)), len(self.ids))
+
+    def test_radius_crosses_the_antimeridian(self):
+        index = SpatialIndex([1, 2, 3], [0.0, 0.0, 0.0], [179.99, -179.99, 170.0])
+        self.assertEqual(sorted(spot_id for spot_id, _ in index.within(0.0, 180.0, 5)), [1, 2])
+
+    def test_arrays_are_read_only(self):
+        with self.assertRaises(ValueError):
+            self.index.ids[0] = 99
+
+
+class NearbySpotsTests(PersonalizeTestCase):
+    def nearby(self, **params):
+        response = api_client(self.user).get('/api/personalize/spots/nearby/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.json()]
+
+    def test_writes_rebuild_the_index_after_commit(self):
+        Spot.objects.create(name='Near', latitude=23.801, longitude=90.4)
+        self.assertEqual(self.nearby(latitude=23.8, longitude=90.4, distance=2), ['Near'])
+        index = spatial.get_index()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Spot.objects.create(name='Nearer', latitude=23.8, longitude=90.4)
+        self.assertIsNot(spatial.get_index(), index)
+        self.assertEqual(self.nearby(latitude=23.8, longitude=90.4, distance=2), ['Nearer', 'Near'])
+        self.assertEqual(self.nearby(latitude=23.8, longitude=90.4, limit=1), ['Nearer'])
+
+    def test_unchanged_index_is_shared(self):
+        self.assertIs(spatial.get_index(), spatial.get_index())
+
+    def test_invalid_query(self):
+        response = api_client(self.user).get('/api/personalize/spots/nearby/', {'latitude': 95, 'longitude': 0})
+        self.assertEqual(response.status_code, 400)
+
+
+# --- Itinerary generation ---
+def make_itinerary(user, destination='Dhaka', days=3, **fields):
+    start = timezone.localdate() + timedelta(days=10)
+    values = dict(user=user, destination=destination, start_date=start, end_date=start + timedelta(days=days - 1))
+    values.update(fields)
+    return Itinerary.objects.create(**values)
+
+
+class GeneratorTests(TestCase):
+    def test_trip_length_never_exceeds_the_dates(self):
+        itinerary = Itinerary(duration='1_WEEK', start_date=date(2030, 1, 1), end_date=date(2030, 1, 3))
+        self.assertEqual(trip_days(itinerary), 3)
+        itinerary.duration = '3_DAYS'
+        itinerary.end_date = date(2030, 1, 10)
+        self.assertEqual(trip_days(itinerary), 3)
+        self.assertEqual(stops_per_day(Itinerary(trip_type='FAMILY', budget='300-500+')), 4)
+
+    def test_clusters_respect_their_capacity(self):
+        rng = np.random.default_rng(1)
+        # Most points in one tight group, so unconstrained k-means would overfill it.
+        points = np.vstack([rng.normal(0, 0.1, size=(10, 2)), rng.normal(5, 0.1, size=(2, 2))])
+        labels = cluster(points, 3)
+        self.assertLessEqual(np.bincount(labels, minlength=3).max(), 4)
+
+    def test_route_is_the_shortest_path_on_a_line(self):
+        longitudes = [0.0, 0.3, 0.1, 0.4, 0.2]
+        distances = distance_matrix(np.zeros(5), np.array(longitudes))
+        order = order_route(distances)
+        self.assertIn([longitudes[stop] for stop in order], ([0.0, 0.1, 0.2, 0.3, 0.4], [0.4, 0.3, 0.2, 0.1, 0.0]))
+
+    def test_plan_visits_every_point_once(self):
+        rng = np.random.default_rng(2)
+        points = rng.uniform([23.7, 90.3], [23.9, 90.5], size=(14, 2))
+        routes, _ = plan(points[:, 0], points[:, 1], days=5)
+        self.assertEqual(len(routes), 5)
+        self.assertEqual(sorted(stop for route in routes for stop in route), list(range(14)))
+        routes, _ = plan(points[:2, 0], points[:2, 1], days=3)
+        self.assertEqual([len(route) for route in routes], [1, 1, 0])
+
+
+class GenerateItineraryTests(PersonalizeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.museum = Interest.objects.create(name='Museum')
+        self.user.preferences.add(self.museum)
+        rng = np.random.default_rng(4)
+        for number, (latitude, longitude) in enumerate(rng.uniform([23.7, 90.3], [23.9, 90.5], size=(20, 2))):
+            spot = Spot.objects.create(name=f'Spot {number}', city='Dhaka', latitude=latitude, longitude=longitude)
+            if number < 5:
+                spot.tags.add(self.museum)
+
+    def generate(self, itinerary, user=None, **data):
+        return api_client(user or self.user).post(f'/api/personalize/itineraries/{itinerary.pk}/generate/', data, format='json')
+
+    def test_fills_every_day_in_visiting_order(self):
+        itinerary = make_itinerary(self.user, trip_type='FAMILY', destination='dhaka, Bangladesh')
+        response = self.generate(itinerary)
+        self.assertEqual(response.status_code, 201)
+        days = response.json()['days']
+        self.assertEqual([day['day_number'] for day in days], [1, 2, 3])
+        names = [spot['name'] for day in days for spot in day['spots']]
+        self.assertEqual(len(names), 9)
+        # The spots matching the user's interests are picked first.
+        self.assertTrue({f'Spot {number}' for number in range(5)} <= set(names))
+
+        for day in days:
+            stored = TouristSpot.objects.filter(day_id=day['id']).values_list('name', flat=True)
+            self.assertEqual(list(stored), [spot['name'] for spot in day['spots']])
+
+    def test_regenerating_replaces_the_days_only_when_asked(self):
+        itinerary = make_itinerary(self.user)
+        self.generate(itinerary)
+        added = TouristSpot.objects.create(day=itinerary.days.first(), name='Added by hand', position=1)
+        self.assertEqual(self.generate(itinerary).status_code, 409)
+        self.assertTrue(TouristSpot.objects.filter(pk=added.pk).exists())
+
+        self.assertEqual(self.generate(itinerary, replace=True).status_code, 201)
+        self.assertEqual(itinerary.days.count(), 3)
+        self.assertFalse(TouristSpot.objects.filter(pk=added.pk).exists())
+
+    def test_days_without_spots_are_replaced(self):
+        itinerary = make_itinerary(self.user)
+        Day.objects.create(itinerary=itinerary, day_number=1)
+        self.assertEqual(self.generate(itinerary).status_code, 201)
+        self.assertEqual(itinerary.days.count(), 3)
+
+    def test_unknown_destination_and_foreign_itinerary(self):
+        self.assertEqual(self.generate(make_itinerary(self.user, destination='Atlantis')).status_code, 400)
+        self.assertEqual(self.generate(make_itinerary(make_user('other'))).status_code, 404)
+
+
+# --- Itinerary list ---
+class ItineraryListTests(PersonalizeTestCase):
+    def add_spots(self, itinerary, spots_per_day):
+        for number, count in enumerate(spots_per_day, start=1):
+            day = Day.objects.create(itinerary=itinerary, day_number=number)
+            for position in range(count):
+                TouristSpot.objects.create(day=day, name=f'Stop {position}', location='here', position=position)
+
+    def rows(self, **params):
+        response = api_client(self.user).get('/api/personalize/itineraries/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_counts_progress_and_days_left(self):
+        itinerary = make_itinerary(self.user, days=4)
+        self.add_spots(itinerary, [2, 0, 3])
+        make_itinerary(make_user('other'))
+
+        [row] = self.rows()['results']
+        self.assertEqual(
+            (row['days_with_spots'], row['total_spots'], row['planning_progress'], row['days_left']),
+            (2, 5, 50, 10),
+        )
+        # Same numbers as the full read.
+        detail = api_client(self.user).get(f'/api/personalize/itineraries/{itinerary.pk}/').json()
+        self.assertEqual((detail['planning_progress'], detail['days_left']), (50, 10))
+
+    def test_started_trip_has_no_days_left(self):
+        today = timezone.localdate()
+        make_itinerary(self.user, start_date=today, end_date=today + timedelta(days=2))
+        self.assertIsNone(self.rows()['results'][0]['days_left'])
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        make_itinerary(self.user)
+        with CaptureQueriesContext(connection) as one:
+            self.rows()
+        for _ in range(5):
+            self.add_spots(make_itinerary(self.user), [1, 1])
+        with CaptureQueriesContext(connection) as six:
+            self.assertEqual(len(self.rows()['results']), 6)
+        self.assertEqual(len(one), len(six))
+
+    def test_latest_trip_first_across_pages(self):
+        trips = [make_itinerary(self.user, start_date=date(2030, 1, day), end_date=date(2030, 1, day)) for day in (5, 1, 9)]
+        first = self.rows(page_size=2)
+        second = self.rows(page_size=2, cursor=first['next_cursor'])
+        self.assertEqual(
+            [row['id'] for row in first['results'] + second['results']],
+            [trips[2].id, trips[0].id, trips[1].id],
+        )
+        self.assertIsNone(second['next_cursor'])
+
+
+# --- Full itinerary reads ---
+class ItineraryReadTests(PersonalizeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.itinerary = make_itinerary(self.user, days=3)
+        for number, names in enumerate((['b', 'a'], [], ['c']), start=1):
+            day = Day.objects.create(itinerary=self.itinerary, day_number=number)
+            for position, name in enumerate(names):
+                TouristSpot.objects.create(day=day, name=name, location='here', position=position)
+
+    def test_matches_the_serializer_output(self):
+        expected = json.loads(JSONRenderer().render(ItineraryReadSerializer(self.itinerary).data))
+        response = api_client(self.user).get(f'/api/personalize/itineraries/{self.itinerary.pk}/')
+        self.assertEqual(response.json(), expected)
+        self.assertEqual([[spot['name'] for spot in day['spots']] for day in expected['days']], [['b', 'a'], [], ['c']])
+
+    def test_two_queries_whatever_the_trip_length(self):
+        with self.assertNumQueries(2):
+            itinerary_tree(self.itinerary.pk, self.user)
+        day = Day.objects.create(itinerary=self.itinerary, day_number=4)
+        TouristSpot.objects.bulk_create(TouristSpot(day=day, name=f's{n}', location='x', position=n) for n in range(30))
+        with self.assertNumQueries(2):
+            self.assertEqual(len(itinerary_tree(self.itinerary.pk, self.user)['days']), 4)
+
+    def test_other_users_itinerary_is_not_found(self):
+        response = api_client(make_user('other')).get(f'/api/personalize/itineraries/{self.itinerary.pk}/')
+        self.assertEqual(response.status_code, 404)
+
+
+# --- Spot editing ---
+class SpotEditingTests(PersonalizeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.itinerary = make_itinerary(self.user, days=2)
+        self.day1 = Day.objects.create(itinerary=self.itinerary, day_number=1)
+        self.day2 = Day.objects.create(itinerary=self.itinerary, day_number=2)
+        self.a, self.b, self.c = (
+            TouristSpot.objects.create(day=self.day1, name=name, location='here', position=number * POSITION_STEP)
+            for number, name in enumerate('abc', start=1)
+        )
+
+    def edit(self, *operations):
+        return api_client(self.user).post(
+            f'/api/personalize/itineraries/{self.itinerary.pk}/spots/batch/', {'operations': operations}, format='json'
+        )
+
+    def names(self, day):
+        return list(day.spots.values_list('name', flat=True))
+
+    def test_move_within_a_day_writes_one_row(self):
+        response = self.edit({'op': 'move', 'spot': self.c.pk, 'after': self.a.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['changes'], {'created': 0, 'updated': 1, 'removed': 0})
+        self.assertEqual(self.names(self.day1), ['a', 'c', 'b'])
+        self.assertEqual([spot['name'] for spot in response.json()['itinerary']['days'][0]['spots']], ['a', 'c', 'b'])
+
+    def test_insert_first_last_and_move_across_days(self):
+        response = self.edit(
+            {'op': 'add', 'day': self.day1.pk, 'name': 'start', 'location': 'x', 'after': None},
+            {'op': 'add', 'day': self.day1.pk, 'name': 'end', 'location': 'x'},
+            {'op': 'move', 'spot': self.b.pk, 'day': self.day2.pk},
+            {'op': 'remove', 'spot': self.a.pk},
+        )
+        self.assertEqual(response.json()['changes'], {'created': 2, 'updated': 1, 'removed': 1})
+        self.assertEqual(self.names(self.day1), ['start', 'c', 'end'])
+        self.assertEqual(self.names(self.day2), ['b'])
+
+    def test_exhausted_gap_renumbers_the_day(self):
+        operations = [{'op': 'add', 'day': self.day1.pk, 'name': f'n{number}', 'location': 'x', 'after': self.a.pk}
+                      for number in range(40)]
+        apply_spot_edits(self.itinerary, operations)
+        # Each insert goes right after `a`, so the newest comes first.
+        expected = ['a', *(f'n{number}' for number in reversed(range(40))), 'b', 'c']
+        self.assertEqual(self.names(self.day1), expected)
+        positions = list(self.day1.spots.values_list('position', flat=True))
+        self.assertTrue(all(later - earlier > MIN_GAP for earlier, later in zip(positions, positions[1:])))
+
+    def test_batch_is_all_or_nothing(self):
+        other_day = Day.objects.create(itinerary=make_itinerary(make_user('other')), day_number=1)
+        response = self.edit(
+            {'op': 'move', 'spot': self.c.pk, 'after': None},
+            {'op': 'add', 'day': other_day.pk, 'name': 'sneaky', 'location': 'x'},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['operation'], 1)
+        self.assertEqual(self.names(self.day1), ['a', 'b', 'c'])
+        self.assertEqual(self.edit({'op': 'move'}).status_code, 400)
+
+    def test_added_spot_goes_last_whatever_the_client_sends(self):
+        response = api_client(self.user).post(
+            f'/api/personalize/days/{self.day1.pk}/add-spot/',
+            {'name': 'd', 'location': 'x', 'position': -5, 'day': self.day2.pk}, format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['day'], self.day1.pk)
+        self.assertEqual(self.names(self.day1), ['a', 'b', 'c', 'd'])
+
+
+# --- Interest catalogue ---
+class CatalogueTests(PersonalizeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hiking = Interest.objects.create(name='Hiking')
+
+    def test_list_is_served_from_the_snapshot(self):
+        client = api_client(self.user)
+        first = client.get('/api/personalize/interests/')
+        self.assertEqual(first.json(), [{'id': self.hiking.id, 'name': 'Hiking'}])
+        # Once the snapshot is built, listing does not touch the database.
+        with self.assertNumQueries(0):
+            second = client.get('/api/personalize/interests/')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(client.get('/api/personalize/interests/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+    def test_changes_replace_the_snapshot_after_commit(self):
+        client = api_client(self.user)
+        etag = client.get('/api/personalize/interests/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Interest.objects.create(name='Diving')
+        response = client.get('/api/personalize/interests/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['name'] for row in response.json()], ['Hiking', 'Diving'])
+
+    def test_preferences_are_checked_against_the_snapshot(self):
+        client = api_client(self.user)
+        response = client.post('/api/personalize/preferences/create/', {'preferences': [self.hiking.id, 999]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('999', response.json()['preferences'][0])
 
-# Create your tests here.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hiking.delete()
+        response = client.put('/api/personalize/preferences/update/', {'preferences': [self.hiking.id]}, format='json')
+        self.assertEqual(response.status_code, 400)
@@ -1,11 +1,16 @@
 from django.urls import path
-from .views import interests, create_preference, update_preference, add_tourist_spot, create_itinerary, get_recommendations
+from .views import interests, create_preference, update_preference, add_tourist_spot, create_itinerary, get_recommendations, nearby_spots, generate_itinerary_schedule, my_itineraries, get_itinerary, edit_itinerary_spots
 
 urlpatterns = [
     path('interests/', interests, name='interests-list'),
     path('preferences/create/', create_preference, name='create-preference'),
     path('preferences/update/', update_preference, name='update-preference'),
+    path('itineraries/', my_itineraries, name='itinerary-list'),
     path('itineraries/create/', create_itinerary, name='create-itinerary'),
+    path('itineraries/<int:itinerary_id>/', get_itinerary, name='get-itinerary'),
+    path('itineraries/<int:itinerary_id>/generate/', generate_itinerary_schedule, name='generate-itinerary'),
+    path('itineraries/<int:itinerary_id>/spots/batch/', edit_itinerary_spots, name='edit-itinerary-spots'),
     path('days/<int:day_id>/add-spot/', add_tourist_spot, name='add-tourist-spot'),
     path('recommendations/', get_recommendations, name='get-recommendations'),
+    path('spots/nearby/', nearby_spots, name='nearby-spots'),
 ]
\ No newline at end of file
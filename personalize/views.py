@@ -2,19 +2,32 @@ from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import Interest, TouristSpot
-from .serializers import InterestSerializer, UserPreferenceSerializer, ItineraryCreateSerializer, ItineraryReadSerializer, RecommendationRequestSerializer
+from django.db.models import Count, DateField, DurationField, ExpressionWrapper, F, Q, Value
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from events.pagination import KeysetPagination
+from .models import Interest, Itinerary, Day, TouristSpot, Spot
+from .serializers import InterestSerializer, UserPreferenceSerializer, ItineraryCreateSerializer, ItineraryReadSerializer, ItineraryListSerializer, RecommendationRequestSerializer, GenerateItinerarySerializer, SpotSerializer, NearbySpotsQuerySerializer, TouristSpotSerializer, TouristSpotReadSerializer, SpotEditSerializer
+from . import catalogue, recommender, spatial
+from .itinerary_generator import generate_itinerary
+from .itinerary_reads import itinerary_tree
+from .spot_editing import SpotEditError, apply_spot_edits, next_position
+from .geo import EARTH_RADIUS_KM
 from math import radians, sin, cos, sqrt, atan2
-from datetime import time
 
 # --- Function 1: View all interests ---
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def interests(request):
     """Returns a list of all available interests."""
-    all_interests = Interest.objects.all()
-    serializer = InterestSerializer(all_interests, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    # Served from the process-local catalogue snapshot, already encoded.
+    snapshot = catalogue.get_snapshot()
+    response = get_conditional_response(request, etag=snapshot.etag)
+    if response is None:
+        response = HttpResponse(snapshot.body, content_type='application/json')
+    response['ETag'] = snapshot.etag
+    return response
 
 # --- Function 2: Create user preference list ---
 @api_view(['POST'])
@@ -63,23 +76,80 @@ def create_itinerary(request):
     serializer = ItineraryCreateSerializer(data=request.data)
     if serializer.is_valid():
         # Save the itinerary and link it to the current user
-        itinerary = serializer.save(user=user)
         serializer.save(user=user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# --- List the user's itineraries ---
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_itinerary(request, itinerary_id):
-    """Retrieve an itinerary with its schedule (days + spots)."""
+def my_itineraries(request):
+    """
+    The user's itineraries, latest trip first, paginated with `?cursor=` and
+    `?page_size=`. Spot counts and days left come from one annotated query.
+    """
+    today = timezone.localdate()
+    itineraries = Itinerary.objects.filter(user=request.user).annotate(
+        days_with_spots=Count('days', filter=Q(days__spots__isnull=False), distinct=True),
+        total_spots=Count('days__spots'),
+        until_start=ExpressionWrapper(F('start_date') - Value(today, output_field=DateField()), output_field=DurationField()),
+    )
+    paginator = KeysetPagination(ordering=('-start_date', '-id'))
+    page = paginator.paginate_queryset(itineraries, request)
+    return paginator.get_paginated_response(ItineraryListSerializer(page, many=True).data)
+
+# --- Generate an itinerary's schedule ---
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def generate_itinerary_schedule(request, itinerary_id):
+    """
+    Fills the itinerary with one route of spots per day, picked from the
+    destination's spots by the user's interests. Replaces any existing days;
+    if they already have spots, only when the body is {"replace": true}.
+    """
+    serializer = GenerateItinerarySerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
     try:
         itinerary = Itinerary.objects.get(id=itinerary_id, user=request.user)
     except Itinerary.DoesNotExist:
         return Response({"error": "Itinerary not found."}, status=status.HTTP_404_NOT_FOUND)
 
-    serializer = ItineraryReadSerializer(itinerary)
-    return Response(serializer.data)
+    if not serializer.validated_data['replace'] and TouristSpot.objects.filter(day__itinerary=itinerary).exists():
+        return Response(
+            {"error": "The itinerary already has spots. Send {\"replace\": true} to overwrite them."},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    interest_ids = request.user.preferences.values_list('id', flat=True)
+    generated = generate_itinerary(itinerary, interest_ids)
+    if generated is None:
+        return Response(
+            {"error": f"No spots are known for {itinerary.destination} yet."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    days, spots_by_day, total_km = generated
+    return Response({
+        "id": itinerary.id,
+        "total_distance_km": round(total_km, 2),
+        "days": [
+            {"id": day.id, "day_number": day.day_number, "spots": TouristSpotReadSerializer(spots, many=True).data}
+            for day, spots in zip(days, spots_by_day)
+        ],
+    }, status=status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_itinerary(request, itinerary_id):
+    """Retrieve an itinerary with its schedule (days + spots)."""
+    # Same output as ItineraryReadSerializer, in two queries whatever the trip length.
+    itinerary = itinerary_tree(itinerary_id, request.user)
+    if itinerary is None:
+        return Response({"error": "Itinerary not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(itinerary)
 
 
 @api_view(['POST'])
@@ -93,14 +163,38 @@ def add_tourist_spot(request, day_id):
 
     serializer = TouristSpotSerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save(day=day)
+        serializer.save(day=day, position=next_position(day))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+# --- Batch edit the spots of an itinerary ---
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def edit_itinerary_spots(request, itinerary_id):
+    """
+    Applies a list of add/remove/move operations to the itinerary's spots in
+    one transaction (see SpotEditOperationSerializer). Either every operation
+    is applied or none; the response holds the updated itinerary.
+    """
+    try:
+        itinerary = Itinerary.objects.get(id=itinerary_id, user=request.user)
+    except Itinerary.DoesNotExist:
+        return Response({"error": "Itinerary not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = SpotEditSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        changes = apply_spot_edits(itinerary, serializer.validated_data['operations'])
+    except SpotEditError as exc:
+        return Response({"error": str(exc), "operation": exc.index}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"changes": changes, "itinerary": itinerary_tree(itinerary.id, request.user)})
+
 def haversine_distance(lat1, lon1, lat2, lon2):
     """Calculate the distance between two points in kilometers."""
-    R = 6371.0  # Radius of Earth in kilometers
+    R = EARTH_RADIUS_KM
 
     lat1_rad, lon1_rad = radians(lat1), radians(lon1)
     lat2_rad, lon2_rad = radians(lat2), radians(lon2)
@@ -114,6 +208,17 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     distance = R * c
     return distance
 
+def _spots_with_distance(nearest):
+    """Loads the spots of [(spot_id, distance_km), ...] in that order, with `distance_km` set."""
+    spots = Spot.objects.prefetch_related('tags').in_bulk([spot_id for spot_id, _ in nearest])
+    result = []
+    for spot_id, distance in nearest:
+        spot = spots.get(spot_id)
+        if spot is not None:  # Deleted since the index was built.
+            spot.distance_km = round(distance, 2)
+            result.append(spot)
+    return result
+
 # --- THE NEW RECOMMENDATION VIEW ---
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -127,46 +232,34 @@ def get_recommendations(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     data = serializer.validated_data
-    user_lat = data['latitude']
-    user_lon = data['longitude']
-    max_distance_km = data['distance']
-
-    # 1. Start with all spots
-    queryset = Spot.objects.all()
-
-    # 2. Filter by user preferences (tags) if provided
-    if 'preferences' in data and data['preferences']:
-        queryset = queryset.filter(tags__in=data['preferences']).distinct()
-
-    # 3. Filter by timing (This requires making assumptions about your Spot model)
-    #    Let's assume you have 'start_time' on your Spot model for this to work.
-    #    This is a simplified example.
-    timing = data['timing']
-    if timing == 'MORNING':
-        # Assuming you add `start_time` to your Spot model
-        # queryset = queryset.filter(start_time__gte=time(6, 0), start_time__lt=time(12, 0))
-        pass # Add your time filtering logic here
-    elif timing == 'AFTERNOON':
-        # queryset = queryset.filter(start_time__gte=time(12, 0), start_time__lt=time(18, 0))
-        pass
-    elif timing == 'EVENING':
-        # queryset = queryset.filter(start_time__gte=time(18, 0), start_time__lt=time(23, 59))
-        pass
-
-    # 4. Filter by distance (in Python, since we are not using GeoDjango)
-    all_matching_spots = list(queryset)
-    recommended_spots = []
-
-    for spot in all_matching_spots:
-        if spot.latitude and spot.longitude:
-            distance = haversine_distance(user_lat, user_lon, spot.latitude, spot.longitude)
-            if distance <= max_distance_km:
-                # You can even add the calculated distance to the spot object for the API response
-                spot.distance_from_user = round(distance, 2)
-                recommended_spots.append(spot)
-    
-    # 5. Serialize the final list of spots
-    # We need a serializer that can show the 'distance_from_user'
-    # For now, we reuse the SpotSerializer
-    output_serializer = SpotSerializer(recommended_spots, many=True)
+    # Distance, preference and timing filters run in one vectorized pass over
+    # the in-memory spot matrix; only the spots that made the cut are loaded.
+    nearest = recommender.get_matrix().recommend(
+        float(data['latitude']),
+        float(data['longitude']),
+        data['distance'],
+        tag_ids=data.get('preferences', []),
+        timing=data['timing'],
+        k=data['limit'],
+    )
+
+    output_serializer = SpotSerializer(_spots_with_distance(nearest), many=True)
     return Response(output_serializer.data)
+
+
+# --- Nearby spots ---
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def nearby_spots(request):
+    """Spots around a point, nearest first, looked up in the in-memory grid index."""
+    query = NearbySpotsQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    options = query.validated_data
+    index = spatial.get_index()
+    if 'distance' in options:
+        nearest = index.within(options['latitude'], options['longitude'], options['distance'], limit=options['limit'])
+    else:
+        nearest = index.nearest(options['latitude'], options['longitude'], options['limit'])
+    return Response(SpotSerializer(_spots_with_distance(nearest), many=True).data)